@@ -0,0 +1,144 @@
+"""
+Benchmark for the field ciphertext formats.
+
+Generates a seeded dataset of invoice and job ticket field values, encrypts
+it in the legacy Fernet format and in the AES-GCM envelope format, and
+reports per-value and per-row storage, the size of an SQLite table holding
+the rows, and encrypt/decrypt throughput.
+
+Usage:
+    python -m benchmarks.bench_ciphertext_format
+    python -m benchmarks.bench_ciphertext_format --rows 5000 --seed 7
+"""
+
+import sys
+import os
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.encryption import _decrypt_value, _seal, fernet
+
+INVOICE_FIELDS = [
+    "customer_name", "company_name", "subtotal", "service_fee", "tax",
+    "total_amount", "line_items", "job_ticket_ids",
+]
+TICKET_FIELDS = ["location", "work_description"]
+FIELDS = INVOICE_FIELDS + TICKET_FIELDS
+
+STREETS = ["Main St", "Elm Ave", "Oak Rd", "Pine Ln", "Cedar Blvd", "Lakeview Dr"]
+WORK = [
+    "Replaced pressure regulator and tested for leaks",
+    "Annual furnace inspection, cleaned burners and replaced filter",
+    "Diagnosed compressor fault, ordered replacement part",
+    "Installed new thermostat and rewired control board",
+]
+
+
+def build_dataset(count, seed):
+    """Plaintext field values for `count` invoice + job ticket row pairs."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        subtotal = round(rng.uniform(50, 5000), 2)
+        fee = round(rng.choice([0.0, 25.0, 45.0]), 2)
+        tax = round(subtotal * 0.0825, 2)
+        items = [
+            {"description": rng.choice(["Labor", "Parts", "Travel"]),
+             "quantity": rng.randint(1, 8), "rate": round(rng.uniform(20, 150), 2)}
+            for _ in range(rng.randint(1, 4))
+        ]
+        rows.append({
+            "customer_name": f"Customer {rng.randint(1, 99999)}",
+            "company_name": "Acme Field Services",
+            "subtotal": str(subtotal),
+            "service_fee": str(fee),
+            "tax": str(tax),
+            "total_amount": str(round(subtotal + fee + tax, 2)),
+            "line_items": json.dumps(items),
+            "job_ticket_ids": json.dumps(sorted(rng.sample(range(1, 100000), rng.randint(1, 3)))),
+            "location": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, Springfield",
+            "work_description": rng.choice(WORK),
+        })
+    return rows
+
+
+def fernet_encrypt(value):
+    return fernet.encrypt(value.encode()).decode()
+
+
+def envelope_encrypt(value):
+    return _seal(value.encode())
+
+
+def table_size(rows, column_type):
+    """Bytes used by an SQLite table holding the encrypted rows."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        connection = sqlite3.connect(path)
+        columns = ", ".join(f"{field} {column_type}" for field in FIELDS)
+        connection.execute(f"CREATE TABLE rows (id INTEGER PRIMARY KEY, {columns})")
+        placeholders = ", ".join("?" for _ in FIELDS)
+        connection.executemany(
+            f"INSERT INTO rows ({', '.join(FIELDS)}) VALUES ({placeholders})",
+            [[row[field] for field in FIELDS] for row in rows],
+        )
+        connection.commit()
+        connection.execute("VACUUM")
+        connection.close()
+        return os.path.getsize(path)
+
+
+def measure(label, dataset, encrypt, column_type):
+    """Encrypt and decrypt every value; print storage and throughput."""
+    values = [row[field] for row in dataset for field in FIELDS]
+    
+    started = time.perf_counter()
+    ciphertexts = [encrypt(value) for value in values]
+    encrypt_s = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    for ciphertext in ciphertexts:
+        _decrypt_value(ciphertext)
+    decrypt_s = time.perf_counter() - started
+    
+    stored = [len(c) for c in ciphertexts]
+    encrypted_rows = [dict(zip(FIELDS, ciphertexts[i:i + len(FIELDS)])) for i in range(0, len(ciphertexts), len(FIELDS))]
+    tax_sizes = [len(row["tax"]) for row in encrypted_rows]
+    db_bytes = table_size(encrypted_rows, column_type)
+    
+    print(
+        f"{label:<9} {sum(stored) / len(stored):>7.1f} B/value  {sum(tax_sizes) / len(tax_sizes):>6.1f} B/tax"
+        f"  {sum(stored) / len(dataset):>8.1f} B/row  {db_bytes / 1024:>9.1f} KiB table"
+        f"  {len(values) / encrypt_s:>9.0f} enc/s  {len(values) / decrypt_s:>9.0f} dec/s"
+    )
+    return sum(stored), db_bytes, decrypt_s
+
+
+def main():
+    """Compare Fernet and envelope ciphertexts on the same seeded dataset."""
+    parser = argparse.ArgumentParser(description="Benchmark field ciphertext formats")
+    parser.add_argument("--rows", type=int, default=2000, help="Invoice + job ticket row pairs (default: 2000)")
+    parser.add_argument("--seed", type=int, default=42, help="Dataset seed (default: 42)")
+    args = parser.parse_args()
+    
+    dataset = build_dataset(args.rows, args.seed)
+    plain = sum(len(row[field]) for row in dataset for field in FIELDS)
+    print(f"{args.rows} rows x {len(FIELDS)} encrypted fields, {plain / (args.rows * len(FIELDS)):.1f} B/value plaintext\n")
+    
+    fernet_bytes, fernet_db, fernet_s = measure("fernet", dataset, fernet_encrypt, "TEXT")
+    envelope_bytes, envelope_db, envelope_s = measure("envelope", dataset, envelope_encrypt, "BLOB")
+    
+    print(f"\nstorage: {envelope_bytes / fernet_bytes:.0%} of Fernet ciphertext bytes, "
+          f"{envelope_db / fernet_db:.0%} of table size")
+    print(f"decrypt: {fernet_s / envelope_s:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark for memoized decryption of encrypted model fields.
+
+Builds invoices and job tickets in memory (no database) and serializes each
+row several times, the way a request touches a row through response
+validation, manual dict building and rollups. "uncached" clears the memo
+before every pass, which reproduces the old decrypt-on-every-access cost;
+"memoized" keeps it, so each ciphertext is decrypted once per instance.
+
+Usage:
+    python -m benchmarks.bench_decrypt_memo
+    python -m benchmarks.bench_decrypt_memo --rows 500 --touches 3
+"""
+
+import sys
+import os
+import argparse
+import time
+from datetime import datetime
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.encryption import clear_decrypted
+from models.invoice import Invoice
+from models.job_ticket import JobTicket
+from schemas.invoice import InvoiceResponse
+
+
+def build_rows(count):
+    """Create invoices and job tickets with encrypted fields, memo cleared."""
+    invoices = []
+    tickets = []
+    for i in range(count):
+        invoice = Invoice(
+            id=i + 1,
+            user_id=1,
+            invoice_number=f"INV-{i:06d}",
+            invoice_date=datetime(2026, 1, 1),
+            customer_name=f"Customer {i}",
+            company_name="Acme Field Services",
+            subtotal=1250.5,
+            service_fee=25.0,
+            tax=103.17,
+            total_amount=1378.67,
+            line_items=[{"description": "Labor", "quantity": 4, "rate": 95.0}],
+            job_ticket_ids=[i, i + 1],
+            status="draft",
+            created_by="bench",
+            created_at=datetime(2026, 1, 1),
+        )
+        ticket = JobTicket(
+            id=i + 1,
+            company_id=1,
+            company_name="Acme Field Services",
+            location=f"{i} Main Street, Springfield",
+            work_description="Replaced pressure regulator and tested for leaks",
+            status="submitted",
+        )
+        clear_decrypted(invoice)
+        clear_decrypted(ticket)
+        invoices.append(invoice)
+        tickets.append(ticket)
+    return invoices, tickets
+
+
+def serialize(invoices, tickets):
+    """One serialization pass over every row."""
+    for invoice in invoices:
+        InvoiceResponse.model_validate(invoice)
+    for ticket in tickets:
+        {"location": ticket.location, "work_description": ticket.work_description}
+
+
+def run(label, invoices, tickets, touches, memoized):
+    """Serialize every row `touches` times and return microseconds per row."""
+    started = time.perf_counter()
+    for _ in range(touches):
+        if not memoized:
+            for row in invoices + tickets:
+                clear_decrypted(row)
+        serialize(invoices, tickets)
+    elapsed = time.perf_counter() - started
+    per_row_us = elapsed / len(invoices) * 1e6
+    print(f"{label:<10} {len(invoices):>6} rows x {touches} touches  {elapsed * 1000:>9.1f} ms  {per_row_us:>9.1f} us/row")
+    return per_row_us
+
+
+def main():
+    """Compare uncached and memoized serialization of the same rows."""
+    parser = argparse.ArgumentParser(description="Benchmark memoized decryption of encrypted fields")
+    parser.add_argument("--rows", type=int, default=1000, help="Invoices (and job tickets) serialized (default: 1000)")
+    parser.add_argument("--touches", type=int, default=3,
+                        help="Times each row is serialized within one request (default: 3)")
+    args = parser.parse_args()
+
+    invoices, tickets = build_rows(args.rows)
+    uncached = run("uncached", invoices, tickets, args.touches, memoized=False)
+
+    for row in invoices + tickets:
+        clear_decrypted(row)
+    memoized = run("memoized", invoices, tickets, args.touches, memoized=True)
+    print(f"\nspeedup: {uncached / memoized:.1f}x per row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""
+Microbenchmark suite for field encryption and model serialization.
+
+Runs a fixed set of named cases and reports per-operation timings, with
+machine-readable JSON output for tracking across releases:
+
+    encryption.*   single-value and bulk encrypt/decrypt (envelope and Fernet)
+    getter.*       encrypted property getters, cold (memo cleared) and warm
+    orm.*          query + hydrate + decrypt + serialize of 1/100/10000 rows,
+                   the way the list endpoints do it
+    json.*         encoding already-serialized rows
+
+Each case is timed over several rounds, each at least --min-time long; the
+reported time per operation is the median round (min and max are kept too).
+The ORM cases use their own in-memory SQLite database.
+
+Usage:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --filter orm. --output results.json
+    python -m benchmarks.suite --quick --compare baseline.json
+"""
+
+import sys
+import os
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cryptography
+import pydantic
+import sqlalchemy
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from core import encryption
+from core.blind_index import blind_index, token_indexes
+from database import Base
+from models.company import Company
+from models.invoice import Invoice
+from models.job_ticket import JobTicket
+from models.user import User
+from schemas.invoice import InvoiceList, InvoiceResponse
+
+CASES = []
+
+
+def case(name, ops=1, quick=True):
+    """
+    Register a benchmark case
+    
+    The decorated function does any setup and returns a callable that
+    performs `ops` operations per call. Cases with quick=False are skipped
+    by --quick.
+    """
+    def register(setup):
+        CASES.append({"name": name, "ops": ops, "quick": quick, "setup": setup})
+        return setup
+    return register
+
+
+# Encryption
+
+SAMPLE_VALUE = "1234 Main Street, Springfield"
+
+
+@case("encryption.encrypt_field")
+def _encrypt_single():
+    return lambda: encryption.encrypt_field(SAMPLE_VALUE)
+
+
+@case("encryption.decrypt_field.envelope")
+def _decrypt_envelope():
+    ciphertext = encryption.encrypt_field(SAMPLE_VALUE)
+    return lambda: encryption.decrypt_field(ciphertext)
+
+
+@case("encryption.decrypt_field.fernet")
+def _decrypt_fernet():
+    token = encryption.fernet.encrypt(SAMPLE_VALUE.encode()).decode()
+    return lambda: encryption.decrypt_field(token)
+
+
+@case("encryption.encrypt_bulk[1000]", ops=1000)
+def _encrypt_bulk():
+    values = [f"{i} Main Street, Springfield" for i in range(1000)]
+    return lambda: [encryption.encrypt_field(value) for value in values]
+
+
+@case("encryption.decrypt_many[1000]", ops=1000)
+def _decrypt_bulk():
+    ciphertexts = [encryption.encrypt_field(f"{i} Main Street, Springfield") for i in range(1000)]
+    return lambda: encryption.decrypt_many(ciphertexts, workers=0)
+
+
+@case("encryption.blind_index")
+def _blind_index():
+    return lambda: (blind_index("job_tickets.location", SAMPLE_VALUE), token_indexes("job_tickets.location", SAMPLE_VALUE))
+
+
+# Property getters
+
+def _sample_invoice(i=0):
+    return Invoice(
+        id=i + 1,
+        user_id=1,
+        invoice_number=f"INV-{i:06d}",
+        invoice_date=datetime(2026, 1, 1),
+        customer_name=f"Customer {i}",
+        company_name="Acme Field Services",
+        subtotal=1250.5,
+        service_fee=25.0,
+        tax=103.17,
+        total_amount=1378.67,
+        line_items=[{"description": "Labor", "quantity": 4, "rate": 95.0, "cost": 380.0}],
+        job_ticket_ids=[i, i + 1],
+        status="draft",
+        created_by="bench",
+        created_at=datetime(2026, 1, 1),
+    )
+
+
+@case("getter.invoice.total_amount.cold")
+def _getter_cold():
+    invoice = _sample_invoice()
+    
+    def run():
+        encryption.clear_decrypted(invoice)
+        return invoice.total_amount
+    return run
+
+
+@case("getter.invoice.total_amount.warm")
+def _getter_warm():
+    invoice = _sample_invoice()
+    invoice.total_amount
+    return lambda: invoice.total_amount
+
+
+# ORM hydrate + serialize
+
+_databases = {}
+
+
+def _column_values(instance):
+    """Row of a transient instance keyed by column name, ciphertext included"""
+    return {
+        attr.columns[0].key: instance.__dict__.get(attr.key)
+        for attr in type(instance).__mapper__.column_attrs
+    }
+
+
+def _database(rows):
+    """In-memory database holding `rows` invoices and job tickets (built once per size)"""
+    if rows in _databases:
+        return _databases[rows]
+    
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        company = Company(name="Bench Co", normalized_name="bench co")
+        db.add(company)
+        db.flush()
+        user = User(email="bench@example.com", hashed_password="x", role="manager", company_id=company.id)
+        db.add(user)
+        db.flush()
+        
+        invoices = []
+        tickets = []
+        for i in range(rows):
+            invoice = _sample_invoice(i)
+            invoice.user_id = user.id
+            invoices.append(_column_values(invoice))
+            ticket = JobTicket(
+                id=i + 1, company_id=company.id, user_id=user.id, company_name="Acme Field Services",
+                ticket_number=f"{i:08d}", location=f"{i} Main Street, Springfield",
+                work_description="Replaced pressure regulator and tested for leaks",
+                parts_used='["regulator"]', status="submitted", created_at=datetime(2026, 1, 1),
+            )
+            tickets.append(_column_values(ticket))
+        db.execute(insert(Invoice.__table__), invoices)
+        db.execute(insert(JobTicket.__table__), tickets)
+        db.commit()
+    
+    _databases[rows] = engine
+    return engine
+
+
+def _serialize_invoices(db, rows):
+    invoices = db.query(Invoice).limit(rows).all()
+    encryption.decrypt_rows(invoices)
+    return InvoiceList(invoices=invoices, total=rows, skip=0, limit=rows).model_dump(mode="json")
+
+
+def _serialize_tickets(db, rows):
+    tickets = db.query(JobTicket).limit(rows).all()
+    encryption.decrypt_rows(tickets)
+    return [
+        {
+            "id": ticket.id,
+            "ticket_number": ticket.ticket_number,
+            "company_name": ticket.company_name,
+            "location": ticket.location,
+            "work_description": ticket.work_description,
+            "parts_used": ticket.parts_used,
+            "status": ticket.status,
+            "created_at": ticket.created_at.isoformat(),
+        }
+        for ticket in tickets
+    ]
+
+
+def _orm_case(kind, rows, serialize):
+    @case(f"orm.{kind}.hydrate_serialize[{rows}]", ops=rows, quick=rows <= 100)
+    def setup():
+        engine = _database(rows)
+        
+        def run():
+            # A fresh session per call so nothing is cached between runs
+            with Session(engine) as db:
+                return serialize(db, rows)
+        return run
+
+
+for _rows in (1, 100, 10000):
+    _orm_case("invoices", _rows, _serialize_invoices)
+    _orm_case("job_tickets", _rows, _serialize_tickets)
+
+
+# JSON encoding
+
+def _json_case(rows):
+    @case(f"json.encode.invoices.pydantic[{rows}]", ops=rows, quick=rows <= 100)
+    def pydantic_setup():
+        with Session(_database(rows)) as db:
+            invoices = db.query(Invoice).limit(rows).all()
+            encryption.decrypt_rows(invoices)
+            payload = InvoiceList(
+                invoices=[InvoiceResponse.model_validate(invoice) for invoice in invoices],
+                total=rows, skip=0, limit=rows,
+            )
+        return payload.model_dump_json
+    
+    @case(f"json.encode.invoices.stdlib[{rows}]", ops=rows, quick=rows <= 100)
+    def stdlib_setup():
+        with Session(_database(rows)) as db:
+            payload = _serialize_invoices(db, rows)
+        return lambda: json.dumps(payload)
+
+
+for _rows in (100, 10000):
+    _json_case(_rows)
+
+
+# Runner
+
+def measure(run, ops, rounds, min_time):
+    """Time `rounds` rounds of at least min_time seconds; return seconds per op for each round"""
+    run()  # warm up
+    
+    # Calls per round so that a round lasts at least min_time
+    calls = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(calls):
+            run()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        calls = max(calls * 2, int(calls * min_time / max(elapsed, 1e-9)) + 1)
+    
+    per_op = [elapsed / (calls * ops)]
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(calls):
+            run()
+        per_op.append((time.perf_counter() - started) / (calls * ops))
+    return per_op, calls
+
+
+def environment():
+    """Metadata recorded with every result file"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cryptography": cryptography.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+        "pydantic": pydantic.VERSION,
+        "ciphertext_format": encryption.settings.security.ciphertext_format,
+    }
+
+
+def compare(results, baseline_path):
+    """Print the change in median time per op against an earlier result file"""
+    with open(baseline_path) as f:
+        baseline = {result["name"]: result for result in json.load(f)["results"]}
+    
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        old = baseline.get(result["name"])
+        if old is None:
+            continue
+        ratio = result["median_us"] / old["median_us"]
+        print(f"  {result['name']:<48} {old['median_us']:>10.2f} -> {result['median_us']:>10.2f} us/op  {ratio:>6.2f}x")
+
+
+def main():
+    """Run the selected cases and print or save their results."""
+    parser = argparse.ArgumentParser(description="Benchmark encryption and model serialization")
+    parser.add_argument("--filter", action="append", default=[],
+                        help="Only run cases whose name contains this text (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="Skip the 10000-row cases")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per case (default: 5)")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="Minimum seconds per round (default: 0.2)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier JSON result file to compare against")
+    parser.add_argument("--list", action="store_true", help="List case names and exit")
+    args = parser.parse_args()
+    
+    selected = [
+        entry for entry in CASES
+        if (not args.filter or any(text in entry["name"] for text in args.filter))
+        and (entry["quick"] or not args.quick)
+    ]
+    if args.list:
+        for entry in selected:
+            print(entry["name"])
+        return
+    
+    results = []
+    for entry in selected:
+        run = entry["setup"]()
+        per_op, calls = measure(run, entry["ops"], args.rounds, args.min_time)
+        median = statistics.median(per_op)
+        result = {
+            "name": entry["name"],
+            "ops_per_call": entry["ops"],
+            "calls_per_round": calls,
+            "rounds": args.rounds,
+            "median_us": round(median * 1e6, 3),
+            "min_us": round(min(per_op) * 1e6, 3),
+            "max_us": round(max(per_op) * 1e6, 3),
+            "ops_per_sec": round(1 / median, 1),
+        }
+        results.append(result)
+        print(f"{result['name']:<48} {result['median_us']:>10.2f} us/op  {result['ops_per_sec']:>12,.0f} ops/sec")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+    
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+In-process caches for the authentication fast path
+
+The principal cache keeps a snapshot of recently validated users (and their
+company) keyed by user id, so authenticated requests can skip the per-request
+user lookup. Entries are bounded in number and expire after a TTL; model
+events invalidate them as soon as a user or company row changes in this
+process, and the TTL bounds staleness across worker processes. Entries are
+dropped again once the change commits, since a request that missed the cache
+in between can have cached the old committed row.
+
+The token cache keeps the payloads of JWTs that already passed signature and
+claim verification, keyed by a digest of the token, until the token expires.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from core.config import settings
+
+
+class TTLCache:
+    """Bounded, thread-safe LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store value under key, evicting the least recently used entry if full"""
+        if not self.enabled:
+            return
+
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_where(self, predicate: Callable[[Any], bool]) -> None:
+        """Drop every entry whose value matches predicate"""
+        with self._lock:
+            stale = [key for key, (value, _) in self._entries.items() if predicate(value)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Principal snapshots keyed by user id: {"user": {...columns}, "company": {...columns} | None}
+principal_cache = TTLCache(
+    max_entries=settings.auth.principal_cache_max_entries,
+    ttl_seconds=settings.auth.principal_cache_ttl_seconds,
+)
+
+
+_SESSION_INFO_KEY = "principal_invalidations"
+
+
+def _drop_principals(kind: str, key: int) -> None:
+    if kind == "user":
+        principal_cache.invalidate(key)
+    else:
+        principal_cache.invalidate_where(
+            lambda snapshot: snapshot["user"].get("company_id") == key
+        )
+
+
+def _invalidate(session: Optional[Session], kind: str, key: int) -> None:
+    _drop_principals(kind, key)
+    if session is not None:
+        session.info.setdefault(_SESSION_INFO_KEY, set()).add((kind, key))
+
+
+def invalidate_principal(user_id: int, session: Optional[Session] = None) -> None:
+    """Forget the cached principal for a user, and again once session commits"""
+    _invalidate(session, "user", user_id)
+
+
+def invalidate_company_principals(company_id: int, session: Optional[Session] = None) -> None:
+    """Forget every cached principal that belongs to a company, and again once session commits"""
+    _invalidate(session, "company", company_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_principals(session):
+    for kind, key in session.info.pop(_SESSION_INFO_KEY, ()):
+        _drop_principals(kind, key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_invalidations(session):
+    session.info.pop(_SESSION_INFO_KEY, None)
+
+
+# Verified JWT payloads never outlive their exp claim; this caps the TTL of
+# long-lived tokens such as tech invites
+_TOKEN_CACHE_MAX_TTL_SECONDS = 48 * 3600
+
+# Verified JWT payloads keyed by (purpose, sha256(token))
+token_cache = TTLCache(
+    max_entries=settings.auth.token_cache_max_entries,
+    ttl_seconds=_TOKEN_CACHE_MAX_TTL_SECONDS,
+)
+
+
+def get_verified_payload(purpose: str, token: str, decode: Callable[[str], dict]) -> dict:
+    """
+    Return the verified payload of a JWT, calling decode only on a cache miss
+
+    decode must verify the signature and registered claims and raise on
+    failure; failures are never cached. Tokens without an exp claim are
+    verified every time because their lifetime is unknown.
+    """
+    key = (purpose, hashlib.sha256(token.encode()).digest())
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = decode(token)
+        exp = payload.get("exp")
+        if exp is not None:
+            token_cache.set(key, payload, ttl_seconds=float(exp) - time.time())
+    return dict(payload)
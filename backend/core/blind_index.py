@@ -0,0 +1,173 @@
+"""
+Blind indexes for searching encrypted fields
+
+An encrypted column cannot be searched in SQL, so searchable fields also
+store keyed HMACs of their normalized plaintext next to the ciphertext:
+
+    <field>_bidx    HMAC of the whole normalized value, for exact matches
+    <field>_tokens  space-separated HMACs of each normalized word
+
+Normalization folds case, Unicode forms, punctuation and whitespace, so
+"ACME Plumbing, LLC" and "acme plumbing llc" index the same. Word HMACs are
+also written to a per-model search token table, so "all of these words"
+lookups are indexed equality queries. HMACs are scoped to table and field,
+so equal values in different fields do not index the same.
+
+Blind indexes reveal which rows share a value (or a word) to someone with
+database access, never the value itself. The HMAC key (SECURITY_BLIND_INDEX_KEY,
+derived from the Fernet key if unset) is independent of the encryption key
+ring: rotating data keys leaves the indexes valid, while changing this key
+requires rebuilding them with migrations/add_blind_indexes.py.
+"""
+
+import base64
+import hashlib
+import hmac
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from sqlalchemy import delete, distinct, event, false, func, insert, inspect, select
+
+from core.config import settings
+
+_EXACT_BYTES = 16
+_TOKEN_BYTES = 8
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def _load_key() -> bytes:
+    configured = settings.security.blind_index_key
+    if configured is not None:
+        return base64.urlsafe_b64decode(configured.get_secret_value())
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"jobticketinvoice blind index v1",
+    ).derive(base64.urlsafe_b64decode(settings.security.fernet_key.get_secret_value()))
+
+_KEY = _load_key()
+
+# (model class, field) -> search token model, filled by maintain_search_tokens
+_token_models: Dict[Tuple[type, str], type] = {}
+
+
+def normalize_tokens(value: Optional[str]) -> List[str]:
+    """Case- and punctuation-folded words of a value, in order"""
+    if not value:
+        return []
+    text = unicodedata.normalize("NFKC", str(value)).casefold()
+    return [token for token in _NON_WORD.split(text) if token]
+
+
+def _mac(scope: str, text: str, size: int) -> str:
+    return hmac.new(_KEY, f"{scope}\x00{text}".encode(), hashlib.sha256).digest()[:size].hex()
+
+
+def blind_index(scope: str, value: Optional[str]) -> Optional[str]:
+    """Exact-match index of a value within a scope ("table.field")"""
+    tokens = normalize_tokens(value)
+    if not tokens:
+        return None
+    return _mac(scope, " ".join(tokens), _EXACT_BYTES)
+
+
+def token_indexes(scope: str, value: Optional[str]) -> List[str]:
+    """Distinct word indexes of a value within a scope, in first-seen order"""
+    return list(dict.fromkeys(_mac(scope, token, _TOKEN_BYTES) for token in normalize_tokens(value)))
+
+
+def _scope(model_class, field: str) -> str:
+    return f"{model_class.__tablename__}.{field}"
+
+
+def set_blind_index(instance, field: str, value: Optional[str]) -> None:
+    """Recompute the blind index columns of a field; called by the field's setter"""
+    scope = _scope(type(instance), field)
+    setattr(instance, f"{field}_bidx", blind_index(scope, value))
+    tokens_attr = f"{field}_tokens"
+    if hasattr(type(instance), tokens_attr):
+        tokens = token_indexes(scope, value)
+        setattr(instance, tokens_attr, " ".join(tokens) if tokens else None)
+
+
+def exact_match(model_class, field: str, value: str):
+    """SQL condition: the field equals value after normalization"""
+    index = blind_index(_scope(model_class, field), value)
+    if index is None:
+        return false()
+    return getattr(model_class, f"{field}_bidx") == index
+
+
+def token_match(model_class, field: str, value: str):
+    """SQL condition: the field contains every word of value"""
+    tokens = token_indexes(_scope(model_class, field), value)
+    if not tokens:
+        return false()
+    
+    token_model = _token_models[(model_class, field)]
+    matching = (
+        select(token_model.owner_id)
+        .where(token_model.field == field, token_model.token.in_(tokens))
+        .group_by(token_model.owner_id)
+        .having(func.count(distinct(token_model.token)) == len(tokens))
+    )
+    return model_class.id.in_(matching)
+
+
+def _token_rows(target, field: str) -> List[Dict[str, object]]:
+    # Read the instance dict: the column is deferred and may not be loaded
+    tokens = target.__dict__.get(f"{field}_tokens")
+    if not tokens:
+        return []
+    return [{"owner_id": target.id, "field": field, "token": token} for token in tokens.split()]
+
+
+def insert_search_tokens(db, instances: List) -> None:
+    """
+    Write the search token rows of instances inserted with a Core INSERT,
+    which bypasses the mapper events of maintain_search_tokens; their ids
+    must already be set. One executemany per token table.
+    """
+    rows: Dict[type, List[Dict[str, object]]] = {}
+    for (model_class, field), token_model in _token_models.items():
+        for target in instances:
+            if type(target) is model_class:
+                rows.setdefault(token_model, []).extend(_token_rows(target, field))
+    for token_model, token_rows in rows.items():
+        if token_rows:
+            db.execute(insert(token_model.__table__), token_rows)
+
+
+def maintain_search_tokens(model_class, token_model, *fields: str) -> None:
+    """
+    Keep token_model's rows in sync with the <field>_tokens columns of
+    model_class as rows are inserted and updated (deletes cascade)
+    """
+    table = token_model.__table__
+    
+    def after_insert(mapper, connection, target):
+        rows = [row for field in fields for row in _token_rows(target, field)]
+        if rows:
+            connection.execute(insert(table), rows)
+    
+    def after_update(mapper, connection, target):
+        state = inspect(target)
+        for field in fields:
+            if not state.attrs[f"{field}_tokens"].history.has_changes():
+                continue
+            connection.execute(
+                delete(table).where(table.c.owner_id == target.id, table.c.field == field)
+            )
+            rows = _token_rows(target, field)
+            if rows:
+                connection.execute(insert(table), rows)
+    
+    event.listen(model_class, "after_insert", after_insert)
+    event.listen(model_class, "after_update", after_update)
+    for field in fields:
+        _token_models[(model_class, field)] = token_model
@@ -9,7 +9,7 @@ All environment variables are defined, validated, and documented here.
 
 import os
 import secrets
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import Field, field_validator, EmailStr, HttpUrl, AliasChoices
 from pydantic.types import SecretStr
 from pydantic_settings import BaseSettings
@@ -86,8 +86,11 @@ class AuthenticationSettings(BaseSettings):
         validation_alias=AliasChoices('JWT_ALGORITHM', 'ALGORITHM', 'algorithm')
     )
     
+    # Short, since trusted claims (see trust_access_token_claims) can be stale
+    # for up to a token's lifetime in processes that have not yet seen a
+    # token_version bump; clients renew with their refresh token
     access_token_expire_minutes: int = Field(
-        default=30,
+        default=10,
         ge=1,
         le=1440,  # Max 24 hours
         description="JWT access token expiration time in minutes",
@@ -102,6 +105,72 @@ class AuthenticationSettings(BaseSettings):
         validation_alias=AliasChoices('JWT_REFRESH_TOKEN_EXPIRE_DAYS', 'REFRESH_TOKEN_EXPIRE_DAYS')
     )
     
+    principal_cache_ttl_seconds: int = Field(
+        default=60,
+        ge=0,
+        le=3600,
+        description="Seconds a validated user principal is cached in-process (0 disables the cache)",
+        validation_alias=AliasChoices('AUTH_PRINCIPAL_CACHE_TTL_SECONDS', 'PRINCIPAL_CACHE_TTL_SECONDS')
+    )
+    
+    principal_cache_max_entries: int = Field(
+        default=10000,
+        ge=0,
+        description="Maximum number of user principals kept in the in-process cache",
+        validation_alias=AliasChoices('AUTH_PRINCIPAL_CACHE_MAX_ENTRIES', 'PRINCIPAL_CACHE_MAX_ENTRIES')
+    )
+    
+    token_cache_max_entries: int = Field(
+        default=10000,
+        ge=0,
+        description="Maximum number of verified JWT payloads cached until their expiry (0 disables the cache)",
+        validation_alias=AliasChoices('AUTH_TOKEN_CACHE_MAX_ENTRIES', 'TOKEN_CACHE_MAX_ENTRIES')
+    )
+    
+    last_login_flush_interval_seconds: int = Field(
+        default=60,
+        ge=1,
+        le=3600,
+        description="Seconds between batched writes of users.last_login (maximum staleness)",
+        validation_alias=AliasChoices('AUTH_LAST_LOGIN_FLUSH_INTERVAL_SECONDS', 'LAST_LOGIN_FLUSH_INTERVAL_SECONDS')
+    )
+    
+    password_hash_workers: int = Field(
+        default_factory=lambda: min(4, os.cpu_count() or 1),
+        ge=1,
+        le=64,
+        description="Worker threads dedicated to bcrypt hashing and verification",
+        validation_alias=AliasChoices('AUTH_PASSWORD_HASH_WORKERS', 'PASSWORD_HASH_WORKERS')
+    )
+    
+    password_hash_queue_limit: int = Field(
+        default=32,
+        ge=0,
+        description="Hash requests allowed to wait for a worker before returning 503",
+        validation_alias=AliasChoices('AUTH_PASSWORD_HASH_QUEUE_LIMIT', 'PASSWORD_HASH_QUEUE_LIMIT')
+    )
+    
+    bcrypt_rounds: Optional[int] = Field(
+        default=None,
+        ge=4,
+        le=31,
+        description="bcrypt cost factor (see scripts/calibrate_password_hashing.py); hashes at other costs are upgraded on login",
+        validation_alias=AliasChoices('AUTH_BCRYPT_ROUNDS', 'BCRYPT_ROUNDS')
+    )
+    
+    trust_access_token_claims: bool = Field(
+        default=True,
+        description="Build the principal from access token claims instead of the database when it is not cached",
+        validation_alias=AliasChoices('AUTH_TRUST_ACCESS_TOKEN_CLAIMS', 'TRUST_ACCESS_TOKEN_CLAIMS')
+    )
+    
+    token_version_refresh_interval_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        description="How often token revocations made by other processes are loaded from the database",
+        validation_alias=AliasChoices('AUTH_TOKEN_VERSION_REFRESH_INTERVAL_SECONDS', 'TOKEN_VERSION_REFRESH_INTERVAL_SECONDS')
+    )
+    
     @field_validator('secret_key')
     def validate_secret_key(cls, v, info):
         """Validate JWT secret key security requirements"""
@@ -232,6 +301,44 @@ class SecuritySettings(BaseSettings):
         validation_alias=AliasChoices('SECURITY_FERNET_KEY', 'FERNET_KEY')
     )
     
+    data_encryption_key: Optional[SecretStr] = Field(
+        default=None,
+        description="URL-safe base64 256-bit AES-GCM key for envelope ciphertexts; derived from the Fernet key if unset",
+        validation_alias=AliasChoices('SECURITY_DATA_ENCRYPTION_KEY', 'DATA_ENCRYPTION_KEY')
+    )
+    
+    data_encryption_key_id: int = Field(
+        default=1,
+        ge=1,
+        le=255,
+        description="Key id written into new envelope ciphertexts",
+        validation_alias=AliasChoices('SECURITY_DATA_ENCRYPTION_KEY_ID', 'DATA_ENCRYPTION_KEY_ID')
+    )
+    
+    blind_index_key: Optional[SecretStr] = Field(
+        default=None,
+        description="URL-safe base64 256-bit HMAC key for blind indexes; derived from the Fernet key if unset",
+        validation_alias=AliasChoices('SECURITY_BLIND_INDEX_KEY', 'BLIND_INDEX_KEY')
+    )
+    
+    data_encryption_previous_keys: Dict[int, SecretStr] = Field(
+        default_factory=dict,
+        description="Retired AES-GCM keys by key id, kept to read values until they are re-encrypted",
+        validation_alias=AliasChoices('SECURITY_DATA_ENCRYPTION_PREVIOUS_KEYS', 'DATA_ENCRYPTION_PREVIOUS_KEYS')
+    )
+    
+    fernet_previous_keys: List[SecretStr] = Field(
+        default_factory=list,
+        description="Retired Fernet keys, kept to read legacy values until they are re-encrypted",
+        validation_alias=AliasChoices('SECURITY_FERNET_PREVIOUS_KEYS', 'FERNET_PREVIOUS_KEYS')
+    )
+    
+    ciphertext_format: str = Field(
+        default="envelope",
+        description="Format for newly encrypted fields: envelope (AES-GCM, binary) or fernet (legacy)",
+        validation_alias=AliasChoices('SECURITY_CIPHERTEXT_FORMAT', 'CIPHERTEXT_FORMAT')
+    )
+    
     cors_origins: List[str] = Field(
         default=[
             "http://localhost:3000",
@@ -259,6 +366,88 @@ class SecuritySettings(BaseSettings):
         description="Allowed headers for CORS"
     )
     
+    decrypt_workers: int = Field(
+        default=0,
+        ge=0,
+        description="Threads used to decrypt large result pages; 0 or 1 decrypts inline",
+        validation_alias=AliasChoices('SECURITY_DECRYPT_WORKERS', 'DECRYPT_WORKERS')
+    )
+    
+    decrypt_parallel_min_values: int = Field(
+        default=2000,
+        ge=1,
+        description="Encrypted values in a page before decryption is spread over the worker pool",
+        validation_alias=AliasChoices('SECURITY_DECRYPT_PARALLEL_MIN_VALUES', 'DECRYPT_PARALLEL_MIN_VALUES')
+    )
+    
+    reencryption_batch_size: int = Field(
+        default=500,
+        ge=1,
+        description="Rows re-encrypted per transaction by the key rotation job",
+        validation_alias=AliasChoices('SECURITY_REENCRYPTION_BATCH_SIZE', 'REENCRYPTION_BATCH_SIZE')
+    )
+    
+    reencryption_pause_seconds: float = Field(
+        default=0.1,
+        ge=0,
+        description="Pause between re-encryption batches to limit load on the database",
+        validation_alias=AliasChoices('SECURITY_REENCRYPTION_PAUSE_SECONDS', 'REENCRYPTION_PAUSE_SECONDS')
+    )
+    
+    reencrypt_on_startup: bool = Field(
+        default=False,
+        description="Run the re-encryption job in the background while the API serves requests",
+        validation_alias=AliasChoices('SECURITY_REENCRYPT_ON_STARTUP', 'REENCRYPT_ON_STARTUP')
+    )
+    
+    login_throttle_enabled: bool = Field(
+        default=True,
+        description="Throttle repeated login attempts per email and per client IP",
+        validation_alias=AliasChoices('SECURITY_LOGIN_THROTTLE_ENABLED', 'LOGIN_THROTTLE_ENABLED')
+    )
+    
+    login_attempts_per_email: int = Field(
+        default=5,
+        ge=1,
+        description="Login attempts allowed per email within the attempt window",
+        validation_alias=AliasChoices('SECURITY_LOGIN_ATTEMPTS_PER_EMAIL', 'LOGIN_ATTEMPTS_PER_EMAIL')
+    )
+    
+    login_attempts_per_ip: int = Field(
+        default=20,
+        ge=1,
+        description="Failed login attempts allowed per client IP within the attempt window",
+        validation_alias=AliasChoices('SECURITY_LOGIN_ATTEMPTS_PER_IP', 'LOGIN_ATTEMPTS_PER_IP')
+    )
+    
+    login_attempt_window_seconds: int = Field(
+        default=300,
+        ge=1,
+        description="Sliding window for counting login attempts in seconds",
+        validation_alias=AliasChoices('SECURITY_LOGIN_ATTEMPT_WINDOW_SECONDS', 'LOGIN_ATTEMPT_WINDOW_SECONDS')
+    )
+    
+    login_lockout_seconds: int = Field(
+        default=60,
+        ge=1,
+        description="First lockout after exceeding a limit; each further lockout doubles it",
+        validation_alias=AliasChoices('SECURITY_LOGIN_LOCKOUT_SECONDS', 'LOGIN_LOCKOUT_SECONDS')
+    )
+    
+    login_lockout_max_seconds: int = Field(
+        default=3600,
+        ge=1,
+        description="Upper bound for escalated login lockouts in seconds",
+        validation_alias=AliasChoices('SECURITY_LOGIN_LOCKOUT_MAX_SECONDS', 'LOGIN_LOCKOUT_MAX_SECONDS')
+    )
+    
+    login_throttle_max_keys: int = Field(
+        default=100000,
+        ge=1,
+        description="Emails and IPs tracked by the login throttle before the oldest are evicted",
+        validation_alias=AliasChoices('SECURITY_LOGIN_THROTTLE_MAX_KEYS', 'LOGIN_THROTTLE_MAX_KEYS')
+    )
+    
     @field_validator('fernet_key')
     def validate_fernet_key(cls, v, info):
         """Validate Fernet encryption key"""
@@ -274,6 +463,74 @@ class SecuritySettings(BaseSettings):
         
         return v
     
+    @field_validator('data_encryption_key')
+    def validate_data_encryption_key(cls, v, info):
+        """Validate AES-GCM data encryption key"""
+        import base64
+        
+        if v is not None:
+            key_value = v.get_secret_value() if isinstance(v, SecretStr) else v
+            try:
+                key = base64.urlsafe_b64decode(key_value)
+            except Exception as e:
+                raise ValueError(f"Invalid data encryption key format: {e}")
+            if len(key) != 32:
+                raise ValueError("Data encryption key must decode to 32 bytes")
+        
+        return v
+    
+    @field_validator('blind_index_key')
+    def validate_blind_index_key(cls, v, info):
+        """Validate blind index HMAC key"""
+        import base64
+        
+        if v is not None:
+            try:
+                key = base64.urlsafe_b64decode(v.get_secret_value())
+            except Exception as e:
+                raise ValueError(f"Invalid blind index key format: {e}")
+            if len(key) != 32:
+                raise ValueError("Blind index key must decode to 32 bytes")
+        
+        return v
+    
+    @field_validator('data_encryption_previous_keys')
+    def validate_data_encryption_previous_keys(cls, v, info):
+        """Validate retired AES-GCM keys"""
+        import base64
+        
+        for key_id, key in v.items():
+            if not 1 <= key_id <= 255:
+                raise ValueError(f"Data encryption key id must be between 1 and 255: {key_id}")
+            if key_id == info.data.get('data_encryption_key_id'):
+                raise ValueError(f"Key id {key_id} is the active data encryption key id")
+            try:
+                decoded = base64.urlsafe_b64decode(key.get_secret_value())
+            except Exception as e:
+                raise ValueError(f"Invalid data encryption key format for key id {key_id}: {e}")
+            if len(decoded) != 32:
+                raise ValueError(f"Data encryption key {key_id} must decode to 32 bytes")
+        return v
+    
+    @field_validator('fernet_previous_keys')
+    def validate_fernet_previous_keys(cls, v, info):
+        """Validate retired Fernet keys"""
+        from cryptography.fernet import Fernet
+        
+        for key in v:
+            try:
+                Fernet(key.get_secret_value().encode())
+            except Exception as e:
+                raise ValueError(f"Invalid previous Fernet key format: {e}")
+        return v
+    
+    @field_validator('ciphertext_format')
+    def validate_ciphertext_format(cls, v, info):
+        """Validate ciphertext format"""
+        if v not in ("envelope", "fernet"):
+            raise ValueError(f"Ciphertext format must be 'envelope' or 'fernet', got: {v}")
+        return v
+    
     @field_validator('cors_origins')
     def validate_cors_origins(cls, v, info):
         """Validate CORS origins format"""
@@ -322,6 +579,96 @@ class ApplicationSettings(BaseSettings):
         validation_alias=AliasChoices('APP_MAX_UPLOAD_SIZE', 'MAX_UPLOAD_SIZE')
     )
     
+    log_level: str = Field(
+        default="INFO",
+        description="Log level for application loggers (DEBUG, INFO, WARNING, ERROR)",
+        validation_alias=AliasChoices('APP_LOG_LEVEL', 'LOG_LEVEL')
+    )
+    
+    log_sample_rates: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Fraction of requests whose debug/info lines are kept, per sampling key (JSON object)",
+        validation_alias=AliasChoices('APP_LOG_SAMPLE_RATES', 'LOG_SAMPLE_RATES')
+    )
+    
+    ticket_number_block_size: int = Field(
+        default=100,
+        ge=1,
+        le=10000,
+        description="Ticket numbers each worker reserves from the counter table at a time",
+        validation_alias=AliasChoices('APP_TICKET_NUMBER_BLOCK_SIZE', 'TICKET_NUMBER_BLOCK_SIZE')
+    )
+    
+    sync_settle_seconds: float = Field(
+        default=2.0,
+        ge=0.0,
+        le=300.0,
+        description="Age a change must reach before the job ticket change feed returns it, so writes still committing are not skipped",
+        validation_alias=AliasChoices('APP_SYNC_SETTLE_SECONDS', 'SYNC_SETTLE_SECONDS')
+    )
+    
+    sync_tombstone_retention_days: int = Field(
+        default=30,
+        ge=1,
+        le=3650,
+        description="Days deleted job tickets stay in the change feed; older sync cursors must do a full sync",
+        validation_alias=AliasChoices('APP_SYNC_TOMBSTONE_RETENTION_DAYS', 'SYNC_TOMBSTONE_RETENTION_DAYS')
+    )
+    
+    idempotency_key_ttl_hours: float = Field(
+        default=24.0,
+        gt=0.0,
+        le=720.0,
+        description="Hours an Idempotency-Key and its stored response are kept for retries",
+        validation_alias=AliasChoices('APP_IDEMPOTENCY_KEY_TTL_HOURS', 'IDEMPOTENCY_KEY_TTL_HOURS')
+    )
+    
+    idempotency_lock_timeout_seconds: float = Field(
+        default=30.0,
+        gt=0.0,
+        le=3600.0,
+        description="Seconds after which a request still holding an Idempotency-Key is presumed dead and the key can be retried",
+        validation_alias=AliasChoices('APP_IDEMPOTENCY_LOCK_TIMEOUT_SECONDS', 'IDEMPOTENCY_LOCK_TIMEOUT_SECONDS')
+    )
+    
+    idempotency_wait_seconds: float = Field(
+        default=10.0,
+        ge=0.0,
+        le=300.0,
+        description="Seconds a request waits for a concurrent request with the same Idempotency-Key before answering 409",
+        validation_alias=AliasChoices('APP_IDEMPOTENCY_WAIT_SECONDS', 'IDEMPOTENCY_WAIT_SECONDS')
+    )
+    
+    submit_durability: str = Field(
+        default="direct",
+        description="How POST /job-tickets/submit writes: direct (own transaction), commit (group-commit queue, respond after the batch commits) or enqueue (respond once queued)",
+        validation_alias=AliasChoices('APP_SUBMIT_DURABILITY', 'SUBMIT_DURABILITY')
+    )
+    
+    submit_batch_size: int = Field(
+        default=200,
+        ge=1,
+        le=5000,
+        description="Most queued ticket submissions written in one transaction",
+        validation_alias=AliasChoices('APP_SUBMIT_BATCH_SIZE', 'SUBMIT_BATCH_SIZE')
+    )
+    
+    submit_flush_interval_ms: float = Field(
+        default=5.0,
+        ge=0.0,
+        le=1000.0,
+        description="Milliseconds a queued ticket submission waits for others to share its transaction",
+        validation_alias=AliasChoices('APP_SUBMIT_FLUSH_INTERVAL_MS', 'SUBMIT_FLUSH_INTERVAL_MS')
+    )
+    
+    submit_queue_size: int = Field(
+        default=10000,
+        ge=1,
+        le=1000000,
+        description="Queued ticket submissions held before new ones are turned away with 503",
+        validation_alias=AliasChoices('APP_SUBMIT_QUEUE_SIZE', 'SUBMIT_QUEUE_SIZE')
+    )
+    
     @field_validator('environment')
     def validate_environment(cls, v, info):
         """Validate environment value"""
@@ -337,6 +684,22 @@ class ApplicationSettings(BaseSettings):
             raise ValueError("Debug mode must be disabled in production environment")
         return v
     
+    @field_validator('log_level')
+    def validate_log_level(cls, v, info):
+        """Validate log level value"""
+        allowed_levels = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+        if v.upper() not in allowed_levels:
+            raise ValueError(f"Log level must be one of: {allowed_levels}")
+        return v.upper()
+    
+    @field_validator('submit_durability')
+    def validate_submit_durability(cls, v, info):
+        """Validate submit durability mode"""
+        allowed_modes = ['direct', 'commit', 'enqueue']
+        if v.lower() not in allowed_modes:
+            raise ValueError(f"Submit durability must be one of: {allowed_modes}")
+        return v.lower()
+    
     model_config = {
         "env_prefix": "APP_",
         "env_nested_delimiter": "_"
@@ -368,6 +731,12 @@ class FeatureFlags(BaseSettings):
         description="Enable performance monitoring and metrics"
     )
     
+    enable_debug_diagnostics: bool = Field(
+        default=False,
+        description="Run expensive debug-only diagnostics such as full-table dumps (development only)",
+        validation_alias=AliasChoices('FEATURE_ENABLE_DEBUG_DIAGNOSTICS', 'ENABLE_DEBUG_DIAGNOSTICS')
+    )
+    
     @field_validator('allow_database_reset')
     def validate_allow_database_reset(cls, v, info):
         """Ensure allow_database_reset is disabled in production"""
@@ -1,10 +1,32 @@
 """
 Encryption utilities for field-level encryption in the application.
-Uses AES-256 encryption via the Fernet implementation from the cryptography package.
+
+New values are written as a compact binary envelope:
+
+    version (1 byte) | key id (1 byte) | nonce (12 bytes) | AES-256-GCM ciphertext + tag
+
+The version and key id are authenticated as associated data. Values written
+by earlier releases are base64 Fernet tokens; both formats are read side by
+side, told apart by their first byte (0x01 for the envelope, "g" for Fernet).
+
+Keys form a ring: envelopes are sealed with the active key id and opened
+with whichever key their id names, and legacy tokens are tried against the
+current and previous Fernet keys. Retired keys can be dropped once the
+re-encryption job (core/reencryption.py) has rewritten every value.
 """
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+import base64
 import logging
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 from dotenv import load_dotenv
+from sqlalchemy.types import LargeBinary, TypeDecorator
 from core.config import settings
 
 # Load environment variables
@@ -17,34 +39,105 @@ logger = logging.getLogger(__name__)
 FERNET_KEY = settings.security.fernet_key.get_secret_value()
 logger.info("FERNET_KEY loaded from centralized configuration.")
 
-# Initialize Fernet cipher with the key
-fernet = Fernet(FERNET_KEY.encode())
+# Initialize Fernet cipher with the key, falling back to retired keys for reads
+fernet = MultiFernet(
+    [Fernet(FERNET_KEY.encode())]
+    + [Fernet(key.get_secret_value().encode()) for key in settings.security.fernet_previous_keys]
+)
+
+# A ciphertext as stored: envelope bytes, or a legacy Fernet token (str or bytes)
+Ciphertext = Union[str, bytes]
+
+ENVELOPE_VERSION = 1
+_ENVELOPE_PREFIX = bytes([ENVELOPE_VERSION])
+_NONCE_SIZE = 12
+_HEADER_SIZE = 2 + _NONCE_SIZE
+
+def derive_data_key(fernet_key: str) -> bytes:
+    """AES-256 envelope key derived from a Fernet key, used when none is configured"""
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=b"jobticketinvoice field envelope v1",
+    ).derive(base64.urlsafe_b64decode(fernet_key))
+
+def _load_data_key() -> bytes:
+    configured = settings.security.data_encryption_key
+    if configured is not None:
+        return base64.urlsafe_b64decode(configured.get_secret_value())
+    return derive_data_key(FERNET_KEY)
+
+DATA_KEY_ID = settings.security.data_encryption_key_id
+
+# Envelope ciphers by key id: the active key plus retired keys still being read
+_aead_keys: Dict[int, AESGCM] = {
+    key_id: AESGCM(base64.urlsafe_b64decode(key.get_secret_value()))
+    for key_id, key in settings.security.data_encryption_previous_keys.items()
+}
+_aead_keys[DATA_KEY_ID] = AESGCM(_load_data_key())
 
-def encrypt_field(value: str) -> str:
+def _seal(plaintext: bytes) -> bytes:
+    header = bytes([ENVELOPE_VERSION, DATA_KEY_ID])
+    nonce = os.urandom(_NONCE_SIZE)
+    return header + nonce + _aead_keys[DATA_KEY_ID].encrypt(nonce, plaintext, header)
+
+def _open(envelope: bytes) -> bytes:
+    key_id = envelope[1]
+    aead = _aead_keys.get(key_id)
+    if aead is None:
+        raise ValueError(f"Unknown data encryption key id: {key_id}")
+    return aead.decrypt(envelope[2:_HEADER_SIZE], envelope[_HEADER_SIZE:], envelope[:2])
+
+def is_envelope(value: Optional[Ciphertext]) -> bool:
+    """Whether a stored ciphertext uses the binary envelope format"""
+    return isinstance(value, (bytes, bytearray)) and value[:1] == _ENVELOPE_PREFIX
+
+def needs_reencryption(value: Optional[Ciphertext]) -> bool:
+    """Whether a stored ciphertext is legacy Fernet or sealed with a retired key"""
+    if value is None:
+        return False
+    return not is_envelope(value) or value[1] != DATA_KEY_ID
+
+def reencrypt_field(value: Ciphertext) -> bytes:
+    """Rewrite a stored ciphertext as an envelope under the active key"""
+    return _seal(_decrypt_value(value).encode())
+
+def _decrypt_value(value: Ciphertext) -> str:
+    if isinstance(value, str):
+        return fernet.decrypt(value.encode()).decode()
+    if value[:1] == _ENVELOPE_PREFIX:
+        return _open(value).decode()
+    return fernet.decrypt(bytes(value)).decode()
+
+def encrypt_field(value: str) -> Ciphertext:
     """
-    Encrypt a string value using Fernet (AES-256).
+    Encrypt a string value.
     
     Args:
         value: The string value to encrypt
         
     Returns:
-        Encrypted string in base64 format
+        Envelope bytes, or a base64 Fernet token when security.ciphertext_format
+        is "fernet"
     """
     if value is None:
         return None
     
     try:
-        return fernet.encrypt(str(value).encode()).decode()
+        if settings.security.ciphertext_format == "fernet":
+            return fernet.encrypt(str(value).encode()).decode()
+        return _seal(str(value).encode())
     except Exception as e:
         logger.error(f"Encryption error: {str(e)}")
         raise
 
-def decrypt_field(value: str) -> str:
+def decrypt_field(value: Ciphertext) -> str:
     """
-    Decrypt a Fernet-encrypted string value.
+    Decrypt an envelope or legacy Fernet value.
     
     Args:
-        value: The encrypted string to decrypt
+        value: The stored ciphertext to decrypt
         
     Returns:
         Decrypted string value
@@ -53,7 +146,201 @@ def decrypt_field(value: str) -> str:
         return None
     
     try:
-        return fernet.decrypt(value.encode()).decode()
+        return _decrypt_value(value)
     except Exception as e:
         logger.error(f"Decryption error: {str(e)}")
         raise
+
+class EncryptedBytes(TypeDecorator):
+    """
+    Binary column holding field ciphertexts.
+    
+    Legacy Fernet tokens bound as text are stored as their ASCII bytes, and
+    rows still held as text (e.g. SQLite before the column conversion) load as
+    bytes, so callers always see bytes.
+    """
+    impl = LargeBinary
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            return value.encode("ascii")
+        return value
+    
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        if isinstance(value, str):
+            return value.encode("ascii")
+        return bytes(value)
+
+# Per-instance memo of decrypted values, stored in the instance __dict__ as
+# {column attribute: (ciphertext, plaintext)}
+_DECRYPTED_MEMO = "_decrypted_memo"
+
+def decrypt_cached(instance, attr: str) -> Optional[str]:
+    """
+    Decrypt the ciphertext held in instance.<attr>, at most once per value.
+    
+    The memo is keyed by the ciphertext itself, so a column that changed
+    underneath it is decrypted again rather than served stale.
+    
+    Args:
+        instance: A model instance with encrypted columns
+        attr: Name of the mapped attribute holding the ciphertext
+        
+    Returns:
+        Decrypted string value, or None if the column is NULL
+    """
+    ciphertext = getattr(instance, attr)
+    if ciphertext is None:
+        return None
+    
+    memo = instance.__dict__.get(_DECRYPTED_MEMO)
+    if memo is None:
+        memo = instance.__dict__[_DECRYPTED_MEMO] = {}
+    
+    cached = memo.get(attr)
+    if cached is not None and cached[0] == ciphertext:
+        return cached[1]
+    
+    plaintext = decrypt_field(ciphertext)
+    memo[attr] = (ciphertext, plaintext)
+    return plaintext
+
+def encrypt_cached(instance, attr: str, value: Optional[str]) -> None:
+    """
+    Encrypt value into instance.<attr> and remember its plaintext, so reading
+    the field back after a write needs no decryption.
+    """
+    memo = instance.__dict__.get(_DECRYPTED_MEMO)
+    if value is None:
+        setattr(instance, attr, None)
+        if memo is not None:
+            memo.pop(attr, None)
+        return
+    
+    ciphertext = encrypt_field(value)
+    setattr(instance, attr, ciphertext)
+    if memo is None:
+        memo = instance.__dict__[_DECRYPTED_MEMO] = {}
+    memo[attr] = (ciphertext, str(value))
+
+def encrypted_attributes(model_class) -> Tuple[str, ...]:
+    """Names of the mapped attributes of a model that hold ciphertext"""
+    attrs = model_class.__dict__.get("__encrypted_attributes__")
+    if attrs is None:
+        from sqlalchemy import inspect
+        
+        attrs = tuple(
+            attr.key for attr in inspect(model_class).column_attrs
+            if attr.key.startswith("_encrypted_")
+        )
+        model_class.__encrypted_attributes__ = attrs
+    return attrs
+
+_decrypt_pool = None
+_decrypt_pool_lock = threading.Lock()
+
+def _get_decrypt_pool(workers: int) -> ThreadPoolExecutor:
+    global _decrypt_pool
+    with _decrypt_pool_lock:
+        if _decrypt_pool is None:
+            _decrypt_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="decrypt")
+        return _decrypt_pool
+
+def _decrypt_chunk(ciphertexts: List[Ciphertext]) -> List[str]:
+    try:
+        return [_decrypt_value(value) for value in ciphertexts]
+    except Exception as e:
+        logger.error(f"Decryption error: {str(e)}")
+        raise
+
+def decrypt_many(ciphertexts: List[Ciphertext], workers: Optional[int] = None) -> List[str]:
+    """
+    Decrypt a batch of envelope or Fernet values, preserving order.
+    
+    Batches of at least security.decrypt_parallel_min_values values are split
+    into one chunk per worker and decrypted on a shared thread pool when
+    security.decrypt_workers (or workers) is above 1; smaller batches are
+    decrypted inline.
+    """
+    workers = settings.security.decrypt_workers if workers is None else workers
+    if workers <= 1 or len(ciphertexts) < settings.security.decrypt_parallel_min_values:
+        return _decrypt_chunk(ciphertexts)
+    
+    size = math.ceil(len(ciphertexts) / workers)
+    chunks = [ciphertexts[i:i + size] for i in range(0, len(ciphertexts), size)]
+    plaintexts = []
+    for chunk in _get_decrypt_pool(workers).map(_decrypt_chunk, chunks):
+        plaintexts.extend(chunk)
+    return plaintexts
+
+def decrypt_rows(instances: Iterable, workers: Optional[int] = None) -> int:
+    """
+    Decrypt every encrypted column of a page of model instances in one pass.
+    
+    The plaintexts prime each instance's decrypted-value memo, so serializing
+    the rows afterwards performs no further decryption. Columns that are not
+    loaded (deferred) or already memoized are skipped.
+    
+    Returns:
+        Number of values decrypted
+    """
+    pending = []
+    for instance in instances:
+        state = instance.__dict__
+        memo = state.get(_DECRYPTED_MEMO)
+        if memo is None:
+            memo = state[_DECRYPTED_MEMO] = {}
+        for attr in encrypted_attributes(type(instance)):
+            ciphertext = state.get(attr)
+            if ciphertext is None:
+                continue
+            cached = memo.get(attr)
+            if cached is not None and cached[0] == ciphertext:
+                continue
+            pending.append((memo, attr, ciphertext))
+    
+    if not pending:
+        return 0
+    
+    plaintexts = decrypt_many([ciphertext for _, _, ciphertext in pending], workers)
+    for (memo, attr, ciphertext), plaintext in zip(pending, plaintexts):
+        memo[attr] = (ciphertext, plaintext)
+    return len(pending)
+
+def decrypt_columns(records: List[Dict[str, Any]], fields: Iterable[str], workers: Optional[int] = None) -> int:
+    """
+    Decrypt the named fields of plain row dicts in place, in one pass.
+    
+    For column projections that select ciphertext directly instead of loading
+    model instances. Fields that are None are left as they are.
+    
+    Returns:
+        Number of values decrypted
+    """
+    fields = tuple(fields)
+    pending = [(record, field) for record in records for field in fields if record.get(field) is not None]
+    if not pending:
+        return 0
+    
+    plaintexts = decrypt_many([record[field] for record, field in pending], workers)
+    for (record, field), plaintext in zip(pending, plaintexts):
+        record[field] = plaintext
+    return len(pending)
+
+def clear_decrypted(instance, *args) -> None:
+    """Drop memoized plaintext for an instance (refresh/expire event handler)"""
+    instance.__dict__.pop(_DECRYPTED_MEMO, None)
+
+def memoize_decryption(model_class):
+    """
+    Class decorator that clears an encrypted model's decrypted-value memo
+    whenever the instance is refreshed or expired.
+    """
+    from sqlalchemy import event
+    
+    event.listen(model_class, "refresh", clear_decrypted)
+    event.listen(model_class, "expire", clear_decrypted)
+    return model_class
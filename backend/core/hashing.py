@@ -0,0 +1,115 @@
+"""
+Bounded worker pool for password hashing
+
+bcrypt is deliberately slow and would stall the event loop if called from an
+async endpoint. Hash and verify calls are offloaded to a small thread pool
+(bcrypt releases the GIL, so threads run in parallel). The number of calls
+running or waiting is capped; beyond that the pool sheds load with a 503
+instead of letting latency grow without bound.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from fastapi import HTTPException, status
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHashPool:
+    """Runs CPU-heavy hashing callables off the event loop with a queue limit"""
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_ms_total = 0.0
+        self.queue_wait_ms_max = 0.0
+        self.hash_ms_total = 0.0
+        self.hash_ms_max = 0.0
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) on the pool, or raise 503 if the queue is full"""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                logger.warning("Password hash pool saturated, rejecting request")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication service is busy, please retry shortly",
+                    headers={"Retry-After": "1"}
+                )
+            self._in_flight += 1
+
+        enqueued_at = time.perf_counter()
+
+        def timed_call():
+            started_at = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self._record(
+                    (started_at - enqueued_at) * 1000,
+                    (time.perf_counter() - started_at) * 1000
+                )
+
+        try:
+            future = self._executor.submit(timed_call)
+        except BaseException:
+            self._release()
+            raise
+        # Release the slot when the work itself ends rather than when the caller
+        # stops waiting: a cancelled request (client disconnect) cannot stop a
+        # hash that has started, and it still occupies a worker until it finishes
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _record(self, wait_ms: float, hash_ms: float) -> None:
+        with self._lock:
+            self.completed += 1
+            self.queue_wait_ms_total += wait_ms
+            self.queue_wait_ms_max = max(self.queue_wait_ms_max, wait_ms)
+            self.hash_ms_total += hash_ms
+            self.hash_ms_max = max(self.hash_ms_max, hash_ms)
+
+    def shutdown(self) -> None:
+        """Wait for running hashes; a fresh executor is swapped in for reuse"""
+        executor = self._executor
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        with self._lock:
+            completed = self.completed or 1
+            return {
+                "workers": self.max_workers,
+                "queue_limit": self.max_queue,
+                "in_flight": self._in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_wait_ms_avg": round(self.queue_wait_ms_total / completed, 3),
+                "queue_wait_ms_max": round(self.queue_wait_ms_max, 3),
+                "hash_ms_avg": round(self.hash_ms_total / completed, 3),
+                "hash_ms_max": round(self.hash_ms_max, 3),
+            }
+
+
+password_hash_pool = PasswordHashPool(
+    max_workers=settings.auth.password_hash_workers,
+    max_queue=settings.auth.password_hash_queue_limit,
+)
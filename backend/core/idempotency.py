@@ -0,0 +1,273 @@
+"""
+Idempotency-Key handling for create endpoints
+
+Field clients on flaky connections retry POSTs whose response they never
+saw. When such a request carries an Idempotency-Key header, the key is first
+reserved in idempotency_keys in a transaction of its own, so a concurrent
+request with the same key finds the reservation and waits for it rather than
+running the handler a second time. The handler stores its response in the
+same transaction as the rows it creates, so either both commit or neither
+does, and a retry gets the stored response back without touching the main
+tables.
+
+A reservation whose request died is taken over once it is older than
+APP_IDEMPOTENCY_LOCK_TIMEOUT_SECONDS; the original request can then no longer
+complete it. Keys expire after APP_IDEMPOTENCY_KEY_TTL_HOURS.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.encryption import decrypt_field, encrypt_field
+from models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+# Header telling the client its response was replayed from an earlier request
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Expired keys are purged by every this many reservations
+PURGE_EVERY = 100
+
+
+def request_hash(payload: Any) -> str:
+    """SHA-256 of a request body, so a key reused for a different request is caught"""
+    if isinstance(payload, BaseModel):
+        payload = payload.model_dump(mode="json")
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def payload_scope(scope: str, payload: Any) -> str:
+    """
+    Scope for endpoints whose callers cannot be told apart
+    
+    A key then only ever matches a request with the same body, so clients
+    picking the same key neither collide nor learn that it is in use; a
+    retry of the same request still finds its stored response.
+    """
+    return f"{scope}:{request_hash(payload)}"
+
+
+class Reservation:
+    """
+    An Idempotency-Key held by the current request
+    
+    Requests without a key get an inert reservation, so handlers can call
+    complete and release unconditionally.
+    """
+    
+    def __init__(self, store: "IdempotencyStore", key_id: Optional[int] = None,
+                 owner: Optional[str] = None, replay: Optional[JSONResponse] = None):
+        self._store = store
+        self.key_id = key_id
+        self.owner = owner
+        self.replay = replay  # Stored response to return instead of running the handler
+    
+    def complete(self, db: Session, status_code: int, response: BaseModel) -> None:
+        """
+        Store the response in the request's transaction; the caller commits
+        
+        Raises 409 if the reservation was taken over meanwhile, so the
+        request's rows are rolled back rather than created twice.
+        """
+        if self.key_id is None:
+            return
+        table = IdempotencyKey.__table__
+        stored = db.execute(
+            update(table)
+            .where(table.c.id == self.key_id, table.c.owner == self.owner)
+            .values(
+                state="completed",
+                response_status=status_code,
+                response_body=encrypt_field(response.model_dump_json())
+            )
+        )
+        if not stored.rowcount:
+            self._store._count("lost")
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Idempotency-Key was taken over by a retry of this request"
+            )
+        self._store._count("completed")
+    
+    def release(self, db: Session) -> None:
+        """Give the key up after the request failed, so a retry runs again"""
+        if self.key_id is None:
+            return
+        table = IdempotencyKey.__table__
+        with db.get_bind().engine.begin() as connection:
+            connection.execute(delete(table).where(table.c.id == self.key_id, table.c.owner == self.owner))
+        self._store._count("released")
+
+
+class IdempotencyStore:
+    """Reserves Idempotency-Keys and replays the responses stored for them"""
+    
+    def __init__(self, ttl_seconds: float, lock_timeout_seconds: float,
+                 wait_seconds: float, poll_interval: float = 0.05):
+        self.ttl_seconds = ttl_seconds
+        self.lock_timeout_seconds = lock_timeout_seconds
+        self.wait_seconds = wait_seconds
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            ("reserved", "replayed", "waited", "taken_over", "completed", "released",
+             "mismatched", "in_progress", "lost", "purged"), 0
+        )
+    
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] += amount
+    
+    def _claim(self, connection, scope: str, key: str, digest: str) -> Optional[Any]:
+        """
+        One attempt at the key: a Reservation, a replay, or None while
+        another request holds it
+        """
+        table = IdempotencyKey.__table__
+        now = datetime.utcnow()
+        owner = uuid.uuid4().hex
+        lease = {
+            "request_hash": digest, "state": "pending", "owner": owner,
+            "response_status": None, "response_body": None,
+            "locked_at": now, "expires_at": now + timedelta(seconds=self.ttl_seconds),
+        }
+        
+        # Ages compared in SQL, which handles the column's time zone
+        row = connection.execute(
+            select(
+                table,
+                (table.c.expires_at <= now).label("expired"),
+                (table.c.locked_at <= now - timedelta(seconds=self.lock_timeout_seconds)).label("stale"),
+            ).where(table.c.scope == scope, table.c.key == key)
+        ).first()
+        if row is None:
+            try:
+                with connection.begin_nested():
+                    key_id = connection.execute(
+                        insert(table).values(scope=scope, key=key, **lease)
+                    ).inserted_primary_key[0]
+            except IntegrityError:
+                # A concurrent request reserved the key first; look again
+                return self._claim(connection, scope, key, digest)
+            self._count("reserved")
+            return Reservation(self, key_id, owner)
+        
+        # An expired key, or one held by a request presumed dead, is up for
+        # grabs; only one of several requests taking it over wins
+        expired = bool(row.expired)
+        stale = row.state == "pending" and bool(row.stale)
+        if expired or (stale and row.request_hash == digest):
+            taken = connection.execute(
+                update(table)
+                .where(table.c.id == row.id, table.c.owner == row.owner, table.c.state == row.state)
+                .values(**lease)
+            )
+            if taken.rowcount:
+                self._count("reserved" if expired else "taken_over")
+                return Reservation(self, row.id, owner)
+            return None
+        
+        if row.request_hash != digest:
+            self._count("mismatched")
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        
+        if row.state == "completed":
+            self._count("replayed")
+            return Reservation(self, replay=JSONResponse(
+                status_code=row.response_status,
+                content=json.loads(decrypt_field(row.response_body)),
+                headers={REPLAYED_HEADER: "true"}
+            ))
+        return None
+    
+    def _purge(self, connection) -> None:
+        table = IdempotencyKey.__table__
+        purged = connection.execute(delete(table).where(table.c.expires_at <= datetime.utcnow()))
+        self._count("purged", purged.rowcount)
+    
+    async def reserve(self, db: Session, key: Optional[str], scope: str, payload: Any) -> Reservation:
+        """
+        Reserve a request's Idempotency-Key before it does any work
+        
+        Args:
+            db: The request's session (only its engine is used)
+            key: The Idempotency-Key header, or None
+            scope: Endpoint and caller the key is private to
+            payload: The request body
+        
+        Returns:
+            A Reservation; when its replay is set, return that instead of
+            handling the request
+        
+        Raises:
+            HTTPException: 422 if the key was used for a different request,
+            409 if a request with the key is still running after the wait
+        """
+        if not key:
+            return Reservation(self)
+        
+        digest = request_hash(payload)
+        deadline = time.monotonic() + self.wait_seconds
+        waited = False
+        engine = db.get_bind().engine
+        while True:
+            # Not the request's transaction: the reservation must be visible
+            # to concurrent requests while this one runs
+            with engine.begin() as connection:
+                reservation = self._claim(connection, scope, key, digest)
+                if reservation is not None and reservation.key_id is not None:
+                    with self._lock:
+                        purge = (self._counters["reserved"] % PURGE_EVERY) == 0
+                    if purge:
+                        self._purge(connection)
+            if reservation is not None:
+                return reservation
+            
+            if not waited:
+                waited = True
+                self._count("waited")
+            if time.monotonic() >= deadline:
+                self._count("in_progress")
+                logger.info("Request with a busy Idempotency-Key rejected after waiting")
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "1"}
+                )
+            await asyncio.sleep(self.poll_interval)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        with self._lock:
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "lock_timeout_seconds": self.lock_timeout_seconds,
+                **self._counters,
+            }
+
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.app.idempotency_key_ttl_hours * 3600,
+    lock_timeout_seconds=settings.app.idempotency_lock_timeout_seconds,
+    wait_seconds=settings.app.idempotency_wait_seconds,
+)
@@ -11,6 +11,7 @@ import secrets
 import logging
 
 from core.config import settings
+from core.auth_cache import get_verified_payload
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +74,20 @@ class InviteTokenService:
                 detail="Failed to generate invite token"
             )
     
+    @staticmethod
+    def _decode_invite_token(token: str) -> Dict[str, Any]:
+        return jwt.decode(
+            token,
+            settings.auth.secret_key.get_secret_value(),
+            algorithms=["HS256"],
+            options={
+                "verify_exp": True,
+                "verify_iat": True,
+                "verify_iss": True,
+                "require": ["invite_id", "company_id", "tech_name", "email", "role", "type"]
+            }
+        )
+    
     @staticmethod
     def validate_invite_token(token: str) -> Dict[str, Any]:
         """
@@ -88,18 +103,8 @@ class InviteTokenService:
             HTTPException: If token is invalid, expired, or tampered
         """
         try:
-            # Decode and validate JWT token
-            payload = jwt.decode(
-                token,
-                settings.auth.secret_key.get_secret_value(),
-                algorithms=["HS256"],
-                options={
-                    "verify_exp": True,
-                    "verify_iat": True,
-                    "verify_iss": True,
-                    "require": ["invite_id", "company_id", "tech_name", "email", "role", "type"]
-                }
-            )
+            # Decode and validate JWT token (verified payloads are cached until exp)
+            payload = get_verified_payload("invite", token, InviteTokenService._decode_invite_token)
             
             # Validate token type
             if payload.get("type") != "tech_invite":
@@ -0,0 +1,190 @@
+"""
+Incrementally maintained invoice financial rollups
+
+Invoice amounts are encrypted, so totals cannot be computed in SQL. Instead
+every invoice write applies its change to invoice_rollups (company x month x
+status) in the same transaction, and summaries read the rollups:
+
+    before = invoice_rollup_entry(invoice)
+    ... change the invoice ...
+    apply_invoice_rollup(db, company_id, before, invoice_rollup_entry(invoice))
+    db.commit()
+
+Counters are changed with relative UPDATEs (count = count + 1), so
+concurrent writes to the same bucket never lose increments. Amounts are kept
+in integer cents to stay exact.
+"""
+
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models.invoice_rollup import InvoiceRollup
+
+AMOUNT_FIELDS = ("subtotal", "service_fee", "tax", "total_amount")
+
+
+class RollupEntry(NamedTuple):
+    """One invoice's contribution to a rollup bucket"""
+    month: str
+    status: str
+    subtotal_cents: int
+    service_fee_cents: int
+    tax_cents: int
+    total_amount_cents: int
+
+
+def _cents(amount: Optional[float]) -> int:
+    return int(round((amount or 0.0) * 100))
+
+
+def invoice_month(invoice_date: datetime) -> str:
+    return invoice_date.strftime("%Y-%m")
+
+
+def invoice_rollup_entry(invoice) -> Optional[RollupEntry]:
+    """Snapshot of what an invoice contributes to the rollups (None if it has no date)"""
+    if invoice.invoice_date is None:
+        return None
+    return RollupEntry(
+        invoice_month(invoice.invoice_date),
+        invoice.status,
+        *(_cents(getattr(invoice, field)) for field in AMOUNT_FIELDS),
+    )
+
+
+def _apply(db: Session, company_id: int, month: str, status: str, count: int, cents: List[int]) -> None:
+    table = InvoiceRollup.__table__
+    deltas = {f"{field}_cents": value for field, value in zip(AMOUNT_FIELDS, cents)}
+    key = (table.c.company_id == company_id, table.c.month == month, table.c.status == status)
+    increment = update(table).where(*key).values(
+        invoice_count=table.c.invoice_count + count,
+        **{column: table.c[column] + delta for column, delta in deltas.items()},
+    )
+    
+    if db.execute(increment).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(table).values(
+                company_id=company_id, month=month, status=status, invoice_count=count, **deltas
+            ))
+    except IntegrityError:
+        # A concurrent transaction created the bucket first
+        db.execute(increment)
+
+
+def apply_invoice_rollup(
+    db: Session,
+    company_id: Optional[int],
+    before: Optional[RollupEntry],
+    after: Optional[RollupEntry],
+) -> None:
+    """
+    Move an invoice's contribution from its old bucket to its new one
+    
+    Pass before=None for a new invoice and after=None for a deleted one.
+    """
+    if company_id is None or before == after:
+        return
+    
+    if before is not None and after is not None and before[:2] == after[:2]:
+        _apply(db, company_id, after.month, after.status, 0, [a - b for a, b in zip(after[2:], before[2:])])
+        return
+    if before is not None:
+        _apply(db, company_id, before.month, before.status, -1, [-value for value in before[2:]])
+    if after is not None:
+        _apply(db, company_id, after.month, after.status, 1, list(after[2:]))
+
+
+def invoice_summary(
+    db: Session,
+    company_id: int,
+    from_month: Optional[str] = None,
+    to_month: Optional[str] = None,
+    status: Optional[str] = None,
+) -> Dict[str, object]:
+    """Rollup rows for a company, oldest month first, with overall totals"""
+    table = InvoiceRollup.__table__
+    query = select(table).where(table.c.company_id == company_id, table.c.invoice_count != 0)
+    if from_month:
+        query = query.where(table.c.month >= from_month)
+    if to_month:
+        query = query.where(table.c.month <= to_month)
+    if status:
+        query = query.where(table.c.status == status)
+    
+    periods = []
+    totals = {"invoice_count": 0, **{field: 0 for field in AMOUNT_FIELDS}}
+    for row in db.execute(query.order_by(table.c.month, table.c.status)):
+        period = {"month": row.month, "status": row.status, "invoice_count": row.invoice_count}
+        totals["invoice_count"] += row.invoice_count
+        for field in AMOUNT_FIELDS:
+            cents = row._mapping[f"{field}_cents"]
+            period[field] = cents / 100
+            totals[field] += cents
+        periods.append(period)
+    
+    for field in AMOUNT_FIELDS:
+        totals[field] /= 100
+    return {"periods": periods, "totals": totals}
+
+
+def rebuild_invoice_rollups(db: Session, company_id: Optional[int] = None, batch_size: int = 500) -> int:
+    """
+    Recompute rollups from the invoices themselves (all companies by default)
+    
+    Decrypts every invoice, so this is for backfills and repairs, not requests.
+    Invoices are attributed to their creator's current company.
+    
+    Returns:
+        Number of invoices counted
+    """
+    from models.invoice import Invoice
+    from models.user import User
+    
+    table = InvoiceRollup.__table__
+    delete = table.delete()
+    if company_id is not None:
+        delete = delete.where(table.c.company_id == company_id)
+    db.execute(delete)
+    
+    buckets: Dict[tuple, List[int]] = {}
+    last_id = 0
+    counted = 0
+    while True:
+        query = (
+            db.query(Invoice, User.company_id)
+            .join(User, Invoice.user_id == User.id)
+            .filter(Invoice.id > last_id, User.company_id.isnot(None))
+        )
+        if company_id is not None:
+            query = query.filter(User.company_id == company_id)
+        rows = query.order_by(Invoice.id).limit(batch_size).all()
+        if not rows:
+            break
+        
+        for invoice, owner_company_id in rows:
+            entry = invoice_rollup_entry(invoice)
+            if entry is not None:
+                bucket = buckets.setdefault((owner_company_id, entry.month, entry.status), [0, 0, 0, 0, 0])
+                bucket[0] += 1
+                for i, value in enumerate(entry[2:], start=1):
+                    bucket[i] += value
+                counted += 1
+        last_id = rows[-1][0].id
+        for invoice, _ in rows:
+            db.expunge(invoice)
+    
+    if buckets:
+        db.execute(insert(table), [
+            {
+                "company_id": key[0], "month": key[1], "status": key[2], "invoice_count": sums[0],
+                **{f"{field}_cents": value for field, value in zip(AMOUNT_FIELDS, sums[1:])},
+            }
+            for key, sums in buckets.items()
+        ])
+    return counted
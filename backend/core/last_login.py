@@ -0,0 +1,116 @@
+"""
+Write-behind tracker for users.last_login
+
+Authenticated requests only record the latest timestamp per user in memory.
+A background thread flushes the pending timestamps in one batched UPDATE on
+an interval and once more at shutdown, so reads never open a write
+transaction on the users table. last_login may lag by up to one interval.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import bindparam, update
+
+from core.config import settings
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginTracker:
+    """Coalesces last_login updates and writes them in batches"""
+
+    def __init__(self, flush_interval_seconds: float):
+        self.flush_interval_seconds = flush_interval_seconds
+        self._pending: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+        self.last_flush_ms = 0.0
+
+    def record(self, user_id: int, timestamp: Optional[datetime] = None) -> None:
+        """Remember the latest activity time for a user"""
+        timestamp = timestamp or datetime.utcnow()
+        with self._lock:
+            current = self._pending.get(user_id)
+            if current is None or timestamp > current:
+                self._pending[user_id] = timestamp
+
+    def flush(self) -> int:
+        """Write all pending timestamps in a single transaction"""
+        from models.user import User
+
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+
+            started = time.perf_counter()
+            statement = (
+                update(User.__table__)
+                .where(User.__table__.c.id == bindparam("b_id"))
+                .values(last_login=bindparam("b_last_login"))
+            )
+            rows = [{"b_id": user_id, "b_last_login": ts} for user_id, ts in pending.items()]
+            try:
+                with engine.begin() as connection:
+                    connection.execute(statement, rows)
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Failed to flush last_login for {len(rows)} users: {str(e)}")
+                # Put the timestamps back unless newer ones arrived meanwhile
+                for user_id, ts in pending.items():
+                    self.record(user_id, ts)
+                return 0
+
+            self.flushes += 1
+            self.rows_written += len(rows)
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 3)
+            return len(rows)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval_seconds):
+            self.flush()
+
+    def start(self) -> None:
+        """Start the background flush thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="last-login-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write whatever is still pending"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval_seconds + 5)
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "flush_interval_seconds": self.flush_interval_seconds,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failures": self.failures,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+
+last_login_tracker = LastLoginTracker(
+    flush_interval_seconds=settings.auth.last_login_flush_interval_seconds,
+)
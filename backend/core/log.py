@@ -0,0 +1,166 @@
+"""
+Structured, level-gated logging for request hot paths
+
+    from core.log import get_logger
+    log = get_logger(__name__)
+    log.debug("job_tickets.list", sample="job_tickets", total=lambda: query.count())
+
+Each call emits one line, "event key=value ...", tagged with the current
+request id. Nothing is formatted unless the level is enabled: the level check
+happens before any work, the line itself is only rendered when a handler
+writes it, and callable field values are evaluated at that point too. This
+makes disabled debug calls on hot paths essentially free. Values that are
+already at hand are passed as they are; a callable may run after the call
+has returned (e.g. behind a QueueHandler), so it must not close over an
+except clause's variable, which is unbound when the clause ends.
+
+Debug and info calls can name a sampling key; SAMPLE_RATES (APP_LOG_SAMPLE_RATES)
+maps keys to the fraction of requests whose lines are kept. The decision is
+derived from the request id, so a sampled request keeps all of its lines.
+Warnings and errors are never sampled.
+"""
+
+import logging
+import re
+import uuid
+import zlib
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from core.config import settings
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Caller-supplied request ids are written into every log line, so only plain
+# tokens are accepted; anything else is replaced with a generated id
+_REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+SAMPLE_RATES: Dict[str, float] = dict(settings.app.log_sample_rates)
+
+
+def get_request_id() -> Optional[str]:
+    """Request id of the request being handled, if any"""
+    return request_id_var.get()
+
+
+def _format_value(value: Any) -> str:
+    if callable(value):
+        value = value()
+    text = str(value)
+    if not text or any(ch.isspace() or ch in '"=' for ch in text):
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return text
+
+
+class _LazyLine:
+    """Log message rendered only if a handler actually formats the record"""
+    __slots__ = ("event", "fields", "request_id")
+    
+    def __init__(self, event: str, fields: Dict[str, Any], request_id: Optional[str]):
+        self.event = event
+        self.fields = fields
+        self.request_id = request_id
+    
+    def __str__(self) -> str:
+        parts = [self.event]
+        if self.request_id:
+            parts.append(f"request_id={_format_value(self.request_id)}")
+        parts.extend(f"{key}={_format_value(value)}" for key, value in self.fields.items())
+        return " ".join(parts)
+
+
+def is_sampled(key: Optional[str]) -> bool:
+    """Whether lines under a sampling key are kept for the current request"""
+    if key is None:
+        return True
+    rate = SAMPLE_RATES.get(key, 1.0)
+    if rate >= 1.0:
+        return True
+    if rate <= 0.0:
+        return False
+    request_id = request_id_var.get()
+    if request_id is None:
+        return True
+    return (zlib.crc32(request_id.encode()) & 0xFFFFFFFF) < rate * 0x100000000
+
+
+class StructuredLogger:
+    """Thin wrapper over logging.Logger that emits one key=value line per event"""
+    __slots__ = ("_logger",)
+    
+    def __init__(self, logger: logging.Logger):
+        self._logger = logger
+    
+    def is_enabled(self, level: int, sample: Optional[str] = None) -> bool:
+        """Check before doing expensive work that only feeds a log line"""
+        return self._logger.isEnabledFor(level) and is_sampled(sample)
+    
+    def _log(self, level: int, event: str, sample: Optional[str], exc_info: bool, fields: Dict[str, Any]) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        if sample is not None and not is_sampled(sample):
+            return
+        self._logger.log(level, _LazyLine(event, fields, request_id_var.get()), exc_info=exc_info, stacklevel=3)
+    
+    def debug(self, event: str, sample: Optional[str] = None, **fields: Any) -> None:
+        self._log(logging.DEBUG, event, sample, False, fields)
+    
+    def info(self, event: str, sample: Optional[str] = None, **fields: Any) -> None:
+        self._log(logging.INFO, event, sample, False, fields)
+    
+    def warning(self, event: str, **fields: Any) -> None:
+        self._log(logging.WARNING, event, None, False, fields)
+    
+    def error(self, event: str, exc_info: bool = False, **fields: Any) -> None:
+        self._log(logging.ERROR, event, None, exc_info, fields)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    return StructuredLogger(logging.getLogger(name))
+
+
+def configure_logging() -> None:
+    """Apply the configured level to the application's loggers"""
+    level = logging.getLevelName(settings.app.log_level.upper())
+    for name in ("core", "routes", "utils"):
+        logging.getLogger(name).setLevel(level)
+
+
+class RequestContextMiddleware:
+    """
+    Assign every request an id (or reuse the caller's X-Request-ID when it
+    is a plain token) for log correlation and echo it on the response
+    """
+    
+    def __init__(self, app: Callable):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = None
+        header_name = REQUEST_ID_HEADER.lower().encode()
+        for name, value in scope.get("headers", ()):
+            if name == header_name:
+                request_id = value.decode("latin-1")
+                break
+        if not request_id or not _REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        
+        token = request_id_var.set(request_id)
+        
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((header_name, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
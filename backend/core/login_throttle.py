@@ -0,0 +1,178 @@
+"""
+In-memory brute-force throttle for the login endpoint
+
+Login attempts are counted in sliding windows keyed by the normalized email
+and by the client IP. An attempt is counted before the password is verified,
+so once a key exceeds its limit further attempts are rejected with a 429
+without ever reaching bcrypt. Each lockout of the same key lasts twice as
+long as the previous one, up to a cap. A successful login clears the email's
+counters.
+
+State is per process and bounded in size; with several workers the
+effective limits scale with the worker count.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Bucket:
+    """Attempt timestamps and lockout state for one key"""
+    __slots__ = ("attempts", "locked_until", "strikes")
+    
+    def __init__(self):
+        self.attempts = deque()
+        self.locked_until = 0.0
+        self.strikes = 0
+
+
+class LoginThrottle:
+    """Sliding-window limiter with escalating lockouts per email and per IP"""
+    
+    def __init__(
+        self,
+        email_limit: int,
+        ip_limit: int,
+        window_seconds: float,
+        lockout_seconds: float,
+        max_lockout_seconds: float,
+        max_keys: int,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.email_limit = email_limit
+        self.ip_limit = ip_limit
+        self.window_seconds = window_seconds
+        self.lockout_seconds = lockout_seconds
+        self.max_lockout_seconds = max_lockout_seconds
+        self.max_keys = max_keys
+        self.enabled = enabled
+        self._clock = clock
+        self._buckets: "OrderedDict[tuple, _Bucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected_email = 0
+        self.rejected_ip = 0
+        self.lockouts = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def _normalize_email(email: str) -> str:
+        return (email or "").strip().lower()
+    
+    def _bucket(self, key: tuple) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+    
+    def _retry_after(self, bucket: _Bucket, limit: int, now: float) -> Optional[float]:
+        """Count an attempt against a bucket; return seconds to wait if it is over the limit"""
+        if bucket.locked_until > now:
+            return bucket.locked_until - now
+        
+        cutoff = now - self.window_seconds
+        while bucket.attempts and bucket.attempts[0] <= cutoff:
+            bucket.attempts.popleft()
+        
+        # Forget earlier lockouts once the key has been quiet for a full window
+        if not bucket.attempts and bucket.locked_until <= cutoff:
+            bucket.strikes = 0
+        
+        if len(bucket.attempts) >= limit:
+            lockout = min(self.lockout_seconds * (2 ** bucket.strikes), self.max_lockout_seconds)
+            bucket.strikes += 1
+            bucket.locked_until = now + lockout
+            bucket.attempts.clear()
+            self.lockouts += 1
+            return lockout
+        
+        bucket.attempts.append(now)
+        return None
+    
+    def check(self, email: str, client_ip: Optional[str]) -> None:
+        """Count a login attempt, or raise 429 if the email or IP is throttled"""
+        if not self.enabled:
+            return
+        
+        now = self._clock()
+        with self._lock:
+            retry_after = None
+            if client_ip:
+                retry_after = self._retry_after(self._bucket(("ip", client_ip)), self.ip_limit, now)
+                if retry_after is not None:
+                    self.rejected_ip += 1
+            if retry_after is None:
+                retry_after = self._retry_after(
+                    self._bucket(("email", self._normalize_email(email))), self.email_limit, now
+                )
+                if retry_after is not None:
+                    self.rejected_email += 1
+            if retry_after is None:
+                self.allowed += 1
+                return
+        
+        logger.warning("Login throttled for a client after repeated attempts")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Please try again later.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+    
+    def record_success(self, email: str, client_ip: Optional[str]) -> None:
+        """
+        Clear the email's attempts and lockout history after a successful login
+        and give the attempt back to the IP, so shared networks are only
+        throttled for failures
+        """
+        with self._lock:
+            self._buckets.pop(("email", self._normalize_email(email)), None)
+            bucket = self._buckets.get(("ip", client_ip)) if client_ip else None
+            if bucket is not None and bucket.attempts:
+                bucket.attempts.pop()
+    
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        now = self._clock()
+        with self._lock:
+            locked = sum(1 for bucket in self._buckets.values() if bucket.locked_until > now)
+            return {
+                "enabled": self.enabled,
+                "tracked_keys": len(self._buckets),
+                "locked_keys": locked,
+                "allowed": self.allowed,
+                "rejected_email": self.rejected_email,
+                "rejected_ip": self.rejected_ip,
+                "lockouts": self.lockouts,
+                "evictions": self.evictions,
+            }
+
+
+login_throttle = LoginThrottle(
+    email_limit=settings.security.login_attempts_per_email,
+    ip_limit=settings.security.login_attempts_per_ip,
+    window_seconds=settings.security.login_attempt_window_seconds,
+    lockout_seconds=settings.security.login_lockout_seconds,
+    max_lockout_seconds=settings.security.login_lockout_max_seconds,
+    max_keys=settings.security.login_throttle_max_keys,
+    enabled=settings.security.login_throttle_enabled,
+)
@@ -0,0 +1,73 @@
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+
+class Principal:
+    """
+    The authenticated caller of a request
+    
+    Holds only what authorization needs (id, role and tenancy) and is built
+    from verified token claims or the principal cache, so most requests never
+    touch the users table. Routes that need the full ORM user call load_user.
+    """
+    __slots__ = ("id", "email", "role", "company_id", "company_uuid", "is_active")
+    
+    def __init__(
+        self,
+        id: int,
+        email: str,
+        role: str,
+        company_id: Optional[int],
+        company_uuid: Optional[str] = None,
+        is_active: bool = True,
+    ):
+        object.__setattr__(self, "id", id)
+        object.__setattr__(self, "email", email)
+        object.__setattr__(self, "role", role)
+        object.__setattr__(self, "company_id", company_id)
+        object.__setattr__(self, "company_uuid", company_uuid)
+        object.__setattr__(self, "is_active", is_active)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Principal is immutable")
+    
+    def __delattr__(self, name):
+        raise AttributeError("Principal is immutable")
+    
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> "Principal":
+        """Build a principal from a principal cache snapshot"""
+        user = snapshot["user"]
+        company = snapshot.get("company")
+        return cls(
+            id=user["id"],
+            email=user["email"],
+            role=user["role"],
+            company_id=user.get("company_id"),
+            company_uuid=company["company_id"] if company else None,
+            is_active=user.get("is_active", True),
+        )
+    
+    def load_user(self, db: Session):
+        """
+        Return the full ORM User for this principal, attached to db
+        
+        Uses the principal cache when it has the user; otherwise the user is
+        attached from the principal's own fields and its remaining columns
+        load on first access.
+        """
+        from core.security import load_principal_user
+        
+        return load_principal_user(self, db)
+    
+    def __eq__(self, other):
+        if not isinstance(other, Principal):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+    
+    def __hash__(self):
+        return hash((self.id, self.role, self.company_id))
+    
+    def __repr__(self):
+        return f"<Principal {self.email} ({self.role})>"
@@ -0,0 +1,293 @@
+"""
+Online re-encryption of encrypted fields after a key rotation
+
+To rotate keys, make the new key active, move the old one to the previous
+keys (SECURITY_DATA_ENCRYPTION_PREVIOUS_KEYS or SECURITY_FERNET_PREVIOUS_KEYS)
+so existing values stay readable, and run this job. It walks job_tickets,
+invoices and the responses stored in idempotency_keys in primary key order,
+one batch per transaction, and rewrites every value that is legacy Fernet or
+sealed with a retired key under the active key. A value that cannot be
+decrypted stops the pass at its row, so a table is only marked completed once
+every row in it has been rewritten.
+
+Each batch locks only its own rows and records its position in
+reencryption_checkpoints in the same transaction, so the API keeps serving
+while the job runs, and a stopped or crashed job resumes where it left off.
+A pause between batches bounds the load it puts on the database. Changing the
+active key again restarts the pass. Once every table has completed, the
+retired keys can be removed.
+
+Run it with scripts/reencrypt_fields.py, or in the API process with
+SECURITY_REENCRYPT_ON_STARTUP.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from sqlalchemy import func, insert, inspect, select, update
+
+from core.config import settings
+from core.encryption import DATA_KEY_ID, encrypted_attributes, needs_reencryption, reencrypt_field
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+# Seconds between progress log lines while a table is being rewritten
+_PROGRESS_LOG_INTERVAL = 30.0
+
+
+def _encrypted_tables() -> Dict[str, tuple]:
+    """Table name to (table, encrypted columns) for every model with encrypted fields"""
+    from models.idempotency_key import IdempotencyKey
+    from models.invoice import Invoice
+    from models.job_ticket import JobTicket
+    
+    tables = {}
+    for model in (JobTicket, Invoice, IdempotencyKey):
+        mapper = inspect(model)
+        columns = [mapper.column_attrs[attr].columns[0] for attr in encrypted_attributes(model)]
+        tables[model.__tablename__] = (model.__table__, columns)
+    return tables
+
+
+class ReencryptionJob:
+    """Chunked, checkpointed rewrite of encrypted columns under the active key"""
+    
+    def __init__(self, batch_size: int, pause_seconds: float):
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self._progress: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._tables: Optional[Dict[str, tuple]] = None
+        self.batches = 0
+        self.failures = 0
+        self.errors = 0
+        self.last_batch_ms = 0.0
+    
+    @property
+    def tables(self) -> Dict[str, tuple]:
+        if self._tables is None:
+            self._tables = _encrypted_tables()
+        return self._tables
+    
+    def _load_checkpoint(self, connection, table_name: str) -> Dict[str, Any]:
+        """Lock the table's checkpoint, creating or restarting it for the active key"""
+        from models.reencryption_checkpoint import ReencryptionCheckpoint
+        
+        checkpoints = ReencryptionCheckpoint.__table__
+        row = connection.execute(
+            select(checkpoints).where(checkpoints.c.table_name == table_name).with_for_update()
+        ).first()
+        
+        fresh = {"key_id": DATA_KEY_ID, "last_id": 0, "rows_scanned": 0, "rows_rewritten": 0, "completed_at": None}
+        if row is None:
+            connection.execute(insert(checkpoints).values(table_name=table_name, **fresh))
+            return fresh
+        if row.key_id != DATA_KEY_ID:
+            logger.info(f"Active key changed to {DATA_KEY_ID}; restarting re-encryption of {table_name}")
+            connection.execute(
+                update(checkpoints)
+                .where(checkpoints.c.table_name == table_name)
+                .values(started_at=func.now(), **fresh)
+            )
+            return fresh
+        return dict(row._mapping)
+    
+    def run_batch(self, table_name: str) -> bool:
+        """
+        Re-encrypt the next batch of a table
+        
+        Returns:
+            True if the table has more rows to process
+        
+        Raises:
+            RuntimeError: If a value cannot be re-encrypted; the rows before it
+                are committed and the checkpoint stops just before it
+        """
+        from models.reencryption_checkpoint import ReencryptionCheckpoint
+        
+        checkpoints = ReencryptionCheckpoint.__table__
+        table, columns = self.tables[table_name]
+        started = time.perf_counter()
+        
+        with engine.begin() as connection:
+            checkpoint = self._load_checkpoint(connection, table_name)
+            max_id = connection.execute(select(func.max(table.c.id))).scalar() or 0
+            
+            if checkpoint["completed_at"] is not None:
+                self._record_progress(table_name, checkpoint, max_id, completed=True)
+                return False
+            
+            rows = connection.execute(
+                select(table.c.id, *columns)
+                .where(table.c.id > checkpoint["last_id"])
+                .order_by(table.c.id)
+                .limit(self.batch_size)
+                .with_for_update()
+            ).all()
+            
+            rewritten = 0
+            scanned = 0
+            last_id = checkpoint["last_id"]
+            failed_id = None
+            for row in rows:
+                changes = {}
+                for column in columns:
+                    value = row._mapping[column]
+                    if not needs_reencryption(value):
+                        continue
+                    try:
+                        changes[column.name] = reencrypt_field(value)
+                    except Exception as e:
+                        self.failures += 1
+                        failed_id = row.id
+                        logger.error(f"Cannot re-encrypt {table_name}.{column.name} for id {row.id}: {str(e)}")
+                if failed_id is not None:
+                    # Leave the checkpoint just before the row so it is retried
+                    # once the key that sealed it is configured again
+                    break
+                if changes:
+                    # Re-encryption is not a content change; keep updated_at as it was
+                    if "updated_at" in table.c:
+                        changes["updated_at"] = table.c.updated_at
+                    connection.execute(update(table).where(table.c.id == row.id).values(**changes))
+                    rewritten += 1
+                scanned += 1
+                last_id = row.id
+            
+            done = failed_id is None and len(rows) < self.batch_size
+            values = {
+                "last_id": last_id,
+                "rows_scanned": checkpoint["rows_scanned"] + scanned,
+                "rows_rewritten": checkpoint["rows_rewritten"] + rewritten,
+            }
+            if done:
+                values["completed_at"] = func.now()
+            connection.execute(
+                update(checkpoints).where(checkpoints.c.table_name == table_name).values(**values)
+            )
+        
+        self.batches += 1
+        self.last_batch_ms = round((time.perf_counter() - started) * 1000, 3)
+        self._record_progress(table_name, {**checkpoint, **values}, max_id, completed=done, failed_id=failed_id)
+        if failed_id is not None:
+            raise RuntimeError(f"id {failed_id} of {table_name} cannot be decrypted with the configured keys")
+        return not done
+    
+    def _record_progress(
+        self,
+        table_name: str,
+        checkpoint: Dict[str, Any],
+        max_id: int,
+        completed: bool,
+        failed_id: Optional[int] = None,
+    ) -> None:
+        last_id = checkpoint["last_id"]
+        with self._lock:
+            self._progress[table_name] = {
+                "key_id": checkpoint["key_id"],
+                "last_id": last_id,
+                "max_id": max_id,
+                "rows_scanned": checkpoint["rows_scanned"],
+                "rows_rewritten": checkpoint["rows_rewritten"],
+                "completed": completed,
+                "failed_id": failed_id,
+                "percent": 100.0 if completed or not max_id else round(min(last_id / max_id, 1.0) * 100, 1),
+            }
+    
+    def run(
+        self,
+        tables: Optional[Iterable[str]] = None,
+        on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    ) -> bool:
+        """
+        Re-encrypt tables until they complete or the job is stopped
+        
+        Returns:
+            True if every table completed
+        """
+        complete = True
+        for table_name in tables or self.tables:
+            last_logged = time.monotonic()
+            while not self._stop.is_set():
+                try:
+                    more = self.run_batch(table_name)
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Re-encryption of {table_name} failed, will resume from checkpoint: {str(e)}")
+                    return False
+                
+                progress = self.progress(table_name)
+                if on_progress is not None:
+                    on_progress(table_name, progress)
+                if not more:
+                    logger.info(
+                        f"Re-encryption of {table_name} complete: "
+                        f"{progress['rows_rewritten']} of {progress['rows_scanned']} rows rewritten"
+                    )
+                    break
+                if time.monotonic() - last_logged >= _PROGRESS_LOG_INTERVAL:
+                    logger.info(f"Re-encrypting {table_name}: {progress['percent']}% (id {progress['last_id']})")
+                    last_logged = time.monotonic()
+                if self.pause_seconds:
+                    self._stop.wait(self.pause_seconds)
+            else:
+                complete = False
+        return complete
+    
+    def reset(self, tables: Optional[Iterable[str]] = None) -> None:
+        """Forget checkpoints so the next run starts a fresh pass"""
+        from models.reencryption_checkpoint import ReencryptionCheckpoint
+        
+        checkpoints = ReencryptionCheckpoint.__table__
+        names = list(tables or self.tables)
+        with engine.begin() as connection:
+            connection.execute(checkpoints.delete().where(checkpoints.c.table_name.in_(names)))
+        with self._lock:
+            for name in names:
+                self._progress.pop(name, None)
+    
+    def progress(self, table_name: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._progress.get(table_name, {}))
+    
+    def start(self) -> None:
+        """Run the job on a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="reencryption", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop after the current batch; progress is kept in the checkpoints"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        with self._lock:
+            tables = {name: dict(progress) for name, progress in self._progress.items()}
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "active_key_id": DATA_KEY_ID,
+            "batch_size": self.batch_size,
+            "pause_seconds": self.pause_seconds,
+            "batches": self.batches,
+            "failures": self.failures,
+            "errors": self.errors,
+            "last_batch_ms": self.last_batch_ms,
+            "tables": tables,
+        }
+
+
+reencryption_job = ReencryptionJob(
+    batch_size=settings.security.reencryption_batch_size,
+    pause_seconds=settings.security.reencryption_pause_seconds,
+)
@@ -1,18 +1,43 @@
 from datetime import datetime, timedelta
-from typing import Optional, List, Union
+import secrets
+from typing import Optional, List, Tuple, Union
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
 
 from .config import settings
+from .auth_cache import principal_cache, get_verified_payload
+from .last_login import last_login_tracker
+from .token_versions import token_versions
+from .hashing import password_hash_pool
+from .principal import Principal
+from .log import get_logger
 from database import get_db
 # We'll need to import the User model, but we need to avoid circular imports
 # So we'll import it inside the function where it's needed
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def build_password_context(bcrypt_rounds: Optional[int] = None) -> CryptContext:
+    """
+    Build the password hashing context for a bcrypt cost
+    
+    Pinning min/max rounds to the configured cost makes hashes stored at any
+    other cost report needs_update.
+    """
+    bcrypt_options = {}
+    if bcrypt_rounds:
+        bcrypt_options = {
+            "bcrypt__default_rounds": bcrypt_rounds,
+            "bcrypt__min_rounds": bcrypt_rounds,
+            "bcrypt__max_rounds": bcrypt_rounds,
+        }
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", **bcrypt_options)
+
+pwd_context = build_password_context(settings.auth.bcrypt_rounds)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -22,6 +47,22 @@ def get_password_hash(password: str) -> str:
     """Hash a password for storing"""
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash if the stored cost is outdated"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool without blocking the event loop"""
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify and, if needed, rehash a password on the hashing pool"""
+    return await password_hash_pool.run(verify_and_update_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool without blocking the event loop"""
+    return await password_hash_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a new JWT token with multi-tenancy support"""
     to_encode = data.copy()
@@ -43,6 +84,17 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     
     return encoded_jwt
 
+def _decode_access_token(token: str) -> dict:
+    return jwt.decode(
+        token, 
+        settings.auth.secret_key.get_secret_value(), 
+        algorithms=[settings.auth.algorithm]
+    )
+
+def decode_access_token(token: str) -> dict:
+    """Verify an access token, reusing the payload of recently verified tokens"""
+    return get_verified_payload("access", token, _decode_access_token)
+
 def create_user_token(user) -> str:
     """Create a JWT token for a user with multi-tenancy claims"""
     token_data = {
@@ -50,20 +102,212 @@ def create_user_token(user) -> str:
         "email": user.email,
         "role": user.role,
         "company_id": user.company_id,
-        "is_active": user.is_active
+        "is_active": user.is_active,
+        "company_uuid": user.company.company_id if user.company is not None else None,
+        "ver": user.token_version or 0,
+        "type": "access"
     }
     return create_access_token(token_data)
 
+def _issue_refresh_token(db: Session, user, family_id: Optional[str] = None) -> Tuple[str, str]:
+    """Create a refresh token JWT and record it; returns (token, jti)"""
+    from models.refresh_token import RefreshToken
+    
+    jti = secrets.token_urlsafe(32)
+    expires_at = datetime.utcnow() + timedelta(days=settings.auth.refresh_token_expire_days)
+    db.add(RefreshToken(
+        jti=jti,
+        family_id=family_id or secrets.token_urlsafe(16),
+        user_id=user.id,
+        expires_at=expires_at
+    ))
+    
+    token = jwt.encode(
+        {"sub": str(user.id), "jti": jti, "type": "refresh", "exp": expires_at},
+        settings.auth.secret_key.get_secret_value(),
+        algorithm=settings.auth.algorithm
+    )
+    return token, jti
+
+def create_refresh_token(db: Session, user) -> str:
+    """Start a new refresh token family for a user (the caller commits)"""
+    token, _ = _issue_refresh_token(db, user)
+    return token
+
+def _decode_refresh_token(token: str, verify_exp: bool = True) -> dict:
+    payload = jwt.decode(
+        token,
+        settings.auth.secret_key.get_secret_value(),
+        algorithms=[settings.auth.algorithm],
+        options={"verify_exp": verify_exp}
+    )
+    if payload.get("type") != "refresh" or not payload.get("jti"):
+        raise JWTError("Not a refresh token")
+    return payload
+
+def _revoke_refresh_family(db: Session, family_id: str) -> None:
+    from models.refresh_token import RefreshToken
+    
+    db.query(RefreshToken).filter(
+        RefreshToken.family_id == family_id,
+        RefreshToken.revoked_at.is_(None)
+    ).update({RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+
+def rotate_refresh_token(db: Session, refresh_token: str):
+    """
+    Exchange a refresh token for a rotated one; returns (user, new_refresh_token)
+    
+    Each refresh token is single-use. Presenting one that was already rotated
+    is treated as theft and revokes every token in its family.
+    """
+    from models.refresh_token import RefreshToken
+    from models.user import User
+    
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    try:
+        payload = _decode_refresh_token(refresh_token)
+    except JWTError:
+        raise invalid_token
+    
+    stored = db.query(RefreshToken).filter(RefreshToken.jti == payload["jti"]).first()
+    if stored is None or stored.is_expired:
+        raise invalid_token
+    
+    user = db.query(User).filter(User.id == stored.user_id).first()
+    if user is None or not user.is_active:
+        _revoke_refresh_family(db, stored.family_id)
+        db.commit()
+        raise invalid_token
+    
+    new_token, new_jti = _issue_refresh_token(db, user, family_id=stored.family_id)
+    
+    # Conditional update so two concurrent refreshes cannot both rotate the same token
+    rotated = db.query(RefreshToken).filter(
+        RefreshToken.id == stored.id,
+        RefreshToken.revoked_at.is_(None)
+    ).update(
+        {RefreshToken.revoked_at: datetime.utcnow(), RefreshToken.replaced_by: new_jti},
+        synchronize_session=False
+    )
+    if not rotated:
+        db.rollback()
+        _revoke_refresh_family(db, stored.family_id)
+        db.commit()
+        raise invalid_token
+    
+    db.commit()
+    return user, new_token
+
+def revoke_user_refresh_tokens(db: Session, user_id: int) -> None:
+    """Revoke every outstanding refresh token of a user (the caller commits)"""
+    from models.refresh_token import RefreshToken
+    
+    db.query(RefreshToken).filter(
+        RefreshToken.user_id == user_id,
+        RefreshToken.revoked_at.is_(None)
+    ).update({RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+
+def revoke_refresh_token(db: Session, refresh_token: str) -> None:
+    """Revoke the refresh token family a token belongs to (logout)"""
+    from models.refresh_token import RefreshToken
+    
+    try:
+        payload = _decode_refresh_token(refresh_token, verify_exp=False)
+    except JWTError:
+        return
+    
+    stored = db.query(RefreshToken).filter(RefreshToken.jti == payload["jti"]).first()
+    if stored is not None:
+        _revoke_refresh_family(db, stored.family_id)
+        db.commit()
+
+def _column_values(instance) -> dict:
+    """Copy the loaded column values of an ORM instance"""
+    return {attr.key: getattr(instance, attr.key) for attr in sa_inspect(instance).mapper.column_attrs}
+
+def _snapshot_principal(user) -> dict:
+    """Build the principal cache entry for a user loaded with its company"""
+    return {
+        "user": _column_values(user),
+        "company": _column_values(user.company) if user.company is not None else None,
+    }
+
+def _attach_principal(db: Session, snapshot: dict):
+    """
+    Rebuild a User (and its company) from a cached snapshot and attach it to
+    the session as a persistent instance without emitting any SQL; columns
+    missing from the snapshot are loaded on first access
+    """
+    from models.user import User
+    from models.company import Company
+
+    existing = db.identity_map.get(identity_key(User, snapshot["user"]["id"]))
+    if existing is not None:
+        return existing
+
+    user = User(**snapshot["user"])
+    make_transient_to_detached(user)
+
+    # Snapshots built from a principal carry no company; leave it to lazy-load
+    if "company" in snapshot:
+        company = None
+        if snapshot["company"] is not None:
+            company = db.identity_map.get(identity_key(Company, snapshot["company"]["id"]))
+            if company is None:
+                company = Company(**snapshot["company"])
+                make_transient_to_detached(company)
+        set_committed_value(user, "company", company)
+    db.add(user)
+    return user
+
+log = get_logger(__name__)
+
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get the current user from the JWT token with multi-tenancy validation"""
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    logger.info(f"🔐 get_current_user called with token: {token[:20]}..." if token else "🔐 get_current_user called with NO TOKEN")
+def _principal_from_claims(payload: dict) -> Optional[Principal]:
+    """Build a principal from access token claims, or None if claims are missing"""
+    required = ("sub", "email", "role")
+    if any(payload.get(claim) is None for claim in required):
+        return None
+    if payload.get("company_id") is not None and payload.get("company_uuid") is None:
+        return None
+    return Principal(
+        id=int(payload["sub"]),
+        email=payload["email"],
+        role=payload["role"],
+        company_id=payload.get("company_id"),
+        company_uuid=payload.get("company_uuid"),
+        is_active=payload.get("is_active", True),
+    )
+
+def load_principal_user(principal: Principal, db: Session):
+    """
+    Return the ORM User for a principal without querying when possible
     
+    A cached snapshot is attached as-is; otherwise the user is attached from
+    the principal's fields and the remaining columns load on first access.
+    """
+    snapshot = principal_cache.get(principal.id)
+    if snapshot is None:
+        snapshot = {
+            "user": {
+                "id": principal.id,
+                "email": principal.email,
+                "role": principal.role,
+                "company_id": principal.company_id,
+                "is_active": principal.is_active,
+            }
+        }
+    return _attach_principal(db, snapshot)
+
+async def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
+    """Get the authenticated principal from the JWT token with multi-tenancy validation"""
     # Define the credentials exception
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -72,86 +316,103 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     )
     
     try:
-        logger.info("🔍 Attempting to decode JWT token...")
         # Decode the JWT token
-        payload = jwt.decode(
-            token, 
-            settings.auth.secret_key.get_secret_value(), 
-            algorithms=[settings.auth.algorithm]
-        )
-        logger.info(f"✅ JWT token decoded successfully. Payload: {payload}")
+        payload = decode_access_token(token)
         
         user_id = payload.get("sub")
-        logger.info(f"👤 User ID from token: {user_id}")
-        
         if user_id is None:
-            logger.error("❌ No user ID found in token payload")
+            log.warning("auth.token.no_subject")
             raise credentials_exception
             
+        # Refresh tokens (and any other token type) cannot authenticate requests
+        if payload.get("type", "access") != "access":
+            log.warning("auth.token.wrong_type", user_id=user_id, token_type=payload.get("type"))
+            raise credentials_exception
+        
+        # Tokens issued before the user's last role, status or password change are revoked
+        if not token_versions.is_current(int(user_id), payload.get("ver", 0)):
+            log.info("auth.token.revoked", user_id=user_id, version=payload.get("ver", 0))
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token is no longer valid. Please log in again.",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
         # Extract multi-tenancy claims
         token_company_id = payload.get("company_id")
         token_role = payload.get("role")
         token_is_active = payload.get("is_active", True)
         
-        logger.info(f"🏢 Token claims - Company ID: {token_company_id}, Role: {token_role}, Active: {token_is_active}")
-        
     except JWTError as e:
-        logger.error(f"❌ JWT decode error: {str(e)}")
+        log.info("auth.token.invalid", error=str(e))
         raise credentials_exception
     
     # Import User model here to avoid circular imports
     from models.user import User
     
-    logger.info(f"🔍 Looking up user with ID: {user_id}")
-    # Get user from database with company relationship loaded
-    user = db.query(User).options(joinedload(User.company)).filter(User.id == int(user_id)).first()
-    
-    if user is None:
-        logger.error(f"❌ User not found in database with ID: {user_id}")
-        raise credentials_exception
+    # Serve the principal from the in-process cache or the verified claims when possible
+    principal = None
+    snapshot = principal_cache.get(int(user_id))
+    if snapshot is not None:
+        principal = Principal.from_snapshot(snapshot)
+    elif settings.auth.trust_access_token_claims:
+        principal = _principal_from_claims(payload)
     
-    logger.info(f"✅ User found: {user.email}, Role: {user.role}, Company ID: {user.company_id}, Active: {user.is_active}")
+    if principal is None:
+        # Get user from database with company relationship loaded
+        user = db.query(User).options(joinedload(User.company)).filter(User.id == int(user_id)).first()
+        
+        if user is None:
+            log.warning("auth.user.not_found", user_id=user_id)
+            raise credentials_exception
+        
+        snapshot = _snapshot_principal(user)
+        principal_cache.set(user.id, snapshot)
+        principal = Principal.from_snapshot(snapshot)
     
     # Validate user is still active
-    if not user.is_active:
-        logger.error(f"❌ User account is deactivated: {user.email}")
+    if not principal.is_active:
+        log.info("auth.user.inactive", user_id=principal.id)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User account is deactivated"
         )
     
     # Validate token claims match current user state (prevent token reuse after changes)
-    logger.info(f"🔍 Validating token claims against current user state...")
-    logger.info(f"   Token company_id: {token_company_id} vs User company_id: {user.company_id}")
-    logger.info(f"   Token role: {token_role} vs User role: {user.role}")
-    logger.info(f"   Token is_active: {token_is_active} vs User is_active: {user.is_active}")
-    
-    if (user.company_id != token_company_id or 
-        user.role != token_role or 
-        user.is_active != token_is_active):
-        logger.error(f"❌ Token claims mismatch! Token invalid.")
-        logger.error(f"   Company ID mismatch: {user.company_id} != {token_company_id}")
-        logger.error(f"   Role mismatch: {user.role} != {token_role}")
-        logger.error(f"   Active status mismatch: {user.is_active} != {token_is_active}")
+    if (principal.company_id != token_company_id or 
+        principal.role != token_role or 
+        principal.is_active != token_is_active):
+        log.info(
+            "auth.token.claims_mismatch", user_id=principal.id,
+            company_id=principal.company_id, token_company_id=token_company_id,
+            role=principal.role, token_role=token_role,
+            is_active=principal.is_active, token_is_active=token_is_active
+        )
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token is no longer valid. Please log in again."
         )
     
-    logger.info(f"✅ Token validation successful for user: {user.email}")
+    log.debug("auth.principal", sample="auth", user_id=principal.id, role=principal.role, company_id=principal.company_id)
     
-    # Update last login timestamp
-    user.last_login = datetime.utcnow()
-    db.commit()
+    # Record activity; the tracker writes last_login in batches
+    last_login_tracker.record(principal.id)
     
-    return user
+    return principal
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """Get the current user as a full ORM User, for routes that read or modify it"""
+    return load_principal_user(principal, db)
 
 def require_role(allowed_roles: List[Union[str, object]]):
     """
     Dependency factory for role-based access control
     Usage: Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
     """
-    def role_checker(current_user = Depends(get_current_user)):
+    def role_checker(current_user: Principal = Depends(get_current_principal)) -> Principal:
         # Convert enum objects to string values if needed
         role_values = []
         for role in allowed_roles:
@@ -174,7 +435,7 @@ def require_company_access(target_company_id: int):
     Dependency factory for company-level access control
     Ensures users can only access data from their own company (except admins)
     """
-    def company_checker(current_user = Depends(get_current_user)):
+    def company_checker(current_user: Principal = Depends(get_current_principal)) -> Principal:
         from models.user import UserRole
         
         # Admins can access any company
@@ -0,0 +1,279 @@
+"""
+Group-commit writer for job ticket submissions
+
+With APP_SUBMIT_DURABILITY set to commit or enqueue, POST /job-tickets/submit
+validates the ticket, assigns its ticket number and encrypts it in the
+request, then hands it to this queue instead of running its own INSERT and
+COMMIT. A background thread takes whatever has queued up within
+APP_SUBMIT_FLUSH_INTERVAL_MS (up to APP_SUBMIT_BATCH_SIZE tickets) and writes
+it with one executemany INSERT in one transaction, so a burst of submissions
+shares a handful of commits.
+
+In commit mode the request waits for its batch to commit, so an
+acknowledged ticket is durable. In enqueue mode it is answered as soon as
+the ticket is queued; tickets still queued are lost if the process dies
+before they are written. The queue is drained at shutdown.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from core.blind_index import insert_search_tokens
+from core.config import settings
+from database import SessionLocal
+from models.job_ticket import JobTicket
+
+logger = logging.getLogger(__name__)
+
+
+def ticket_insert_values(ticket: JobTicket) -> dict:
+    """
+    Column values set on a new ticket, ciphertext and blind indexes included
+    
+    The id is always left to the database, even if an earlier attempt that
+    was rolled back had set one.
+    """
+    return {
+        attr.columns[0].key: ticket.__dict__[attr.key]
+        for attr in JobTicket.__mapper__.column_attrs
+        if attr.key in ticket.__dict__ and not attr.columns[0].primary_key
+    }
+
+
+def insert_tickets(db: Session, tickets: List[JobTicket]) -> None:
+    """
+    Insert new tickets with one executemany INSERT and set their ids
+    
+    Ticket numbers are unique, so one SELECT maps them back to the new ids;
+    every ticket must have one.
+    """
+    db.execute(insert(JobTicket.__table__), [ticket_insert_values(ticket) for ticket in tickets])
+    ids = dict(db.execute(
+        select(JobTicket.ticket_number, JobTicket.id)
+        .where(JobTicket.ticket_number.in_([ticket.ticket_number for ticket in tickets]))
+    ).all())
+    for ticket in tickets:
+        ticket.id = ids[ticket.ticket_number]
+    insert_search_tokens(db, tickets)
+
+
+class QueueFull(Exception):
+    """The write queue is at APP_SUBMIT_QUEUE_SIZE"""
+
+
+class _Pending:
+    """A queued ticket and what to do once its batch is decided"""
+    __slots__ = ("ticket", "future", "on_insert", "on_failure", "queued_at")
+    
+    def __init__(self, ticket: JobTicket, on_insert: Optional[Callable[[Session, JobTicket], None]],
+                 on_failure: Optional[Callable[[Session], None]]):
+        self.ticket = ticket
+        self.future: Future = Future()
+        self.on_insert = on_insert
+        self.on_failure = on_failure
+        self.queued_at = time.perf_counter()
+
+
+class TicketWriteQueue:
+    """Batches queued ticket inserts into shared transactions on a background thread"""
+    
+    def __init__(self, durability: str, batch_size: int, flush_interval_ms: float, max_pending: int):
+        self.durability = durability
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_ms / 1000
+        self._queue: "queue.Queue[_Pending]" = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.enqueued = 0
+        self.rejected = 0
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self.largest_batch = 0
+        self.last_flush_ms = 0.0
+        self.max_latency_ms = 0.0
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether submissions should be queued (APP_SUBMIT_DURABILITY is not direct)"""
+        return self.durability != "direct"
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+    
+    def submit(self, ticket: JobTicket, on_insert: Optional[Callable[[Session, JobTicket], None]] = None,
+               on_failure: Optional[Callable[[Session], None]] = None) -> Future:
+        """
+        Queue a new ticket, which must already have its ticket number
+        
+        Args:
+            ticket: The transient ticket; not to be touched until the future is done
+            on_insert: Called in the batch's transaction once the ticket has its id
+            on_failure: Called if the ticket could not be written
+        
+        Returns:
+            A future resolving to the ticket's id once its batch has committed
+        
+        Raises:
+            QueueFull: If APP_SUBMIT_QUEUE_SIZE tickets are already waiting
+        """
+        pending = _Pending(ticket, on_insert, on_failure)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFull()
+        with self._lock:
+            self.enqueued += 1
+        return pending.future
+    
+    def _next_batch(self, block: bool) -> List[_Pending]:
+        """The tickets queued within one flush interval of the first, up to batch_size"""
+        try:
+            batch = [self._queue.get(timeout=0.1) if block else self._queue.get_nowait()]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def _write_one(self, db: Session, pending: _Pending) -> bool:
+        """Insert one ticket in a savepoint, so a bad row cannot fail the rest"""
+        try:
+            with db.begin_nested():
+                insert_tickets(db, [pending.ticket])
+                if pending.on_insert is not None:
+                    pending.on_insert(db, pending.ticket)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write queued ticket {pending.ticket.ticket_number}: {str(e)}")
+            pending.future.set_exception(e)
+            return False
+    
+    def _write(self, batch: List[_Pending]) -> None:
+        """Write a batch in one transaction, falling back to one savepoint per ticket"""
+        started = time.perf_counter()
+        written = batch
+        db = SessionLocal()
+        try:
+            try:
+                insert_tickets(db, [pending.ticket for pending in batch])
+                for pending in batch:
+                    if pending.on_insert is not None:
+                        pending.on_insert(db, pending.ticket)
+                db.commit()
+            except Exception as e:
+                logger.warning(f"Batch of {len(batch)} queued tickets failed, retrying one by one: {str(e)}")
+                db.rollback()
+                # The ids the batch was given were rolled back with it
+                for pending in batch:
+                    pending.ticket.id = None
+                written = [pending for pending in batch if self._write_one(db, pending)]
+                db.commit()
+        except Exception as e:
+            logger.error(f"Failed to write {len(batch)} queued tickets: {str(e)}")
+            db.rollback()
+            written = []
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(e)
+        finally:
+            # Only failed tickets' futures are settled yet
+            failed = [pending for pending in batch if pending.future.done()]
+            for pending in failed:
+                if pending.on_failure is not None:
+                    try:
+                        pending.on_failure(db)
+                    except Exception as e:
+                        logger.error(f"Failure handler of a queued ticket raised: {str(e)}")
+            db.close()
+        
+        for pending in written:
+            pending.future.set_result(pending.ticket.id)
+        
+        now = time.perf_counter()
+        with self._lock:
+            self.batches += 1
+            self.written += len(written)
+            self.failed += len(batch) - len(written)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.last_flush_ms = round((now - started) * 1000, 3)
+            self.max_latency_ms = max(self.max_latency_ms, round((now - batch[0].queued_at) * 1000, 3))
+    
+    def flush(self) -> int:
+        """Write everything queued so far on the calling thread; returns the number of tickets"""
+        count = 0
+        while True:
+            batch = self._next_batch(block=False)
+            if not batch:
+                return count
+            self._write(batch)
+            count += len(batch)
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch(block=True)
+            if batch:
+                self._write(batch)
+    
+    def start(self) -> None:
+        """Start the background writer thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ticket-writer", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the background thread and write whatever is still queued"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+        drained = self.flush()
+        if drained:
+            logger.info(f"Wrote {drained} queued tickets at shutdown")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        with self._lock:
+            return {
+                "durability": self.durability,
+                "running": self.running,
+                "pending": self._queue.qsize(),
+                "capacity": self._queue.maxsize,
+                "batch_size": self.batch_size,
+                "flush_interval_ms": round(self.flush_interval_seconds * 1000, 3),
+                "enqueued": self.enqueued,
+                "rejected": self.rejected,
+                "batches": self.batches,
+                "written": self.written,
+                "failed": self.failed,
+                "average_batch": round(self.written / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "last_flush_ms": self.last_flush_ms,
+                "max_latency_ms": self.max_latency_ms,
+            }
+
+
+ticket_write_queue = TicketWriteQueue(
+    durability=settings.app.submit_durability,
+    batch_size=settings.app.submit_batch_size,
+    flush_interval_ms=settings.app.submit_flush_interval_ms,
+    max_pending=settings.app.submit_queue_size,
+)
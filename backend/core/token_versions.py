@@ -0,0 +1,192 @@
+"""
+In-memory revocation table for access tokens
+
+Every access token carries the user's token_version as its "ver" claim.
+Bumping users.token_version revokes all tokens issued before the bump. This
+module keeps a compact map of user id to minimum valid version, holding only
+users whose version was ever bumped, so validating a token is a dictionary
+lookup instead of a database query.
+
+Bumps committed by this process are applied as soon as the transaction
+commits. Bumps committed by other processes are picked up by a background
+thread that polls users.updated_at incrementally, so they take effect within
+one refresh interval.
+
+A user deleted in this process has every version revoked until a new user
+is inserted under the same id. Deleted rows leave nothing for the refresh to
+read, so a deletion committed by another process is not seen here;
+deactivate users (which bumps the version) to revoke their tokens
+everywhere.
+"""
+
+import logging
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from database import engine
+
+logger = logging.getLogger(__name__)
+
+# Re-read rows this far behind the watermark so transactions that committed
+# late with an earlier updated_at are not missed
+_WATERMARK_OVERLAP = timedelta(seconds=30)
+
+_SESSION_INFO_KEY = "token_version_bumps"
+
+# Minimum version of a deleted user, above any version a token can carry
+DELETED = sys.maxsize
+
+
+class TokenVersionTable:
+    """Minimum valid token version per user, refreshed incrementally"""
+    
+    def __init__(self, refresh_interval_seconds: float):
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self._min_versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._watermark: Optional[datetime] = None
+        self._loaded = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refreshes = 0
+        self.rows_read = 0
+        self.failures = 0
+        self.rejections = 0
+        self.last_refresh_ms = 0.0
+    
+    def min_version(self, user_id: int) -> int:
+        """Lowest token version still accepted for a user"""
+        return self._min_versions.get(user_id, 0)
+    
+    def is_current(self, user_id: int, version: int) -> bool:
+        """Check a token's version claim against the revocation table"""
+        if version >= self._min_versions.get(user_id, 0):
+            return True
+        self.rejections += 1
+        return False
+    
+    def record(self, user_id: int, version: int) -> None:
+        """Raise the minimum valid version for a user"""
+        if version <= 0:
+            return
+        with self._lock:
+            if version > self._min_versions.get(user_id, 0):
+                self._min_versions[user_id] = version
+    
+    def revoke_all(self, user_id: int) -> None:
+        """Reject every token of a deleted user, whatever its version"""
+        with self._lock:
+            self._min_versions[user_id] = DELETED
+    
+    def forget(self, user_id: int) -> None:
+        """Drop a user's entry so a new user reusing the id starts from version 0"""
+        with self._lock:
+            self._min_versions.pop(user_id, None)
+    
+    def refresh(self) -> int:
+        """Load versions bumped since the last refresh (everything on the first call)"""
+        from models.user import User
+        
+        users = User.__table__
+        with self._refresh_lock:
+            started = time.perf_counter()
+            query = select(users.c.id, users.c.token_version, users.c.updated_at).where(
+                users.c.token_version > 0
+            )
+            if self._watermark is not None:
+                query = query.where(users.c.updated_at >= self._watermark - _WATERMARK_OVERLAP)
+            
+            try:
+                with engine.connect() as connection:
+                    rows = connection.execute(query).all()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Failed to refresh token versions: {str(e)}")
+                return 0
+            
+            watermark = self._watermark
+            for user_id, version, updated_at in rows:
+                self.record(user_id, version)
+                if updated_at is not None and (watermark is None or updated_at > watermark):
+                    watermark = updated_at
+            self._watermark = watermark
+            self._loaded = True
+            
+            self.refreshes += 1
+            self.rows_read += len(rows)
+            self.last_refresh_ms = round((time.perf_counter() - started) * 1000, 3)
+            return len(rows)
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_interval_seconds):
+            self.refresh()
+    
+    def start(self) -> None:
+        """Load the table and start the background refresh thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-version-refresher", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the background refresh thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.refresh_interval_seconds + 5)
+            self._thread = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        with self._lock:
+            tracked = len(self._min_versions)
+        return {
+            "tracked_users": tracked,
+            "loaded": self._loaded,
+            "refresh_interval_seconds": self.refresh_interval_seconds,
+            "refreshes": self.refreshes,
+            "rows_read": self.rows_read,
+            "failures": self.failures,
+            "rejections": self.rejections,
+            "last_refresh_ms": self.last_refresh_ms,
+        }
+
+
+token_versions = TokenVersionTable(
+    refresh_interval_seconds=settings.auth.token_version_refresh_interval_seconds,
+)
+
+
+def stage_token_version(session: Session, user_id: int, version: Optional[int]) -> None:
+    """
+    Apply a flushed token_version change once the session commits
+    
+    version is the bumped version, 0 for a newly inserted user, or None for
+    a deleted user.
+    """
+    session.info.setdefault(_SESSION_INFO_KEY, {})[user_id] = version
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_staged_versions(session):
+    for user_id, version in session.info.pop(_SESSION_INFO_KEY, {}).items():
+        if version is None:
+            token_versions.revoke_all(user_id)
+        elif version == 0:
+            token_versions.forget(user_id)
+        else:
+            token_versions.record(user_id, version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_staged_versions(session):
+    session.info.pop(_SESSION_INFO_KEY, None)
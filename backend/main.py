@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
@@ -14,19 +15,50 @@ from database import Base, engine
 
 # Import config
 from core.config import settings
+from core.auth_cache import principal_cache, token_cache
+from core.last_login import last_login_tracker
+from core.hashing import password_hash_pool
+from core.token_versions import token_versions
+from core.login_throttle import login_throttle
+from core.reencryption import reencryption_job
+from core.idempotency import idempotency_store
+from core.ticket_writer import ticket_write_queue
+from utils.ticket_number import ticket_number_allocator
+from core.log import RequestContextMiddleware, configure_logging
 
 # Load environment variables
 load_dotenv()
 
+# Apply the configured log level to application loggers
+configure_logging()
+
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+# Start and stop background workers with the application
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    last_login_tracker.start()
+    token_versions.start()
+    if settings.security.reencrypt_on_startup:
+        reencryption_job.start()
+    if ticket_write_queue.enabled:
+        ticket_write_queue.start()
+    yield
+    # Drain queued ticket submissions first
+    ticket_write_queue.stop()
+    reencryption_job.stop()
+    token_versions.stop()
+    last_login_tracker.stop()
+    password_hash_pool.shutdown()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="JobTicketInvoice API",
     description="API for job ticket and invoicing system",
     version="1.0.0",
     docs_url=None,  # Disable default docs
+    lifespan=lifespan,
 )
 
 # Custom docs URL with authentication
@@ -43,6 +75,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tag every request with an id for log correlation (X-Request-ID)
+app.add_middleware(RequestContextMiddleware)
+
 # Root endpoint
 @app.get("/")
 def read_root():
@@ -54,6 +89,30 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+# Runtime metrics endpoint (enabled with FEATURE_ENABLE_PERFORMANCE_MONITORING)
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    if not settings.features.enable_performance_monitoring:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return {
+        "auth": {
+            "principal_cache": principal_cache.stats(),
+            "token_cache": token_cache.stats(),
+            "token_versions": token_versions.stats(),
+            "last_login": last_login_tracker.stats(),
+            "password_hashing": password_hash_pool.stats(),
+            "login_throttle": login_throttle.stats(),
+        },
+        "encryption": {
+            "reencryption": reencryption_job.stats(),
+        },
+        "job_tickets": {
+            "ticket_numbers": ticket_number_allocator.stats(),
+            "submit_queue": ticket_write_queue.stats(),
+        },
+        "idempotency": idempotency_store.stats(),
+    }
+
 # Include routers
 app.include_router(auth.router, prefix=settings.app.api_v1_str)
 app.include_router(users.router, prefix=settings.app.api_v1_str)
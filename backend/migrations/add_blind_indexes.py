@@ -0,0 +1,123 @@
+"""
+Migration: Add blind indexes for searching encrypted fields
+
+This migration adds the blind index columns for invoices.customer_name,
+invoices.company_name and job_tickets.location, creates the search token
+tables, and backfills the indexes by decrypting existing rows in batches.
+The backfill only writes index columns and can be re-run at any time, e.g.
+after changing SECURITY_BLIND_INDEX_KEY.
+
+Date: 2026-10-16
+Reason: Look up invoices by customer and tickets by location with indexed queries
+"""
+
+import os
+import sys
+
+from sqlalchemy import inspect, text
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base, SessionLocal, engine
+from core.blind_index import set_blind_index
+from models.invoice import Invoice
+from models.job_ticket import JobTicket
+from models.search_token import InvoiceSearchToken, JobTicketSearchToken
+
+BATCH_SIZE = 500
+
+NEW_COLUMNS = {
+    "invoices": [
+        ("customer_name_bidx", "VARCHAR(32)", True),
+        ("customer_name_tokens", "TEXT", False),
+        ("company_name_bidx", "VARCHAR(32)", True),
+    ],
+    "job_tickets": [
+        ("location_bidx", "VARCHAR(32)", True),
+        ("location_tokens", "TEXT", False),
+    ],
+}
+
+SEARCHABLE_FIELDS = {
+    Invoice: ["customer_name", "company_name"],
+    JobTicket: ["location"],
+}
+
+def add_columns():
+    """Add blind index columns and token tables that do not exist yet"""
+    inspector = inspect(engine)
+    
+    with engine.begin() as connection:
+        for table, columns in NEW_COLUMNS.items():
+            existing = [column["name"] for column in inspector.get_columns(table)]
+            for name, column_type, indexed in columns:
+                if name in existing:
+                    print(f"{table}.{name} already exists")
+                    continue
+                print(f"Adding {table}.{name}...")
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}"))
+                if indexed:
+                    connection.execute(text(f"CREATE INDEX ix_{table}_{name} ON {table} ({name})"))
+    
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[InvoiceSearchToken.__table__, JobTicketSearchToken.__table__]
+    )
+
+def backfill(model, fields):
+    """Recompute blind indexes for every row of a model, one batch per transaction"""
+    last_id = 0
+    updated = 0
+    
+    while True:
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(model)
+                .filter(model.id > last_id)
+                .order_by(model.id)
+                .limit(BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+            
+            for row in rows:
+                for field in fields:
+                    set_blind_index(row, field, getattr(row, field))
+            db.commit()
+            
+            last_id = rows[-1].id
+            updated += len(rows)
+            print(f"  {model.__tablename__}: {updated} rows indexed (id {last_id})")
+        finally:
+            db.close()
+    
+    return updated
+
+def run_migration():
+    """Add and backfill blind indexes"""
+    
+    try:
+        add_columns()
+        
+        for model, fields in SEARCHABLE_FIELDS.items():
+            print(f"Backfilling blind indexes for {model.__tablename__}...")
+            backfill(model, fields)
+        
+        print("Successfully added blind indexes")
+        return True
+    
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("Starting migration: Add blind indexes")
+    success = run_migration()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
+        exit(1)
@@ -0,0 +1,43 @@
+"""
+Migration: Add idempotency_keys table
+
+This migration creates the table that Idempotency-Key headers on
+POST /job-tickets/submit, POST /job-tickets/ and POST /invoices/ are
+reserved in, together with the stored response that retries get back.
+Expired keys are purged by the application as new keys are reserved.
+
+Date: 2026-10-16
+Reason: Make retried submissions from flaky connections return the first response instead of creating duplicates
+"""
+
+import os
+import sys
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base, engine
+from models.idempotency_key import IdempotencyKey
+
+def run_migration():
+    """Create idempotency_keys"""
+    
+    try:
+        print("Creating idempotency_keys table...")
+        Base.metadata.create_all(bind=engine, tables=[IdempotencyKey.__table__])
+        
+        print("Successfully created idempotency_keys")
+        return True
+    
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("Starting migration: Add idempotency keys")
+    success = run_migration()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
+        exit(1)
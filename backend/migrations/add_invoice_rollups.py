@@ -0,0 +1,51 @@
+"""
+Migration: Add invoice_rollups table
+
+This migration creates the per-company, per-month, per-status invoice rollup
+table behind GET /invoices/summary and fills it from the existing invoices.
+Re-running it rebuilds the rollups from scratch.
+
+Date: 2026-10-16
+Reason: Serve financial summaries without decrypting every invoice
+"""
+
+import os
+import sys
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base, SessionLocal, engine
+from core.invoice_rollups import rebuild_invoice_rollups
+from models.invoice_rollup import InvoiceRollup
+
+def run_migration():
+    """Create and backfill invoice_rollups"""
+    
+    try:
+        print("Creating invoice_rollups table...")
+        Base.metadata.create_all(bind=engine, tables=[InvoiceRollup.__table__])
+        
+        print("Rebuilding rollups from existing invoices...")
+        db = SessionLocal()
+        try:
+            counted = rebuild_invoice_rollups(db)
+            db.commit()
+        finally:
+            db.close()
+        
+        print(f"Successfully rolled up {counted} invoices")
+        return True
+    
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("Starting migration: Add invoice rollups")
+    success = run_migration()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
+        exit(1)
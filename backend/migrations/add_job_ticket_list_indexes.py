@@ -0,0 +1,55 @@
+"""
+Migration: Add composite indexes for job ticket list pages
+
+This migration adds the (company_id, created_at, id) and
+(company_id, user_id, created_at, id) indexes that GET /job-tickets uses to
+read a company's or technician's tickets newest first with keyset cursors.
+On PostgreSQL the indexes are built CONCURRENTLY so the table stays writable.
+
+Date: 2026-10-16
+Reason: Keep list pages fast however deep a client pages
+"""
+
+import os
+import sys
+
+from sqlalchemy import text
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import engine
+
+INDEXES = {
+    "ix_job_tickets_company_created": "company_id, created_at, id",
+    "ix_job_tickets_company_user_created": "company_id, user_id, created_at, id",
+}
+
+def run_migration():
+    """Create the list indexes that do not exist yet"""
+    
+    try:
+        concurrently = "CONCURRENTLY " if engine.dialect.name == "postgresql" else ""
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for name, columns in INDEXES.items():
+                print(f"Creating index {name}...")
+                connection.execute(text(
+                    f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON job_tickets ({columns})"
+                ))
+        
+        print("Successfully created job ticket list indexes")
+        return True
+    
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("Starting migration: Add job ticket list indexes")
+    success = run_migration()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
+        exit(1)
@@ -0,0 +1,70 @@
+"""
+Migration: Add job ticket tombstones and the change feed index
+
+This migration creates the job_ticket_tombstones table that records deleted
+tickets for GET /job-tickets/changes, fills in updated_at on tickets that
+were never updated (it is now set on insert as well), and adds the
+(company_id, updated_at, id) index the feed reads changes through. On
+SQLite, timestamps written by the database are rewritten in the format the
+application writes, so the feed's watermark comparisons hold.
+
+Date: 2026-10-16
+Reason: Let offline clients sync only what changed since their last sync
+"""
+
+import os
+import sys
+
+from sqlalchemy import text
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import engine
+from models.job_ticket_tombstone import JobTicketTombstone
+
+def run_migration():
+    """Create the tombstone table, backfill updated_at and add the feed index"""
+    
+    try:
+        print("Creating job_ticket_tombstones table...")
+        JobTicketTombstone.__table__.create(bind=engine, checkfirst=True)
+        
+        with engine.begin() as connection:
+            print("Backfilling job_tickets.updated_at...")
+            result = connection.execute(text(
+                "UPDATE job_tickets SET updated_at = created_at WHERE updated_at IS NULL"
+            ))
+            print(f"Backfilled {result.rowcount} tickets")
+            
+            if engine.dialect.name == "sqlite":
+                # CURRENT_TIMESTAMP has no fractional seconds; bound values do
+                connection.execute(text(
+                    "UPDATE job_tickets SET updated_at = strftime('%Y-%m-%d %H:%M:%f000', updated_at) "
+                    "WHERE length(updated_at) = 19"
+                ))
+        
+        concurrently = "CONCURRENTLY " if engine.dialect.name == "postgresql" else ""
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            print("Creating index ix_job_tickets_company_updated...")
+            connection.execute(text(
+                f"CREATE INDEX {concurrently}IF NOT EXISTS ix_job_tickets_company_updated "
+                "ON job_tickets (company_id, updated_at, id)"
+            ))
+        
+        print("Successfully added job ticket sync support")
+        return True
+    
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("Starting migration: Add job ticket sync")
+    success = run_migration()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
+        exit(1)
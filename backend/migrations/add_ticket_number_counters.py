@@ -0,0 +1,43 @@
+"""
+Migration: Add ticket_number_counters table
+
+This migration creates the per-year counter table that ticket number blocks
+are reserved from. Counters start at zero; numbers already issued by the
+earlier random generator are skipped as blocks are reserved, so existing
+tickets need no changes.
+
+Date: 2026-10-16
+Reason: Allocate ticket numbers without probing job_tickets on every submission
+"""
+
+import os
+import sys
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Base, engine
+from models.ticket_number_counter import TicketNumberCounter
+
+def run_migration():
+    """Create ticket_number_counters"""
+    
+    try:
+        print("Creating ticket_number_counters table...")
+        Base.metadata.create_all(bind=engine, tables=[TicketNumberCounter.__table__])
+        
+        print("Successfully created ticket_number_counters")
+        return True
+    
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("Starting migration: Add ticket number counters")
+    success = run_migration()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
+        exit(1)
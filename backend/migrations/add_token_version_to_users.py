@@ -0,0 +1,52 @@
+"""
+Migration: Add token_version field to users table
+
+This migration adds the token_version counter that access tokens embed as
+their "ver" claim. Bumping it invalidates every token issued before.
+
+Date: 2026-10-16
+Reason: Revoke access tokens on role, status and password changes without per-request user lookups
+"""
+
+import os
+import sys
+
+from sqlalchemy import inspect, text
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import engine
+
+def run_migration():
+    """Add token_version field to users table"""
+    
+    try:
+        columns = [column["name"] for column in inspect(engine).get_columns("users")]
+        
+        if "token_version" in columns:
+            print("token_version column already exists in users table")
+            return True
+        
+        print("Adding token_version column to users table...")
+        
+        with engine.begin() as connection:
+            connection.execute(text(
+                "ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"
+            ))
+        
+        print("Successfully added token_version column to users table")
+        return True
+        
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("Starting migration: Add token_version to users")
+    success = run_migration()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
+        exit(1)
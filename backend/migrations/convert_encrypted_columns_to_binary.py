@@ -0,0 +1,85 @@
+"""
+Migration: Store encrypted fields as binary
+
+This migration converts the encrypted columns of job_tickets and invoices
+from text to binary so they can hold the compact AES-GCM envelope format.
+Existing Fernet tokens are kept as their ASCII bytes and remain readable;
+they are rewritten as envelopes only when the field is next saved.
+
+SQLite columns are dynamically typed, so nothing is altered there; text
+values are read as bytes by the EncryptedBytes column type.
+
+Date: 2026-10-16
+Reason: Smaller rows and cheaper decryption for encrypted fields
+"""
+
+import os
+import sys
+
+from sqlalchemy import inspect, text
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import engine
+
+ENCRYPTED_COLUMNS = {
+    "job_tickets": ["location", "work_description"],
+    "invoices": [
+        "customer_name",
+        "subtotal",
+        "service_fee",
+        "tax",
+        "total_amount",
+        "line_items",
+        "job_ticket_ids",
+        "company_name",
+    ],
+}
+
+def run_migration():
+    """Convert encrypted columns to BYTEA"""
+    
+    try:
+        if engine.dialect.name != "postgresql":
+            print(f"{engine.dialect.name} columns are dynamically typed; nothing to convert")
+            return True
+        
+        inspector = inspect(engine)
+        
+        with engine.begin() as connection:
+            for table, columns in ENCRYPTED_COLUMNS.items():
+                types = {column["name"]: column["type"] for column in inspector.get_columns(table)}
+                
+                for column in columns:
+                    if column not in types:
+                        print(f"{table}.{column} does not exist, skipping")
+                        continue
+                    if types[column].python_type is bytes:
+                        print(f"{table}.{column} is already binary")
+                        continue
+                    
+                    print(f"Converting {table}.{column} to BYTEA...")
+                    connection.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT"
+                    ))
+                    connection.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} "
+                        f"TYPE BYTEA USING convert_to({column}, 'UTF8')"
+                    ))
+        
+        print("Successfully converted encrypted columns to binary")
+        return True
+    
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("Starting migration: Convert encrypted columns to binary")
+    success = run_migration()
+    if success:
+        print("Migration completed successfully!")
+    else:
+        print("Migration failed!")
+        exit(1)
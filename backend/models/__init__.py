@@ -5,6 +5,13 @@ from .invoice import Invoice
 from .audit_log import AuditLog
 from .invitation import TechnicianInvitation
 from .tech_invite import TechInvite
+from .refresh_token import RefreshToken
+from .reencryption_checkpoint import ReencryptionCheckpoint
+from .search_token import InvoiceSearchToken, JobTicketSearchToken
+from .invoice_rollup import InvoiceRollup
+from .ticket_number_counter import TicketNumberCounter
+from .job_ticket_tombstone import JobTicketTombstone
+from .idempotency_key import IdempotencyKey
 
 __all__ = [
     "User", "UserRole",
@@ -13,5 +20,12 @@ __all__ = [
     "Invoice",
     "AuditLog",
     "TechnicianInvitation",
-    "TechInvite"
+    "TechInvite",
+    "RefreshToken",
+    "ReencryptionCheckpoint",
+    "InvoiceSearchToken", "JobTicketSearchToken",
+    "InvoiceRollup",
+    "TicketNumberCounter",
+    "JobTicketTombstone",
+    "IdempotencyKey"
 ]
@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, UniqueConstraint, event
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, object_session
 import uuid
 from database import Base
+from core.auth_cache import invalidate_company_principals
 
 class Company(Base):
     """Company model for multi-tenancy support"""
@@ -48,3 +49,10 @@ class Company(Base):
     
     def __repr__(self):
         return f"<Company {self.name} ({self.company_id})>"
+
+
+@event.listens_for(Company, "after_update")
+@event.listens_for(Company, "after_delete")
+def _invalidate_company_principals(mapper, connection, target):
+    """Cached principals embed their company, so drop them when it changes"""
+    invalidate_company_principals(target.id, object_session(target))
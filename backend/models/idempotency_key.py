@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint, Index
+from database import Base
+from core.encryption import EncryptedBytes
+
+class IdempotencyKey(Base):
+    """
+    An Idempotency-Key seen on a create endpoint, and the response it produced
+    
+    Reserved (state "pending") before the request runs and completed in the
+    same transaction as the rows the request creates; see core/idempotency.py.
+    """
+    __tablename__ = "idempotency_keys"
+    
+    id = Column(Integer, primary_key=True)
+    scope = Column(String(100), nullable=False)  # Endpoint and caller the key belongs to
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of the request body
+    state = Column(String(20), nullable=False, default="pending")  # pending or completed
+    owner = Column(String(32), nullable=False)  # Random token of the request holding the reservation
+    
+    # Stored response, encrypted like the fields it contains
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(EncryptedBytes, nullable=True)
+    
+    # Rewritten by the re-encryption job along with the fields themselves
+    __encrypted_attributes__ = ("response_body",)
+    
+    locked_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    
+    __table_args__ = (
+        UniqueConstraint('scope', 'key', name='uq_idempotency_keys_scope_key'),
+        Index('ix_idempotency_keys_expires', 'expires_at'),
+    )
+    
+    def __repr__(self):
+        return f"<IdempotencyKey {self.scope} {self.key} {self.state}>"
@@ -1,10 +1,12 @@
 from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Text, JSON
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 import enum
 import json
 from database import Base
-from core.encryption import encrypt_field, decrypt_field
+from core.encryption import EncryptedBytes, decrypt_cached, encrypt_cached, memoize_decryption
+from core.blind_index import maintain_search_tokens, set_blind_index
+from models.search_token import InvoiceSearchToken
 
 class InvoiceStatus(str, enum.Enum):
     """Invoice status enum"""
@@ -13,6 +15,7 @@ class InvoiceStatus(str, enum.Enum):
     PAID = "paid"
     CANCELLED = "cancelled"
 
+@memoize_decryption
 class Invoice(Base):
     """Invoice model with field-level encryption for sensitive data"""
     __tablename__ = "invoices"
@@ -25,20 +28,25 @@ class Invoice(Base):
     invoice_date = Column(DateTime(timezone=True), nullable=False)
     
     # Customer information (encrypted)
-    _encrypted_customer_name = Column("customer_name", String, nullable=False)
+    _encrypted_customer_name = Column("customer_name", EncryptedBytes, nullable=False)
     
     # Financial data (encrypted)
-    _encrypted_subtotal = Column("subtotal", String, nullable=False)
-    _encrypted_service_fee = Column("service_fee", String, nullable=False, default="0.0")
-    _encrypted_tax = Column("tax", String, nullable=False, default="0.0")
-    _encrypted_total_amount = Column("total_amount", String, nullable=False)
+    _encrypted_subtotal = Column("subtotal", EncryptedBytes, nullable=False)
+    _encrypted_service_fee = Column("service_fee", EncryptedBytes, nullable=False, default="0.0")
+    _encrypted_tax = Column("tax", EncryptedBytes, nullable=False, default="0.0")
+    _encrypted_total_amount = Column("total_amount", EncryptedBytes, nullable=False)
     
     # Line items and job tickets (encrypted JSON)
-    _encrypted_line_items = Column("line_items", Text)  # Encrypted JSON string of line items
-    _encrypted_job_ticket_ids = Column("job_ticket_ids", String)  # Encrypted JSON array of job ticket IDs
+    _encrypted_line_items = Column("line_items", EncryptedBytes)  # Encrypted JSON string of line items
+    _encrypted_job_ticket_ids = Column("job_ticket_ids", EncryptedBytes)  # Encrypted JSON array of job ticket IDs
     
     # Company information (encrypted)
-    _encrypted_company_name = Column("company_name", String, nullable=False)
+    _encrypted_company_name = Column("company_name", EncryptedBytes, nullable=False)
+    
+    # Blind indexes for searching the encrypted names (see core/blind_index.py)
+    customer_name_bidx = Column(String(32), index=True)
+    customer_name_tokens = deferred(Column(Text))
+    company_name_bidx = Column(String(32), index=True)
     
     # Regular fields
     status = Column(String, default=InvoiceStatus.DRAFT.value, nullable=False)
@@ -55,14 +63,15 @@ class Invoice(Base):
         """Decrypt the customer_name field when accessed"""
         if self._encrypted_customer_name is None:
             return None
-        return decrypt_field(self._encrypted_customer_name)
+        return decrypt_cached(self, "_encrypted_customer_name")
     
     @customer_name.setter
     def customer_name(self, value):
         """Encrypt the customer_name field when set"""
         if value is None:
             raise ValueError("Customer name cannot be None")
-        self._encrypted_customer_name = encrypt_field(str(value))
+        encrypt_cached(self, "_encrypted_customer_name", str(value))
+        set_blind_index(self, "customer_name", str(value))
     
     # Property for company_name field
     @property
@@ -70,14 +79,15 @@ class Invoice(Base):
         """Decrypt the company_name field when accessed"""
         if self._encrypted_company_name is None:
             return None
-        return decrypt_field(self._encrypted_company_name)
+        return decrypt_cached(self, "_encrypted_company_name")
     
     @company_name.setter
     def company_name(self, value):
         """Encrypt the company_name field when set"""
         if value is None:
             raise ValueError("Company name cannot be None")
-        self._encrypted_company_name = encrypt_field(str(value))
+        encrypt_cached(self, "_encrypted_company_name", str(value))
+        set_blind_index(self, "company_name", str(value))
     
     # Property for subtotal field
     @property
@@ -85,14 +95,14 @@ class Invoice(Base):
         """Decrypt the subtotal field when accessed"""
         if self._encrypted_subtotal is None:
             return None
-        return float(decrypt_field(self._encrypted_subtotal))
+        return float(decrypt_cached(self, "_encrypted_subtotal"))
     
     @subtotal.setter
     def subtotal(self, value):
         """Encrypt the subtotal field when set"""
         if value is None:
             raise ValueError("Subtotal cannot be None")
-        self._encrypted_subtotal = encrypt_field(str(value))
+        encrypt_cached(self, "_encrypted_subtotal", str(value))
     
     # Property for service_fee field
     @property
@@ -100,12 +110,12 @@ class Invoice(Base):
         """Decrypt the service_fee field when accessed"""
         if self._encrypted_service_fee is None:
             return 0.0
-        return float(decrypt_field(self._encrypted_service_fee))
+        return float(decrypt_cached(self, "_encrypted_service_fee"))
     
     @service_fee.setter
     def service_fee(self, value):
         """Encrypt the service_fee field when set"""
-        self._encrypted_service_fee = encrypt_field(str(value or 0.0))
+        encrypt_cached(self, "_encrypted_service_fee", str(value or 0.0))
     
     # Property for tax field
     @property
@@ -113,12 +123,12 @@ class Invoice(Base):
         """Decrypt the tax field when accessed"""
         if self._encrypted_tax is None:
             return 0.0
-        return float(decrypt_field(self._encrypted_tax))
+        return float(decrypt_cached(self, "_encrypted_tax"))
     
     @tax.setter
     def tax(self, value):
         """Encrypt the tax field when set"""
-        self._encrypted_tax = encrypt_field(str(value or 0.0))
+        encrypt_cached(self, "_encrypted_tax", str(value or 0.0))
     
     # Property for total_amount field
     @property
@@ -126,14 +136,14 @@ class Invoice(Base):
         """Decrypt the total_amount field when accessed"""
         if self._encrypted_total_amount is None:
             return None
-        return float(decrypt_field(self._encrypted_total_amount))
+        return float(decrypt_cached(self, "_encrypted_total_amount"))
     
     @total_amount.setter
     def total_amount(self, value):
         """Encrypt the total_amount field when set"""
         if value is None:
             raise ValueError("Total amount cannot be None")
-        self._encrypted_total_amount = encrypt_field(str(value))
+        encrypt_cached(self, "_encrypted_total_amount", str(value))
     
     # Property for line_items field
     @property
@@ -141,7 +151,7 @@ class Invoice(Base):
         """Decrypt the line_items field when accessed"""
         if self._encrypted_line_items is None:
             return []
-        return json.loads(decrypt_field(self._encrypted_line_items))
+        return json.loads(decrypt_cached(self, "_encrypted_line_items"))
     
     @line_items.setter
     def line_items(self, value):
@@ -149,7 +159,7 @@ class Invoice(Base):
         if value is None:
             self._encrypted_line_items = None
         else:
-            self._encrypted_line_items = encrypt_field(json.dumps(value))
+            encrypt_cached(self, "_encrypted_line_items", json.dumps(value))
     
     # Property for job_ticket_ids field
     @property
@@ -157,7 +167,7 @@ class Invoice(Base):
         """Decrypt the job_ticket_ids field when accessed"""
         if self._encrypted_job_ticket_ids is None:
             return []
-        return json.loads(decrypt_field(self._encrypted_job_ticket_ids))
+        return json.loads(decrypt_cached(self, "_encrypted_job_ticket_ids"))
     
     @job_ticket_ids.setter
     def job_ticket_ids(self, value):
@@ -165,7 +175,9 @@ class Invoice(Base):
         if value is None:
             self._encrypted_job_ticket_ids = None
         else:
-            self._encrypted_job_ticket_ids = encrypt_field(json.dumps(value))
+            encrypt_cached(self, "_encrypted_job_ticket_ids", json.dumps(value))
     
     def __repr__(self):
         return f"<Invoice {self.invoice_number}>"
+
+maintain_search_tokens(Invoice, InvoiceSearchToken, "customer_name")
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from database import Base
+
+class InvoiceRollup(Base):
+    """
+    Invoice counts and amount sums per company, invoice month and status
+    
+    Maintained in the same transaction as every invoice write, so financial
+    summaries never need to decrypt invoices. Amounts are stored in cents.
+    """
+    __tablename__ = "invoice_rollups"
+    
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(String(7), primary_key=True)  # YYYY-MM of invoice_date
+    status = Column(String(20), primary_key=True)
+    
+    invoice_count = Column(Integer, nullable=False, default=0)
+    subtotal_cents = Column(BigInteger, nullable=False, default=0)
+    service_fee_cents = Column(BigInteger, nullable=False, default=0)
+    tax_cents = Column(BigInteger, nullable=False, default=0)
+    total_amount_cents = Column(BigInteger, nullable=False, default=0)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<InvoiceRollup company={self.company_id} {self.month} {self.status} count={self.invoice_count}>"
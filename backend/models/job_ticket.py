@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Index, Text, UniqueConstraint
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 import enum
+from datetime import datetime, timezone
 from database import Base
-from core.encryption import encrypt_field, decrypt_field
+from core.encryption import EncryptedBytes, decrypt_cached, encrypt_cached, memoize_decryption
+from core.blind_index import maintain_search_tokens, set_blind_index
+from models.search_token import JobTicketSearchToken
 
 class JobTicketStatus(str, enum.Enum):
     """Job ticket status enum"""
@@ -11,6 +14,7 @@ class JobTicketStatus(str, enum.Enum):
     SUBMITTED = "submitted"
     COMPLETE = "complete"
 
+@memoize_decryption
 class JobTicket(Base):
     """Job ticket model with field-level encryption for sensitive data and multi-tenancy support"""
     __tablename__ = "job_tickets"
@@ -23,12 +27,23 @@ class JobTicket(Base):
     company_name = Column(String, nullable=False)  # Customer company name
     customer_name = Column(String)
     
-    # Add a unique constraint to ensure ticket_number is unique
-    __table_args__ = (UniqueConstraint('ticket_number', name='uix_ticket_number'),)
+    # Add a unique constraint to ensure ticket_number is unique; the other
+    # indexes serve the newest-first list pages of a company or technician
+    # and the change feed
+    __table_args__ = (
+        UniqueConstraint('ticket_number', name='uix_ticket_number'),
+        Index('ix_job_tickets_company_created', 'company_id', 'created_at', 'id'),
+        Index('ix_job_tickets_company_user_created', 'company_id', 'user_id', 'created_at', 'id'),
+        Index('ix_job_tickets_company_updated', 'company_id', 'updated_at', 'id'),
+    )
     
     # Encrypted fields
-    _encrypted_location = Column("location", String)
-    _encrypted_work_description = Column("work_description", String)
+    _encrypted_location = Column("location", EncryptedBytes)
+    _encrypted_work_description = Column("work_description", EncryptedBytes)
+    
+    # Blind indexes for searching the encrypted location (see core/blind_index.py)
+    location_bidx = Column(String(32), index=True)
+    location_tokens = deferred(Column(Text))
     
     # Regular fields
     work_type = Column(String)
@@ -44,7 +59,10 @@ class JobTicket(Base):
     submitted_by = Column(String)
     status = Column(String, default=JobTicketStatus.DRAFT, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set on insert too and stamped by the application, so the change feed's
+    # watermarks compare like with like on every database
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc),
+                        onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationships
     company = relationship("Company", back_populates="job_tickets")
@@ -56,7 +74,7 @@ class JobTicket(Base):
         """Decrypt the location field when accessed"""
         if self._encrypted_location is None:
             return None
-        return decrypt_field(self._encrypted_location)
+        return decrypt_cached(self, "_encrypted_location")
     
     @location.setter
     def location(self, value):
@@ -64,7 +82,8 @@ class JobTicket(Base):
         if value is None:
             self._encrypted_location = None
         else:
-            self._encrypted_location = encrypt_field(value)
+            encrypt_cached(self, "_encrypted_location", value)
+        set_blind_index(self, "location", value)
     
     # Property for work_description field
     @property
@@ -72,7 +91,7 @@ class JobTicket(Base):
         """Decrypt the work_description field when accessed"""
         if self._encrypted_work_description is None:
             return None
-        return decrypt_field(self._encrypted_work_description)
+        return decrypt_cached(self, "_encrypted_work_description")
     
     @work_description.setter
     def work_description(self, value):
@@ -80,7 +99,9 @@ class JobTicket(Base):
         if value is None:
             self._encrypted_work_description = None
         else:
-            self._encrypted_work_description = encrypt_field(value)
+            encrypt_cached(self, "_encrypted_work_description", value)
     
     def __repr__(self):
         return f"<JobTicket {self.id}>"
+
+maintain_search_tokens(JobTicket, JobTicketSearchToken, "location")
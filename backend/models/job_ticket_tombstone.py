@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from database import Base
+
+class JobTicketTombstone(Base):
+    """
+    Record of a deleted job ticket, so sync clients can drop their copy
+    
+    Written in the same transaction as the delete and served by
+    GET /job-tickets/changes. Kept for APP_SYNC_TOMBSTONE_RETENTION_DAYS.
+    """
+    __tablename__ = "job_ticket_tombstones"
+    
+    id = Column(Integer, primary_key=True)
+    
+    # The deleted ticket; not a foreign key since the row is gone
+    ticket_id = Column(Integer, nullable=False)
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), nullable=True)
+    user_id = Column(Integer, nullable=True)  # The ticket's technician, for technicians' feeds
+    deleted_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    
+    __table_args__ = (
+        Index('ix_job_ticket_tombstones_company_deleted', 'company_id', 'deleted_at', 'id'),
+        # Never reuse the id of a pruned tombstone; it orders the feed
+        {'sqlite_autoincrement': True},
+    )
+    
+    def __repr__(self):
+        return f"<JobTicketTombstone ticket={self.ticket_id} deleted_at={self.deleted_at}>"
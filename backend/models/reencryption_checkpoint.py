@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+class ReencryptionCheckpoint(Base):
+    """Progress of the key rotation job through one encrypted table"""
+    __tablename__ = "reencryption_checkpoints"
+    
+    table_name = Column(String(64), primary_key=True)
+    
+    # Key id the table is being rewritten to; a different active key restarts the pass
+    key_id = Column(Integer, nullable=False)
+    
+    # Highest primary key already processed
+    last_id = Column(Integer, nullable=False, default=0)
+    
+    rows_scanned = Column(Integer, nullable=False, default=0)
+    rows_rewritten = Column(Integer, nullable=False, default=0)
+    
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    def __repr__(self):
+        return f"<ReencryptionCheckpoint {self.table_name} key={self.key_id} last_id={self.last_id}>"
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+from database import Base
+
+class RefreshToken(Base):
+    """Issued refresh tokens, used for rotation and revocation"""
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # JWT ID of the refresh token (the token itself is never stored)
+    jti = Column(String(64), unique=True, index=True, nullable=False)
+    
+    # Every token rotated from the same login shares a family id
+    family_id = Column(String(64), index=True, nullable=False)
+    
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    
+    # Lifecycle
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)
+    replaced_by = Column(String(64), nullable=True)  # jti of the rotated successor
+    
+    # Relationships
+    user = relationship("User")
+    
+    @property
+    def is_expired(self) -> bool:
+        """Check if the refresh token has expired"""
+        # Postgres returns aware datetimes for timezone=True columns, SQLite naive ones
+        now = datetime.now(timezone.utc) if self.expires_at.tzinfo else datetime.utcnow()
+        return now > self.expires_at
+    
+    @property
+    def is_revoked(self) -> bool:
+        """Check if the refresh token was rotated or revoked"""
+        return self.revoked_at is not None
+    
+    def revoke(self, replaced_by: str = None):
+        """Revoke the token, optionally recording its rotated successor"""
+        self.revoked_at = datetime.utcnow()
+        self.replaced_by = replaced_by
+    
+    def __repr__(self):
+        return f"<RefreshToken {self.jti[:8]} user={self.user_id}>"
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from database import Base
+
+class InvoiceSearchToken(Base):
+    """Blind index of one word of a searchable encrypted invoice field"""
+    __tablename__ = "invoice_search_tokens"
+    
+    # Primary key order serves lookups by field and word
+    field = Column(String(32), primary_key=True)
+    token = Column(String(16), primary_key=True)
+    owner_id = Column(Integer, ForeignKey("invoices.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+class JobTicketSearchToken(Base):
+    """Blind index of one word of a searchable encrypted job ticket field"""
+    __tablename__ = "job_ticket_search_tokens"
+    
+    # Primary key order serves lookups by field and word
+    field = Column(String(32), primary_key=True)
+    token = Column(String(16), primary_key=True)
+    owner_id = Column(Integer, ForeignKey("job_tickets.id", ondelete="CASCADE"), primary_key=True, index=True)
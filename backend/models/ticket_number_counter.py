@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+class TicketNumberCounter(Base):
+    """
+    Next unreserved ticket number sequence value for one year
+    
+    Workers reserve blocks of sequence values by advancing next_value and
+    hand them out from memory; see utils/ticket_number.py.
+    """
+    __tablename__ = "ticket_number_counters"
+    
+    year = Column(Integer, primary_key=True)  # Two-digit year, the YY of YYXXXXXX
+    next_value = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<TicketNumberCounter {self.year:02d} next={self.next_value}>"
@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Text, ForeignKey, Boolean, event, inspect
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, object_session
 import enum
 from database import Base
+from core.auth_cache import invalidate_principal
+from core.token_versions import stage_token_version
 
 class UserRole(str, enum.Enum):
     """User role enum"""
@@ -29,6 +31,9 @@ class User(Base):
     force_password_reset = Column(Boolean, default=False, nullable=False)
     last_login = Column(DateTime(timezone=True), nullable=True)
     
+    # Embedded in access tokens as "ver"; bumping it revokes every token issued before
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
+    
     # Audit fields
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -38,5 +43,57 @@ class User(Base):
     audit_logs = relationship("AuditLog", back_populates="user")
     invoices = relationship("Invoice", back_populates="user")
     
+    def revoke_tokens(self):
+        """Invalidate every access token issued to this user so far"""
+        self.token_version = (self.token_version or 0) + 1
+    
     def __repr__(self):
         return f"<User {self.email} ({self.role})>"
+
+
+# Columns whose changes do not affect the cached principal
+_PRINCIPAL_IGNORED_ATTRS = {"last_login", "updated_at"}
+
+# Columns whose changes revoke the user's outstanding access tokens
+_TOKEN_REVOKING_ATTRS = ("role", "is_active", "company_id")
+
+@event.listens_for(User, "before_update")
+def _revoke_tokens_on_claim_change(mapper, connection, target):
+    """Bump token_version when a value carried in access token claims changes"""
+    state = inspect(target)
+    if state.attrs.token_version.history.has_changes():
+        return
+    if any(state.attrs[key].history.has_changes() for key in _TOKEN_REVOKING_ATTRS):
+        target.revoke_tokens()
+
+@event.listens_for(User, "after_update")
+def _stage_token_version(mapper, connection, target):
+    """Publish a token_version bump to the revocation table on commit"""
+    if inspect(target).attrs.token_version.history.has_changes():
+        session = object_session(target)
+        if session is not None:
+            stage_token_version(session, target.id, target.token_version)
+
+@event.listens_for(User, "after_update")
+def _invalidate_principal_on_update(mapper, connection, target):
+    """Drop the cached principal when anything but bookkeeping columns changes"""
+    state = inspect(target)
+    for attr in mapper.column_attrs:
+        if attr.key not in _PRINCIPAL_IGNORED_ATTRS and state.attrs[attr.key].history.has_changes():
+            invalidate_principal(target.id, object_session(target))
+            return
+
+@event.listens_for(User, "after_insert")
+def _reset_token_version_on_insert(mapper, connection, target):
+    """Clear a revocation entry left by a deleted user whose id was reused"""
+    session = object_session(target)
+    if session is not None:
+        stage_token_version(session, target.id, 0)
+
+@event.listens_for(User, "after_delete")
+def _invalidate_principal_on_delete(mapper, connection, target):
+    """Drop the cached principal and revoke every token of a deleted user"""
+    session = object_session(target)
+    invalidate_principal(target.id, session)
+    if session is not None:
+        stage_token_version(session, target.id, None)
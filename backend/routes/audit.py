@@ -12,7 +12,9 @@ import io
 from datetime import datetime, timedelta
 
 from database import get_db
-from core.security import get_current_user, require_role
+from core.principal import Principal
+from core.security import get_current_principal, require_role
+from core.log import get_logger
 from models.user import User, UserRole
 from models.audit_log import AuditLog
 from schemas.audit import (
@@ -24,20 +26,18 @@ from schemas.audit import (
 
 router = APIRouter(prefix="/audit", tags=["audit"])
 
+log = get_logger(__name__)
+
 @router.post("/log", response_model=dict)
 async def log_audit_event(
     audit_data: AuditLogCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Log an audit event
     """
     try:
-        # Debug logging
-        print(f"Audit log attempt - User ID: {current_user.id}, Company ID: {current_user.company_id}")
-        print(f"Audit data: {audit_data.dict()}")
-        
         # Create audit log entry with explicit field mapping
         audit_log = AuditLog(
             user_id=current_user.id,
@@ -53,20 +53,19 @@ async def log_audit_event(
             timestamp=datetime.utcnow()
         )
         
-        print(f"Created audit log object: {audit_log.__dict__}")
-        
         db.add(audit_log)
         db.commit()
         
-        print("Audit log committed successfully")
+        log.debug(
+            "audit.log", sample="audit",
+            user_id=current_user.id, company_id=current_user.company_id,
+            action=audit_data.action, category=audit_data.category
+        )
         return {"success": True, "message": "Audit event logged successfully"}
         
     except Exception as e:
         db.rollback()
-        print(f"Audit logging error: {str(e)}")
-        print(f"Error type: {type(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        log.error("audit.log.failed", exc_info=True, user_id=current_user.id, error_type=type(e).__name__)
         raise HTTPException(status_code=500, detail=f"Failed to log audit event: {str(e)}")
 
 @router.get("/logs", response_model=AuditLogListResponse)
@@ -82,7 +81,7 @@ async def get_audit_logs(
     sort_by: str = Query("timestamp", description="Sort field"),
     sort_order: str = Query("desc", description="Sort order (asc/desc)"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
 ):
     """
     Get audit logs with filtering and pagination
@@ -205,7 +204,7 @@ async def export_audit_logs(
     sort_by: str = Query("timestamp", description="Sort field"),
     sort_order: str = Query("desc", description="Sort order (asc/desc)"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
 ):
     """
     Export audit logs to CSV format
@@ -326,7 +325,7 @@ async def export_audit_logs(
 async def get_audit_stats(
     timeframe: str = Query("30d", description="Timeframe for stats (7d, 30d, 90d)"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
 ):
     """
     Get audit log statistics for dashboard
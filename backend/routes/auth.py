@@ -1,20 +1,23 @@
 from datetime import timedelta
 import os
 import shutil
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from typing import Optional
 
 from database import get_db
 from models.user import User
-from schemas.user import UserCreate, UserResponse, Token, UserWithCompanyResponse
+from schemas.user import UserCreate, UserResponse, Token, UserWithCompanyResponse, RefreshTokenRequest
 from core.security import (
-    verify_password, get_password_hash, create_user_token, 
-    get_current_user, require_role
+    verify_password_async, verify_and_update_password_async, get_password_hash_async, create_user_token, 
+    get_current_user, require_role, create_refresh_token, rotate_refresh_token,
+    revoke_refresh_token, revoke_user_refresh_tokens
 )
 from models.user import UserRole
+from core.principal import Principal
 from core.config import settings
+from core.login_throttle import login_throttle
 
 router = APIRouter(
     prefix="/auth",
@@ -52,7 +55,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         email=user_data.email,
         hashed_password=hashed_password,
@@ -81,13 +84,21 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     )
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """Login and get access token with multi-tenancy support"""
+    # Reject throttled emails and IPs before any password hashing happens
+    client_ip = request.client.host if request.client else None
+    login_throttle.check(form_data.username, client_ip)
+    
     # Find user by email
     user = db.query(User).filter(User.email == form_data.username).first()
     
     # Validate user exists and password is correct
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    password_ok, upgraded_hash = False, None
+    if user:
+        password_ok, upgraded_hash = await verify_and_update_password_async(form_data.password, user.hashed_password)
+    
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -101,18 +112,45 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
             detail="User account is deactivated"
         )
     
-    # Create access token with multi-tenancy claims
+    login_throttle.record_success(form_data.username, client_ip)
+    
+    # Transparently rehash passwords stored at an outdated bcrypt cost
+    if upgraded_hash:
+        user.hashed_password = upgraded_hash
+    
+    # Create access token with multi-tenancy claims and start a refresh token family
     access_token = create_user_token(user)
+    refresh_token = create_refresh_token(db, user)
+    db.commit()
     
     return {
         "access_token": access_token,
+        "refresh_token": refresh_token,
         "token_type": "bearer"
     }
 
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for a new access token and a rotated refresh token"""
+    user, refresh_token = rotate_refresh_token(db, request.refresh_token)
+    
+    return {
+        "access_token": create_user_token(user),
+        "refresh_token": refresh_token,
+        "token_type": "bearer"
+    }
+
+@router.post("/logout")
+async def logout(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """Revoke the refresh token family of the current session"""
+    revoke_refresh_token(db, request.refresh_token)
+    
+    return {"message": "Logged out successfully"}
+
 @router.post("/upload-logo")
 async def upload_company_logo(
     file: UploadFile = File(...),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN])),
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN])),
     db: Session = Depends(get_db)
 ):
     """Upload company logo for manager users"""
@@ -197,7 +235,7 @@ async def change_password(
 ):
     """Change user password"""
     # Verify current password
-    if not verify_password(current_password, current_user.hashed_password):
+    if not await verify_password_async(current_password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
@@ -211,8 +249,12 @@ async def change_password(
         )
     
     # Update password
-    current_user.hashed_password = get_password_hash(new_password)
+    current_user.hashed_password = await get_password_hash_async(new_password)
     current_user.force_password_reset = False  # Clear force reset flag
+    
+    # Sign out other sessions
+    current_user.revoke_tokens()
+    revoke_user_refresh_tokens(db, current_user.id)
     db.commit()
     
     return {"message": "Password changed successfully"}
@@ -8,6 +8,7 @@ from database import get_db
 from models import Company, User
 from models.user import UserRole
 from schemas.company import CompanyCreate, CompanyUpdate, CompanyResponse, CompanyListResponse
+from core.principal import Principal
 from core.security import get_current_user, require_role
 
 router = APIRouter(prefix="/companies", tags=["companies"])
@@ -17,7 +18,7 @@ logger = logging.getLogger(__name__)
 async def create_company(
     company_data: CompanyCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.ADMIN]))
 ):
     """
     Create a new company (Admin only)
@@ -72,7 +73,7 @@ async def list_companies(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.ADMIN]))
 ):
     """
     List all companies (Admin only)
@@ -251,7 +252,7 @@ async def update_company(
 async def deactivate_company(
     company_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.ADMIN]))
 ):
     """
     Deactivate a company (soft delete, Admin only)
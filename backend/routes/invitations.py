@@ -14,7 +14,8 @@ from schemas.invitation import (
     InvitationResponse, InvitationListResponse, InvitationStatusResponse
 )
 from schemas.user import UserResponse
-from core.security import get_current_user, require_role, get_password_hash
+from core.principal import Principal
+from core.security import get_current_user, require_role, get_password_hash_async
 from core.email import send_invitation_email
 
 router = APIRouter(prefix="/invitations", tags=["invitations"])
@@ -24,7 +25,7 @@ logger = logging.getLogger(__name__)
 async def invite_technician_by_email(
     invitation_data: TechnicianInviteByEmail,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
 ):
     """
     Send an email invitation to a technician (Manager/Admin only)
@@ -66,11 +67,12 @@ async def invite_technician_by_email(
         
         # Send invitation email in background
         try:
+            inviter = current_user.load_user(db)
             email_sent = send_invitation_email(
                 to_email=invitation_data.email,
                 technician_name=invitation_data.name,
-                company_name=current_user.company.name,
-                inviter_name=current_user.name,
+                company_name=inviter.company.name,
+                inviter_name=inviter.name,
                 invitation_token=new_invitation.token,
                 invitation_message=invitation_data.message
             )
@@ -101,7 +103,7 @@ async def invite_technician_by_email(
 async def create_technician_directly(
     technician_data: TechnicianCreateDirect,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
 ):
     """
     Create a technician account directly without email invitation (Manager/Admin only)
@@ -124,7 +126,7 @@ async def create_technician_directly(
         
         logger.info("🔐 Hashing password...")
         # Create new technician user
-        hashed_password = get_password_hash(technician_data.temporary_password)
+        hashed_password = await get_password_hash_async(technician_data.temporary_password)
         
         logger.info("👤 Creating new user object...")
         new_user = User(
@@ -215,7 +217,7 @@ async def accept_invitation(
             )
         
         # Create new user account
-        hashed_password = get_password_hash(acceptance_data.password)
+        hashed_password = await get_password_hash_async(acceptance_data.password)
         
         # Use name from acceptance data if provided, otherwise from invitation
         user_name = acceptance_data.name if acceptance_data.name else invitation.name
@@ -311,7 +313,7 @@ async def list_company_invitations(
     limit: int = 100,
     include_used: bool = False,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
 ):
     """
     List invitations for the current user's company (Manager/Admin only)
@@ -346,7 +348,7 @@ async def list_company_invitations(
 async def cancel_invitation(
     invitation_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
 ):
     """
     Cancel a pending invitation (Manager/Admin only)
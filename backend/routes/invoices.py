@@ -1,30 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List
-import json
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
+from sqlalchemy.orm import Session, defer
+from typing import List, Optional
 from datetime import datetime
 
 from database import get_db
 from models.invoice import Invoice
-from schemas.invoice import InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoiceList
-from core.security import get_current_user
-from models.user import User
+from schemas.invoice import InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoiceList, InvoiceSummary
+from core.principal import Principal
+from core.security import get_current_principal, require_role
+from core.encryption import decrypt_rows
+from core.blind_index import exact_match, token_match
+from core.invoice_rollups import apply_invoice_rollup, invoice_rollup_entry, invoice_summary
+from core.idempotency import idempotency_store
+from models.user import UserRole
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
 
+# Large encrypted columns left out of the summary list view, at the SQL level
+SUMMARY_DEFERRED_COLUMNS = (Invoice._encrypted_line_items, Invoice._encrypted_job_ticket_ids)
+SUMMARY_OMITTED_FIELDS = ("line_items", "job_ticket_ids")
+
+def _summary_item(invoice: Invoice) -> dict:
+    """Response fields of an invoice loaded for the summary view"""
+    item = {
+        field: getattr(invoice, field)
+        for field in InvoiceResponse.model_fields
+        if field not in SUMMARY_OMITTED_FIELDS
+    }
+    item.update(dict.fromkeys(SUMMARY_OMITTED_FIELDS))
+    return item
+
 @router.post("/", response_model=InvoiceResponse)
 async def create_invoice(
     invoice_data: InvoiceCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Retries with the same key return the first response"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Create a new invoice"""
+    reservation = await idempotency_store.reserve(
+        db, idempotency_key, f"invoices.create:{current_user.id}", invoice_data
+    )
+    if reservation.replay is not None:
+        return reservation.replay
+    
     try:
-        # Convert line_items to JSON string for storage
-        line_items_json = json.dumps([item.model_dump() for item in invoice_data.line_items])
-        
-        # Convert job_ticket_ids to JSON string for storage
-        job_ticket_ids_json = json.dumps(invoice_data.job_ticket_ids)
+        # The model serializes line_items and job_ticket_ids to JSON itself
+        line_items = [item.model_dump() for item in invoice_data.line_items]
         
         # Create invoice instance
         invoice = Invoice(
@@ -37,14 +59,17 @@ async def create_invoice(
             service_fee=invoice_data.service_fee,
             tax=invoice_data.tax,
             total_amount=invoice_data.total_amount,
-            line_items=line_items_json,
-            job_ticket_ids=job_ticket_ids_json,
+            line_items=line_items,
+            job_ticket_ids=invoice_data.job_ticket_ids,
             status=invoice_data.status,
             created_by=invoice_data.created_by,
             created_at=datetime.utcnow()
         )
         
         db.add(invoice)
+        apply_invoice_rollup(db, current_user.company_id, None, invoice_rollup_entry(invoice))
+        db.flush()
+        reservation.complete(db, status.HTTP_200_OK, InvoiceResponse.model_validate(invoice))
         db.commit()
         db.refresh(invoice)
         
@@ -52,6 +77,9 @@ async def create_invoice(
         
     except Exception as e:
         db.rollback()
+        reservation.release(db)
+        if isinstance(e, HTTPException):
+            raise e
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to create invoice: {str(e)}"
@@ -61,19 +89,36 @@ async def create_invoice(
 async def get_invoices(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    customer: Optional[str] = Query(None, description="Customer name to search for"),
+    match: str = Query("words", pattern="^(words|exact)$", description="words: name contains every word; exact: whole name matches"),
+    view: str = Query("full", pattern="^(summary|full)$", description="summary leaves out line items and job ticket ids"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get all invoices for the current user's company"""
     try:
         # Get invoices for the current user (multi-tenancy)
         invoices_query = db.query(Invoice).filter(Invoice.user_id == current_user.id)
         
+        # Search the encrypted customer name through its blind indexes
+        if customer:
+            matcher = exact_match if match == "exact" else token_match
+            invoices_query = invoices_query.filter(matcher(Invoice, "customer_name", customer))
+        
+        # Summary view never selects (or decrypts) the large columns
+        if view == "summary":
+            invoices_query = invoices_query.options(
+                *(defer(column, raiseload=True) for column in SUMMARY_DEFERRED_COLUMNS)
+            )
+        
         # Get total count
         total = invoices_query.count()
         
         # Get paginated results
         invoices = invoices_query.offset(skip).limit(limit).all()
+        decrypt_rows(invoices)
+        if view == "summary":
+            invoices = [_summary_item(invoice) for invoice in invoices]
         
         return InvoiceList(
             invoices=invoices,
@@ -88,11 +133,29 @@ async def get_invoices(
             detail=f"Failed to fetch invoices: {str(e)}"
         )
 
+@router.get("/summary", response_model=InvoiceSummary)
+async def get_invoice_summary(
+    from_month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="First month (YYYY-MM)"),
+    to_month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$", description="Last month (YYYY-MM)"),
+    invoice_status: Optional[str] = Query(None, alias="status"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+):
+    """Get the company's invoice counts and totals by month and status (manager/admin only)"""
+    if not current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User is not associated with a company"
+        )
+    
+    # Served from the rollup table, so no invoice is decrypted
+    return invoice_summary(db, current_user.company_id, from_month, to_month, invoice_status)
+
 @router.get("/{invoice_id}", response_model=InvoiceResponse)
 async def get_invoice(
     invoice_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get a specific invoice by ID"""
     invoice = db.query(Invoice).filter(
@@ -113,7 +176,7 @@ async def update_invoice(
     invoice_id: int,
     invoice_data: InvoiceUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Update an existing invoice"""
     invoice = db.query(Invoice).filter(
@@ -129,21 +192,17 @@ async def update_invoice(
     
     try:
         # Update fields that are provided
+        # line_items arrive as dicts; the model serializes them and
+        # job_ticket_ids to JSON itself
         update_data = invoice_data.model_dump(exclude_unset=True)
         
-        # Handle line_items conversion to JSON if provided
-        if 'line_items' in update_data and update_data['line_items'] is not None:
-            update_data['line_items'] = json.dumps([item.model_dump() for item in update_data['line_items']])
-        
-        # Handle job_ticket_ids conversion to JSON if provided
-        if 'job_ticket_ids' in update_data and update_data['job_ticket_ids'] is not None:
-            update_data['job_ticket_ids'] = json.dumps(update_data['job_ticket_ids'])
-        
         # Update the invoice
+        before = invoice_rollup_entry(invoice)
         for field, value in update_data.items():
             setattr(invoice, field, value)
         
         invoice.updated_at = datetime.utcnow()
+        apply_invoice_rollup(db, current_user.company_id, before, invoice_rollup_entry(invoice))
         
         db.commit()
         db.refresh(invoice)
@@ -161,7 +220,7 @@ async def update_invoice(
 async def delete_invoice(
     invoice_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Delete an invoice"""
     invoice = db.query(Invoice).filter(
@@ -176,6 +235,7 @@ async def delete_invoice(
         )
     
     try:
+        apply_invoice_rollup(db, current_user.company_id, invoice_rollup_entry(invoice), None)
         db.delete(invoice)
         db.commit()
         
@@ -192,7 +252,7 @@ async def delete_invoice(
 async def check_duplicate_invoice_number(
     invoice_number: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Check if an invoice number already exists for the current user"""
     existing_invoice = db.query(Invoice).filter(
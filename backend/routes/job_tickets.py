@@ -1,5 +1,9 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from pydantic import ValidationError
@@ -7,21 +11,108 @@ from pydantic import ValidationError
 from database import get_db
 from models.user import User
 from models.job_ticket import JobTicket
-from schemas.job_ticket import JobTicketCreate, JobTicketUpdate, JobTicketResponse, JobTicketList, JobTicketSubmit
-from utils.jwt import get_current_user, get_manager_or_admin_user
-from utils.ticket_number import generate_ticket_number
+from models.job_ticket_tombstone import JobTicketTombstone
+from schemas.job_ticket import (
+    JobTicketCreate, JobTicketUpdate, JobTicketResponse, JobTicketList, JobTicketSubmit,
+    JobTicketBulkSubmit, JobTicketBulkResponse, JobTicketChanges, JobTicketAccepted
+)
+from core.principal import Principal
+from core.security import get_current_principal
+from utils.ticket_number import generate_ticket_number, ticket_number_allocator
+from core.config import settings
+from core.encryption import decrypt_columns
+from core.blind_index import exact_match, token_match
+from core.idempotency import Reservation, idempotency_store, payload_scope
+from core.ticket_writer import QueueFull, insert_tickets, ticket_write_queue
+from core.log import get_logger
+from utils.pagination import (
+    advance_position, after_cursor, after_position, decode_sync_cursor, encode_sync_cursor,
+    newest_first, page_cursor
+)
+
+log = get_logger(__name__)
 
 router = APIRouter(
     prefix="/job-tickets",
     tags=["Job Tickets"],
 )
 
-@router.post("/submit", response_model=JobTicketResponse, status_code=status.HTTP_201_CREATED)
+# Columns of the list response, selected as one projection together with the
+# submitter's name, so listing builds no JobTicket entities and lazy-loads nothing
+LIST_COLUMNS = (
+    JobTicket.id, JobTicket.user_id, JobTicket.company_id, JobTicket.job_number,
+    JobTicket.ticket_number, JobTicket.company_name, JobTicket.customer_name,
+    JobTicket._encrypted_location.label("location"),
+    JobTicket.work_type, JobTicket.equipment,
+    JobTicket.work_start_time, JobTicket.work_end_time, JobTicket.work_total_hours,
+    JobTicket.drive_start_time, JobTicket.drive_end_time, JobTicket.drive_total_hours,
+    JobTicket.travel_type, JobTicket.parts_used,
+    JobTicket._encrypted_work_description.label("work_description"),
+    JobTicket.submitted_by, User.name.label("submitted_by_name"),
+    JobTicket.status, JobTicket.created_at, JobTicket.updated_at,
+)
+
+# List columns holding ciphertext, decrypted in one batch per page
+ENCRYPTED_LIST_FIELDS = ("location", "work_description")
+
+# Large columns left out of the summary list view, at the SQL level
+SUMMARY_OMITTED_FIELDS = ("work_description", "parts_used")
+
+async def _queue_submission(ticket: JobTicket, reservation: Reservation):
+    """
+    Hand a validated, numbered ticket to the group-commit writer
+    
+    With APP_SUBMIT_DURABILITY=commit the response waits for the batch to
+    commit; with enqueue it is a 202 as soon as the ticket is queued.
+    """
+    # Set here rather than by the database, so the response can include them
+    ticket.created_at = ticket.updated_at = datetime.now(timezone.utc)
+    
+    if ticket_write_queue.durability == "enqueue":
+        accepted = JobTicketAccepted(ticket_number=ticket.ticket_number)
+        on_insert = lambda db, _: reservation.complete(db, status.HTTP_202_ACCEPTED, accepted)
+        on_failure = reservation.release
+    else:
+        accepted = None
+        on_insert = lambda db, written: reservation.complete(
+            db, status.HTTP_201_CREATED, JobTicketResponse.model_validate(written)
+        )
+        on_failure = None  # The request is still waiting and releases the key itself
+    
+    try:
+        written = ticket_write_queue.submit(ticket, on_insert=on_insert, on_failure=on_failure)
+    except QueueFull:
+        log.warning("job_tickets.submit.queue_full", ticket_number=ticket.ticket_number)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many submissions are waiting to be saved, please retry",
+            headers={"Retry-After": "1"}
+        )
+    
+    if accepted is not None:
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=accepted.model_dump(mode="json"))
+    await asyncio.wrap_future(written)
+    return ticket
+
+@router.post(
+    "/submit",
+    response_model=JobTicketResponse,
+    status_code=status.HTTP_201_CREATED,
+    responses={status.HTTP_202_ACCEPTED: {"model": JobTicketAccepted, "description": "Queued (APP_SUBMIT_DURABILITY=enqueue)"}}
+)
 async def submit_job_ticket(
     job_ticket: JobTicketSubmit,
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Retries with the same key return the first response"),
     db: Session = Depends(get_db)
 ):
     """Submit a job ticket without authentication (for technicians in the field)"""
+    # Unauthenticated, so keys are scoped by the request body rather than a caller
+    reservation = await idempotency_store.reserve(
+        db, idempotency_key, payload_scope("job_tickets.submit", job_ticket), job_ticket
+    )
+    if reservation.replay is not None:
+        return reservation.replay
+    
     try:
         # Validate required fields
         if not job_ticket.submitted_by:
@@ -49,8 +140,14 @@ async def submit_job_ticket(
         # Create the job ticket object
         db_job_ticket = JobTicket(**ticket_data)
         
-        # Save job ticket to database
+        # Leave the write to the group-commit writer when it is enabled
+        if ticket_write_queue.enabled and ticket_write_queue.running:
+            return await _queue_submission(db_job_ticket, reservation)
+        
+        # Save job ticket to database, with the response for retries
         db.add(db_job_ticket)
+        db.flush()
+        reservation.complete(db, status.HTTP_201_CREATED, JobTicketResponse.model_validate(db_job_ticket))
         db.commit()
         db.refresh(db_job_ticket)
         
@@ -59,6 +156,7 @@ async def submit_job_ticket(
     except Exception as e:
         # Roll back transaction in case of error
         db.rollback()
+        reservation.release(db)
         
         # Provide detailed error message
         if isinstance(e, HTTPException):
@@ -69,147 +167,187 @@ async def submit_job_ticket(
                 detail=f"Failed to submit job ticket: {str(e)}"
             )
 
+def _submitted_ticket_data(job_ticket: JobTicketSubmit) -> dict:
+    """Model fields of one ticket of a bulk submission; raises ValueError if it is incomplete"""
+    if not job_ticket.submitted_by:
+        raise ValueError("Customer signature (submitted by) is required")
+    if not job_ticket.description and not job_ticket.work_description:
+        raise ValueError("Work description is required")
+    
+    ticket_data = job_ticket.dict()
+    if not ticket_data.get("company_name"):
+        raise ValueError("Company name is required")
+    ticket_data["status"] = "submitted"
+    return ticket_data
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'ticket'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+@router.post("/bulk", response_model=JobTicketBulkResponse)
+async def bulk_submit_job_tickets(
+    payload: JobTicketBulkSubmit,
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Submit many job tickets at once (offline sync)
+    
+    Every ticket is validated first; the valid ones get their ticket numbers
+    from one allocation and are inserted as one batch in one transaction.
+    Each ticket's outcome is reported by its position in the request, and
+    invalid tickets do not stop the others.
+    """
+    if not current_user.company_id:
+        log.warning("job_tickets.bulk.no_company", user_id=current_user.id)
+        raise HTTPException(status_code=400, detail="User must be associated with a company")
+    
+    results: List[Optional[dict]] = [None] * len(payload.tickets)
+    valid = []
+    for index, item in enumerate(payload.tickets):
+        try:
+            valid.append((index, _submitted_ticket_data(JobTicketSubmit.model_validate(item))))
+        except ValidationError as e:
+            results[index] = {"index": index, "success": False, "error": _validation_message(e)}
+        except ValueError as e:
+            results[index] = {"index": index, "success": False, "error": str(e)}
+    
+    def build(ticket_data: dict, ticket_number: str) -> JobTicket:
+        return JobTicket(
+            **ticket_data, ticket_number=ticket_number,
+            user_id=current_user.id, company_id=current_user.company_id
+        )
+    
+    try:
+        # Allocated before any write, outside this request's transaction
+        ticket_numbers = ticket_number_allocator.allocate_many(db, len(valid)) if valid else []
+        created = [(index, build(data, number)) for (index, data), number in zip(valid, ticket_numbers)]
+        
+        try:
+            if created:
+                # One executemany INSERT for the whole batch
+                insert_tickets(db, [ticket for _, ticket in created])
+        except IntegrityError as e:
+            # Find the offending rows: retry one savepoint per ticket
+            log.warning("job_tickets.bulk.integrity_error", user_id=current_user.id, error=e.orig)
+            db.rollback()
+            isolated = []
+            for (index, data), number in zip(valid, ticket_numbers):
+                ticket = build(data, number)
+                try:
+                    with db.begin_nested():
+                        db.add(ticket)
+                except IntegrityError as item_error:
+                    results[index] = {
+                        "index": index, "success": False,
+                        "error": f"Database constraint violation: {item_error.orig}"
+                    }
+                    continue
+                isolated.append((index, ticket))
+            created = isolated
+        
+        # Read ids before commit expires the instances
+        for index, ticket in created:
+            results[index] = {
+                "index": index, "success": True, "id": ticket.id, "ticket_number": ticket.ticket_number
+            }
+        db.commit()
+    
+    except Exception as e:
+        log.error("job_tickets.bulk.failed", exc_info=True, user_id=current_user.id, error_type=type(e).__name__)
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to submit job tickets: {str(e)}"
+        )
+    
+    log.info(
+        "job_tickets.bulk.ok", sample="job_tickets",
+        user_id=current_user.id, received=len(results), created=len(created)
+    )
+    return {"created": len(created), "failed": len(results) - len(created), "results": results}
+
 @router.post("/", response_model=JobTicketResponse, status_code=status.HTTP_201_CREATED)
 async def create_job_ticket(
     job_ticket: JobTicketCreate,
-    current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Retries with the same key return the first response"),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a new job ticket"""
-    import traceback
-    from datetime import datetime
+    reservation = await idempotency_store.reserve(
+        db, idempotency_key, f"job_tickets.create:{current_user.id}", job_ticket
+    )
+    if reservation.replay is not None:
+        return reservation.replay
     
-    # COMPREHENSIVE LOGGING START
-    timestamp = datetime.now().isoformat()
-    print(f"\n{'='*80}")
-    print(f"🎫 CREATE JOB TICKET DEBUG - TIMESTAMP: {timestamp}")
-    print(f"{'='*80}")
+    ticket_data = job_ticket.dict()
+    log.debug(
+        "job_tickets.create.start", sample="job_tickets",
+        user_id=current_user.id, company_id=current_user.company_id,
+        role=current_user.role, fields=lambda: sorted(ticket_data)
+    )
     
     try:
-        # 1. LOG USER CONTEXT
-        print(f"👤 USER CONTEXT:")
-        print(f"   - Email: {current_user.email}")
-        print(f"   - ID: {current_user.id}")
-        print(f"   - Company ID: {current_user.company_id}")
-        print(f"   - Role: {getattr(current_user, 'role', 'Unknown')}")
-        print(f"   - First Name: {getattr(current_user, 'first_name', 'Unknown')}")
-        print(f"   - Last Name: {getattr(current_user, 'last_name', 'Unknown')}")
-        
-        # 2. LOG INCOMING REQUEST DATA
-        print(f"\n📦 INCOMING REQUEST DATA:")
-        ticket_data = job_ticket.dict()
-        for key, value in ticket_data.items():
-            print(f"   - {key}: {repr(value)} (type: {type(value).__name__})")
-        
-        # 3. VALIDATE USER COMPANY
+        # Validate user company
         if not current_user.company_id:
-            error_msg = f"User {current_user.email} has no company_id"
-            print(f"❌ VALIDATION ERROR: {error_msg}")
+            log.warning("job_tickets.create.no_company", user_id=current_user.id)
             raise HTTPException(status_code=400, detail="User must be associated with a company")
         
-        # 4. VALIDATE REQUIRED FIELDS
-        print(f"\n🔍 SCHEMA VALIDATION:")
+        # Validate required fields
         required_fields = ['company_name']  # Add other required fields as needed
-        missing_fields = []
-        
-        for field in required_fields:
-            if field not in ticket_data or not ticket_data[field]:
-                missing_fields.append(field)
-                print(f"   ❌ Missing required field: {field}")
-            else:
-                print(f"   ✅ Required field present: {field} = {repr(ticket_data[field])}")
+        missing_fields = [field for field in required_fields if not ticket_data.get(field)]
         
         if missing_fields:
             error_msg = f"Missing required fields: {missing_fields}"
-            print(f"❌ VALIDATION ERROR: {error_msg}")
+            log.info("job_tickets.create.missing_fields", user_id=current_user.id, missing=missing_fields)
             raise HTTPException(status_code=422, detail=error_msg)
         
-        # 5. GENERATE TICKET NUMBER IF NEEDED
+        # Generate ticket number if needed
         if ticket_data.get("status") == "submitted":
-            ticket_number = generate_ticket_number(db)
-            ticket_data["ticket_number"] = ticket_number
-            print(f"🎫 Generated ticket number: {ticket_number}")
-        else:
-            print(f"🎫 Status is '{ticket_data.get('status')}', not generating ticket number yet")
+            ticket_data["ticket_number"] = generate_ticket_number(db)
         
-        # 6. PREPARE FINAL DATA FOR DATABASE
-        print(f"\n🗄️ PREPARING DATABASE OBJECT:")
-        final_data = {
+        db_job_ticket = JobTicket(**{
             **ticket_data,
             "user_id": current_user.id,
             "company_id": current_user.company_id
-        }
-        
-        print(f"   Final data keys: {list(final_data.keys())}")
-        for key, value in final_data.items():
-            print(f"   - {key}: {repr(value)} (type: {type(value).__name__})")
-        
-        # 7. CREATE DATABASE OBJECT
-        print(f"\n💾 CREATING JOBTICKET OBJECT:")
-        db_job_ticket = JobTicket(**final_data)
-        print(f"   ✅ JobTicket object created successfully")
-        
-        # 8. DATABASE OPERATIONS
-        print(f"\n🗄️ DATABASE OPERATIONS:")
-        print(f"   Adding to session...")
+        })
         db.add(db_job_ticket)
-        print(f"   ✅ Added to database session")
-        
-        print(f"   Committing transaction...")
+        db.flush()
+        reservation.complete(db, status.HTTP_201_CREATED, JobTicketResponse.model_validate(db_job_ticket))
         db.commit()
-        print(f"   ✅ Database commit successful")
-        
-        print(f"   Refreshing object...")
         db.refresh(db_job_ticket)
-        print(f"   ✅ Database refresh successful")
-        
-        # 9. LOG FINAL RESULT
-        print(f"\n🎉 SUCCESS:")
-        print(f"   - Job Ticket ID: {db_job_ticket.id}")
-        print(f"   - Ticket Number: {getattr(db_job_ticket, 'ticket_number', 'None')}")
-        print(f"   - Company Name: {getattr(db_job_ticket, 'company_name', 'None')}")
-        print(f"   - Status: {getattr(db_job_ticket, 'status', 'None')}")
-        print(f"   - Created At: {getattr(db_job_ticket, 'created_at', 'None')}")
-        
-        print(f"{'='*80}")
-        print(f"🎫 CREATE JOB TICKET SUCCESS - TIMESTAMP: {datetime.now().isoformat()}")
-        print(f"{'='*80}\n")
         
+        log.info(
+            "job_tickets.create.ok", sample="job_tickets",
+            ticket_id=db_job_ticket.id, ticket_number=db_job_ticket.ticket_number,
+            status=db_job_ticket.status, user_id=current_user.id
+        )
         return db_job_ticket
         
     except ValidationError as e:
-        print(f"\n❌ PYDANTIC VALIDATION ERROR:")
-        print(f"   Error: {e}")
-        print(f"   Error details: {e.errors()}")
-        print(f"   Full traceback: {traceback.format_exc()}")
-        print(f"{'='*80}\n")
+        log.warning("job_tickets.create.validation_error", user_id=current_user.id, errors=e.errors())
         db.rollback()
+        reservation.release(db)
         raise HTTPException(status_code=422, detail=f"Validation error: {e}")
         
     except IntegrityError as e:
-        print(f"\n❌ DATABASE INTEGRITY ERROR:")
-        print(f"   Error: {e}")
-        print(f"   Full traceback: {traceback.format_exc()}")
-        print(f"{'='*80}\n")
+        log.warning("job_tickets.create.integrity_error", user_id=current_user.id, error=e.orig)
         db.rollback()
+        reservation.release(db)
         raise HTTPException(status_code=400, detail=f"Database constraint violation: {str(e)}")
         
     except HTTPException as e:
-        print(f"\n❌ HTTP EXCEPTION:")
-        print(f"   Status Code: {e.status_code}")
-        print(f"   Detail: {e.detail}")
-        print(f"   Full traceback: {traceback.format_exc()}")
-        print(f"{'='*80}\n")
         db.rollback()
+        reservation.release(db)
         raise e
         
     except Exception as e:
-        print(f"\n❌ UNEXPECTED ERROR:")
-        print(f"   Error Type: {type(e).__name__}")
-        print(f"   Error Message: {str(e)}")
-        print(f"   Full traceback: {traceback.format_exc()}")
-        print(f"{'='*80}\n")
+        log.error("job_tickets.create.failed", exc_info=True, user_id=current_user.id, error_type=type(e).__name__)
         db.rollback()
+        reservation.release(db)
         raise HTTPException(
             status_code=500, 
             detail=f"Internal server error: {type(e).__name__}: {str(e)}"
@@ -220,120 +358,171 @@ async def get_job_tickets(
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    location: Optional[str] = Query(None, description="Location to search for"),
+    match: str = Query("words", pattern="^(words|exact)$", description="words: location contains every word; exact: whole location matches"),
+    view: str = Query("full", pattern="^(summary|full)$", description="summary leaves out the work description and parts used"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; takes the place of skip"),
+    include_total: bool = Query(False, description="Also count every matching ticket (slower for large companies)"),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
-    """Get all job tickets (filtered by user role)"""
-    from datetime import datetime
-    
-    print(f"\n{'='*80}")
-    print(f"🔍 GET JOB TICKETS REQUEST - TIMESTAMP: {datetime.now().isoformat()}")
-    print(f"{'='*80}")
-    
-    # Log user context
-    print(f"\n👤 USER CONTEXT:")
-    print(f"   - User ID: {current_user.id}")
-    print(f"   - User Email: {current_user.email}")
-    print(f"   - User Role: {current_user.role}")
-    print(f"   - Company ID: {current_user.company_id}")
-    
-    # Log request parameters
-    print(f"\n📋 REQUEST PARAMETERS:")
-    print(f"   - Skip: {skip}")
-    print(f"   - Limit: {limit}")
-    print(f"   - Status Filter: {status}")
-    
-    # Start with base query and join with User table to get submitted_by_name
-    query = db.query(JobTicket).outerjoin(User, JobTicket.user_id == User.id)
-    print(f"\n🗄️ BUILDING QUERY:")
-    print(f"   - Base query created with User join")
+    """
+    Get all job tickets (filtered by user role), newest first
+    
+    Pages through results with next_cursor; skip is still accepted for
+    existing clients but gets slower the deeper it goes.
+    """
+    # Summary view never selects (or decrypts) the large columns
+    summary = view == "summary"
+    omitted = SUMMARY_OMITTED_FIELDS if summary else ()
+    columns = [column for column in LIST_COLUMNS if column.key not in omitted]
+    
+    # Select the ticket columns and the submitter's name in one query
+    query = db.query(*columns).select_from(JobTicket).outerjoin(User, JobTicket.user_id == User.id)
     
     # Apply company-level filtering for multi-tenancy
     if current_user.company_id:
         query = query.filter(JobTicket.company_id == current_user.company_id)
-        print(f"   - Added company filter: company_id = {current_user.company_id}")
     else:
-        print(f"   - ⚠️ No company_id found for user")
+        log.warning("job_tickets.list.no_company", user_id=current_user.id)
     
     # Apply status filter if provided
     if status:
         query = query.filter(JobTicket.status == status)
-        print(f"   - Added status filter: status = {status}")
+    
+    # Search the encrypted location through its blind indexes
+    if location:
+        matcher = exact_match if match == "exact" else token_match
+        query = query.filter(matcher(JobTicket, "location", location))
     
     # Filter by user role
     if current_user.role == "tech":
         # Techs can only see their own tickets
         query = query.filter(JobTicket.user_id == current_user.id)
-        print(f"   - Added tech filter: user_id = {current_user.id}")
     # Managers and admins can see all tickets from their company
     
-    # Get total count
-    total = query.count()
-    print(f"\n📊 QUERY RESULTS:")
-    print(f"   - Total matching tickets: {total}")
+    # Count only on request: it scans every matching row
+    total = query.with_entities(func.count(JobTicket.id)).scalar() if include_total else None
     
-    # Apply pagination
-    job_tickets = query.offset(skip).limit(limit).all()
-    print(f"   - Tickets after pagination: {len(job_tickets)}")
+    # Apply keyset pagination (or offset, for clients without a cursor)
+    query = query.order_by(*newest_first(JobTicket))
+    if cursor:
+        query = query.filter(after_cursor(JobTicket, cursor))
+    elif skip:
+        query = query.offset(skip)
+    rows, next_cursor = page_cursor(query.limit(limit + 1).all(), limit)
     
-    # Log each ticket found
-    print(f"\n🎫 TICKETS FOUND:")
-    for i, ticket in enumerate(job_tickets):
-        print(f"   [{i+1}] ID: {ticket.id}, Number: {getattr(ticket, 'ticket_number', 'None')}, Company: {getattr(ticket, 'company_name', 'None')}, Status: {getattr(ticket, 'status', 'None')}")
-    
-    if not job_tickets:
-        print(f"   ❌ No tickets found!")
-        
-        # Debug: Check if there are ANY tickets in the database
-        all_tickets = db.query(JobTicket).all()
-        print(f"\n🔍 DEBUG - ALL TICKETS IN DATABASE:")
-        print(f"   - Total tickets in DB: {len(all_tickets)}")
-        for i, ticket in enumerate(all_tickets):
-            print(f"   [{i+1}] ID: {ticket.id}, Company ID: {getattr(ticket, 'company_id', 'None')}, User ID: {getattr(ticket, 'user_id', 'None')}, Status: {getattr(ticket, 'status', 'None')}")
-    
-    # Add submitted_by_name to each ticket
-    enriched_tickets = []
+    job_tickets = [dict(row._mapping) for row in rows]
+    decrypt_columns(job_tickets, (field for field in ENCRYPTED_LIST_FIELDS if field not in omitted))
     for ticket in job_tickets:
-        # Convert to dict to add the submitted_by_name field
-        ticket_dict = {
-            "id": ticket.id,
-            "user_id": ticket.user_id,
-            "company_id": ticket.company_id,
-            "job_number": ticket.job_number,
-            "ticket_number": ticket.ticket_number,
-            "company_name": ticket.company_name,
-            "customer_name": ticket.customer_name,
-            "location": ticket.location,
-            "work_type": ticket.work_type,
-            "equipment": ticket.equipment,
-            "work_start_time": ticket.work_start_time,
-            "work_end_time": ticket.work_end_time,
-            "work_total_hours": ticket.work_total_hours,
-            "drive_start_time": ticket.drive_start_time,
-            "drive_end_time": ticket.drive_end_time,
-            "drive_total_hours": ticket.drive_total_hours,
-            "travel_type": ticket.travel_type,
-            "parts_used": ticket.parts_used,
-            "work_description": ticket.work_description,
-            "submitted_by": ticket.submitted_by,
-            "submitted_by_name": ticket.user.name if ticket.user else None,
-            "status": ticket.status,
-            "created_at": ticket.created_at,
-            "updated_at": ticket.updated_at
-        }
-        enriched_tickets.append(ticket_dict)
-    
-    print(f"\n✅ RETURNING RESPONSE:")
-    print(f"   - Total: {total}")
-    print(f"   - Items: {len(enriched_tickets)}")
-    print(f"{'='*80}\n")
-    
-    return {"job_tickets": enriched_tickets, "total": total}
+        for field in omitted:
+            ticket[field] = None
+    
+    log.debug(
+        "job_tickets.list", sample="job_tickets",
+        user_id=current_user.id, company_id=current_user.company_id, role=current_user.role,
+        skip=skip, cursor=bool(cursor), limit=limit, status=status, total=total, returned=len(job_tickets)
+    )
+    
+    # Full-table dump for diagnosing tenancy filters; never runs unless explicitly enabled
+    if not job_tickets and settings.features.enable_debug_diagnostics:
+        for ticket in db.query(JobTicket.id, JobTicket.company_id, JobTicket.user_id, JobTicket.status).limit(1000):
+            log.debug(
+                "job_tickets.list.diagnostic_ticket",
+                ticket_id=ticket.id, company_id=ticket.company_id, user_id=ticket.user_id, status=ticket.status
+            )
+    
+    return {"job_tickets": job_tickets, "total": total, "next_cursor": next_cursor}
+
+@router.get("/changes", response_model=JobTicketChanges)
+async def get_job_ticket_changes(
+    since: Optional[str] = Query(None, description="next_cursor of the previous sync; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=1000, description="Most changed tickets, and most deletions, per response"),
+    current_user: Principal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    """
+    Job tickets created, updated or deleted since the previous sync
+    
+    Clients apply deleted before changes, keep next_cursor for the next sync
+    and call again straight away while has_more is true. Only changes at
+    least APP_SYNC_SETTLE_SECONDS old are returned, so a write whose
+    transaction is still committing is picked up by a later sync instead of
+    being skipped by the watermark.
+    """
+    if not current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User is not associated with a company"
+        )
+    
+    if since:
+        ticket_position, deletion_position = decode_sync_cursor(since)
+    else:
+        ticket_position = deletion_position = (None, None)
+    
+    # Deletions older than the retention period are gone, so a cursor from
+    # before then can no longer be brought up to date
+    now = datetime.now(timezone.utc)
+    retention_start = now - timedelta(days=settings.app.sync_tombstone_retention_days)
+    if deletion_position[0] is not None and deletion_position[0] < retention_start:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Sync cursor has expired; sync again without since"
+        )
+    horizon = now - timedelta(seconds=settings.app.sync_settle_seconds)
+    
+    # Changed tickets, oldest change first
+    tickets = db.query(*LIST_COLUMNS).select_from(JobTicket).outerjoin(User, JobTicket.user_id == User.id).filter(
+        JobTicket.company_id == current_user.company_id,
+        JobTicket.updated_at <= horizon
+    )
+    deletions = db.query(
+        JobTicketTombstone.id, JobTicketTombstone.ticket_id, JobTicketTombstone.deleted_at
+    ).filter(
+        JobTicketTombstone.company_id == current_user.company_id,
+        JobTicketTombstone.deleted_at <= horizon
+    )
+    
+    # Techs only sync their own tickets
+    if current_user.role == "tech":
+        tickets = tickets.filter(JobTicket.user_id == current_user.id)
+        deletions = deletions.filter(JobTicketTombstone.user_id == current_user.id)
+    
+    after = after_position(JobTicket.updated_at, JobTicket.id, ticket_position)
+    if after is not None:
+        tickets = tickets.filter(after)
+    after = after_position(JobTicketTombstone.deleted_at, JobTicketTombstone.id, deletion_position)
+    if after is not None:
+        deletions = deletions.filter(after)
+    
+    rows = tickets.order_by(JobTicket.updated_at, JobTicket.id).limit(limit + 1).all()
+    changes, ticket_position, more_changes = advance_position(
+        [dict(row._mapping) for row in rows], limit, ticket_position, horizon, "updated_at"
+    )
+    rows = deletions.order_by(JobTicketTombstone.deleted_at, JobTicketTombstone.id).limit(limit + 1).all()
+    deleted, deletion_position, more_deleted = advance_position(
+        [dict(row._mapping) for row in rows], limit, deletion_position, horizon, "deleted_at"
+    )
+    decrypt_columns(changes, ENCRYPTED_LIST_FIELDS)
+    
+    log.debug(
+        "job_tickets.changes", sample="job_tickets",
+        user_id=current_user.id, company_id=current_user.company_id, role=current_user.role,
+        since=bool(since), changes=len(changes), deleted=len(deleted)
+    )
+    
+    return {
+        "changes": changes,
+        "deleted": [{"id": row["ticket_id"], "deleted_at": row["deleted_at"]} for row in deleted],
+        "next_cursor": encode_sync_cursor(ticket_position, deletion_position),
+        "has_more": more_changes or more_deleted,
+    }
 
 @router.get("/{job_ticket_id}", response_model=JobTicketResponse)
 async def get_job_ticket(
     job_ticket_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get job ticket by ID"""
@@ -360,7 +549,7 @@ async def get_job_ticket(
 async def update_job_ticket(
     job_ticket_id: int,
     job_ticket_update: JobTicketUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update job ticket"""
@@ -404,7 +593,7 @@ async def update_job_ticket(
 @router.delete("/{job_ticket_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_job_ticket(
     job_ticket_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Delete job ticket"""
@@ -425,7 +614,19 @@ async def delete_job_ticket(
             detail="Not enough permissions"
         )
     
-    # Delete job ticket
+    # Drop the company's tombstones that have outlived the retention period
+    retention_start = datetime.now(timezone.utc) - timedelta(days=settings.app.sync_tombstone_retention_days)
+    db.query(JobTicketTombstone).filter(
+        JobTicketTombstone.company_id == db_job_ticket.company_id,
+        JobTicketTombstone.deleted_at < retention_start
+    ).delete(synchronize_session=False)
+    
+    # Delete job ticket, leaving a tombstone for the change feed
+    db.add(JobTicketTombstone(
+        ticket_id=db_job_ticket.id,
+        company_id=db_job_ticket.company_id,
+        user_id=db_job_ticket.user_id
+    ))
     db.delete(db_job_ticket)
     db.commit()
     
@@ -7,7 +7,7 @@ from database import get_db
 from models import User, Company
 from models.user import UserRole
 from schemas.user import ManagerSignupWithCompany, UserWithCompanyResponse
-from core.security import get_password_hash
+from core.security import get_password_hash_async
 
 router = APIRouter(prefix="/manager-signup", tags=["manager-signup"])
 logger = logging.getLogger(__name__)
@@ -50,7 +50,7 @@ async def manager_signup_with_company(
         
         # Hash the password
         logger.info("Hashing password...")
-        hashed_password = get_password_hash(signup_data.password)
+        hashed_password = await get_password_hash_async(signup_data.password)
         logger.info("Password hashed successfully")
         
         # Create the company first (we need a temporary user_id for created_by)
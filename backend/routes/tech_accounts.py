@@ -8,7 +8,8 @@ import logging
 from database import get_db
 from models.user import User, UserRole
 from schemas.user import UserResponse
-from core.security import get_password_hash, require_role
+from core.principal import Principal
+from core.security import get_password_hash_async, require_role
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +40,7 @@ class TechAccountCreate(BaseModel):
 async def create_tech_account(
     tech_data: TechAccountCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
 ):
     """
     Create a technician account directly
@@ -54,7 +55,7 @@ async def create_tech_account(
             )
         
         # Hash the password securely
-        hashed_password = get_password_hash(tech_data.password)
+        hashed_password = await get_password_hash_async(tech_data.password)
         
         # Create new user with role: "tech", status: "active", linked to manager's company
         new_user = User(
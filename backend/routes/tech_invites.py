@@ -19,7 +19,8 @@ from schemas.tech_invite import (
     TechInviteValidationResponse, TechInviteRedemptionRequest, TechInviteRedemptionResponse,
     TechInviteEmailRequest, TechInviteEmailResponse
 )
-from core.security import get_current_user, require_role, get_password_hash, create_user_token
+from core.principal import Principal
+from core.security import get_current_user, require_role, get_password_hash_async, create_user_token
 from core.invite_tokens import InviteTokenService
 from core.email_service import email_service
 
@@ -30,7 +31,7 @@ logger = logging.getLogger(__name__)
 async def create_tech_invite(
     invite_data: TechInviteCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
 ):
     """
     Generate a secure tech invite token (Manager/Admin only)
@@ -48,7 +49,7 @@ async def create_tech_invite(
         # Check if there's already a pending invite for this email in this company
         existing_invite = db.query(TechInvite).filter(
             TechInvite.email == invite_data.email,
-            TechInvite.company_id == current_user.company.company_id,
+            TechInvite.company_id == current_user.company_uuid,
             TechInvite.status == "pending"
         ).first()
         
@@ -63,7 +64,7 @@ async def create_tech_invite(
             tech_name=invite_data.tech_name,
             email=invite_data.email,
             phone=invite_data.phone,
-            company_id=current_user.company.company_id,
+            company_id=current_user.company_uuid,
             created_by=current_user.id
         )
         
@@ -74,7 +75,7 @@ async def create_tech_invite(
         # Generate secure JWT token
         token = InviteTokenService.generate_invite_token(
             invite_id=tech_invite.invite_id,
-            company_id=current_user.company.company_id,
+            company_id=current_user.company_uuid,
             tech_name=invite_data.tech_name,
             email=invite_data.email
         )
@@ -224,7 +225,7 @@ async def redeem_invite_token(
             )
         
         # Create new tech user account
-        hashed_password = get_password_hash(redemption_data.password)
+        hashed_password = await get_password_hash_async(redemption_data.password)
         new_user = User(
             email=email,
             name=tech_name,
@@ -281,7 +282,7 @@ async def list_tech_invites(
     limit: int = 100,
     status_filter: str = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
 ):
     """
     List tech invites for the current user's company (Manager/Admin only)
@@ -289,7 +290,7 @@ async def list_tech_invites(
     """
     try:
         query = db.query(TechInvite).filter(
-            TechInvite.company_id == current_user.company.company_id
+            TechInvite.company_id == current_user.company_uuid
         )
         
         # Apply status filter if provided
@@ -319,7 +320,7 @@ async def list_tech_invites(
 async def cancel_tech_invite(
     invite_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
 ):
     """
     Cancel a pending tech invite (Manager/Admin only)
@@ -327,7 +328,7 @@ async def cancel_tech_invite(
     try:
         tech_invite = db.query(TechInvite).filter(
             TechInvite.invite_id == invite_id,
-            TechInvite.company_id == current_user.company.company_id
+            TechInvite.company_id == current_user.company_uuid
         ).first()
         
         if not tech_invite:
@@ -363,7 +364,7 @@ async def cancel_tech_invite(
 async def send_tech_invite_email(
     email_request: TechInviteEmailRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
+    current_user: Principal = Depends(require_role([UserRole.MANAGER, UserRole.ADMIN]))
 ):
     """
     Send tech invite via email using SendGrid (Manager/Admin only)
@@ -383,14 +384,15 @@ async def send_tech_invite_email(
     try:
         # Step 1: Validate user has company access
         logger.info("Step 1: Validating user company access...")
-        if not current_user.company:
+        if not current_user.company_uuid:
             logger.error(f"STEP 1 FAILED: User {current_user.email} does not have an associated company")
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="DEBUG: User must be associated with a company to send invitations"
             )
         
-        logger.info(f"Step 1 SUCCESS: User company: {current_user.company.name} (ID: {current_user.company.company_id})")
+        company = current_user.load_user(db).company
+        logger.info(f"Step 1 SUCCESS: User company: {company.name} (ID: {current_user.company_uuid})")
         
         # Step 2: Check if user already exists with this email
         logger.info("Step 2: Checking for existing user...")
@@ -408,7 +410,7 @@ async def send_tech_invite_email(
         logger.info("Step 3: Checking for existing pending invites...")
         existing_invite = db.query(TechInvite).filter(
             TechInvite.email == email_request.email,
-            TechInvite.company_id == current_user.company.company_id,
+            TechInvite.company_id == current_user.company_uuid,
             TechInvite.status == "pending"
         ).first()
         
@@ -422,7 +424,7 @@ async def send_tech_invite_email(
             invite_record = TechInvite(
                 tech_name=email_request.tech_name,
                 email=email_request.email,
-                company_id=current_user.company.company_id,
+                company_id=current_user.company_uuid,
                 created_by=current_user.id,
                 delivery_method="email"
             )
@@ -441,7 +443,7 @@ async def send_tech_invite_email(
                 invite_id=invite_record.invite_id,
                 tech_name=email_request.tech_name,
                 email=email_request.email,
-                company_id=current_user.company.company_id
+                company_id=current_user.company_uuid
             )
             logger.info(f"Step 4 SUCCESS: Token generated (length: {len(invite_token)})")
         except Exception as token_error:
@@ -458,7 +460,7 @@ async def send_tech_invite_email(
             email_sent = await email_service.send_tech_invitation(
                 tech_name=email_request.tech_name,
                 tech_email=email_request.email,
-                company_name=current_user.company.name,
+                company_name=company.name,
                 invite_token=invite_token
             )
             logger.info(f"Step 5 RESULT: Email sent status: {email_sent}")
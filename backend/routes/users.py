@@ -5,7 +5,8 @@ from sqlalchemy.orm import Session
 from database import get_db
 from models.user import User, UserRole
 from schemas.user import UserResponse
-from utils.jwt import get_current_user, get_admin_user
+from core.principal import Principal
+from core.security import get_current_user, get_current_principal, require_role
 
 router = APIRouter(
     prefix="/users",
@@ -19,7 +20,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 
 @router.get("/technicians", response_model=List[UserResponse])
 async def get_technicians(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get technicians from the same company (manager/admin only)"""
@@ -42,7 +43,7 @@ async def get_technicians(
 async def get_users(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(require_role([UserRole.ADMIN])),
     db: Session = Depends(get_db)
 ):
     """Get all users (admin only)"""
@@ -52,7 +53,7 @@ async def get_users(
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
-    current_user: User = Depends(get_admin_user),
+    current_user: Principal = Depends(require_role([UserRole.ADMIN])),
     db: Session = Depends(get_db)
 ):
     """Get user by ID (admin only)"""
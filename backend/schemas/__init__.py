@@ -1,9 +1,12 @@
 from .user import (
     UserBase, UserCreate, UserLogin, UserResponse, UserWithCompanyResponse,
-    ManagerSignupWithCompany, Token, TokenData
+    ManagerSignupWithCompany, Token, TokenData, RefreshTokenRequest
 )
-from .job_ticket import JobTicketBase, JobTicketCreate, JobTicketSubmit, JobTicketResponse
-from .invoice import InvoiceBase, InvoiceCreate, InvoiceResponse
+from .job_ticket import (
+    JobTicketBase, JobTicketCreate, JobTicketSubmit, JobTicketResponse,
+    JobTicketBulkSubmit, JobTicketBulkResponse, JobTicketChanges, JobTicketAccepted
+)
+from .invoice import InvoiceBase, InvoiceCreate, InvoiceResponse, InvoiceSummary
 from .company import (
     CompanyBase, CompanyCreate, CompanyUpdate, CompanyResponse, CompanyListResponse
 )
@@ -19,11 +22,12 @@ from .audit import (
 __all__ = [
     # User schemas
     "UserBase", "UserCreate", "UserLogin", "UserResponse", "UserWithCompanyResponse",
-    "ManagerSignupWithCompany", "Token", "TokenData",
+    "ManagerSignupWithCompany", "Token", "TokenData", "RefreshTokenRequest",
     # Job ticket schemas
     "JobTicketBase", "JobTicketCreate", "JobTicketSubmit", "JobTicketResponse",
+    "JobTicketBulkSubmit", "JobTicketBulkResponse", "JobTicketChanges", "JobTicketAccepted",
     # Invoice schemas
-    "InvoiceBase", "InvoiceCreate", "InvoiceResponse",
+    "InvoiceBase", "InvoiceCreate", "InvoiceResponse", "InvoiceSummary",
     # Company schemas
     "CompanyBase", "CompanyCreate", "CompanyUpdate", "CompanyResponse", "CompanyListResponse",
     # Invitation schemas
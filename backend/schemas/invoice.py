@@ -92,8 +92,8 @@ class InvoiceResponse(BaseModel):
     service_fee: float
     tax: float
     total_amount: float
-    line_items: List[Dict[str, Any]]
-    job_ticket_ids: List[int]
+    line_items: Optional[List[Dict[str, Any]]] = None  # None in the summary list view
+    job_ticket_ids: Optional[List[int]] = None  # None in the summary list view
     status: str
     created_by: str
     created_at: datetime
@@ -109,3 +109,21 @@ class InvoiceList(BaseModel):
     total: int
     skip: int
     limit: int
+
+class InvoiceSummaryTotals(BaseModel):
+    """Invoice count and amount sums"""
+    invoice_count: int
+    subtotal: float
+    service_fee: float
+    tax: float
+    total_amount: float
+
+class InvoiceSummaryPeriod(InvoiceSummaryTotals):
+    """Invoice count and amount sums for one month and status"""
+    month: str
+    status: str
+
+class InvoiceSummary(BaseModel):
+    """Company invoice totals by month and status"""
+    periods: List[InvoiceSummaryPeriod]
+    totals: InvoiceSummaryTotals
@@ -1,5 +1,5 @@
-from typing import Optional, List
-from pydantic import BaseModel, field_validator
+from typing import Any, Dict, Optional, List
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 import json
 from models.job_ticket import JobTicketStatus
@@ -63,6 +63,11 @@ class JobTicketResponse(JobTicketBase):
         "from_attributes": True
     }
 
+class JobTicketAccepted(BaseModel):
+    """Submission queued to be saved (APP_SUBMIT_DURABILITY=enqueue)"""
+    ticket_number: str
+    status: str = "queued"
+
 class JobTicketSubmit(JobTicketBase):
     """Job ticket submission schema (no authentication required)"""
     # Override company_name to be optional for field technicians
@@ -114,4 +119,40 @@ class JobTicketSubmit(JobTicketBase):
 class JobTicketList(BaseModel):
     """Job ticket list schema"""
     job_tickets: List[JobTicketResponse]
-    total: int
+    total: Optional[int] = None  # Only counted with include_total=true
+    next_cursor: Optional[str] = None  # Pass as cursor for the next page; None on the last page
+
+class JobTicketDeletion(BaseModel):
+    """A deleted job ticket in the change feed"""
+    id: int  # The deleted ticket's id
+    deleted_at: datetime
+
+class JobTicketChanges(BaseModel):
+    """Change feed page: apply deleted before changes, since an id may have been reused"""
+    changes: List[JobTicketResponse]
+    deleted: List[JobTicketDeletion]
+    next_cursor: str  # Pass as since on the next sync
+    has_more: bool  # Sync again straight away when true
+
+# Most tickets POST /job-tickets/bulk accepts in one request
+BULK_SUBMIT_MAX_TICKETS = 500
+
+class JobTicketBulkSubmit(BaseModel):
+    """Bulk job ticket submission schema (offline sync)"""
+    # Items are validated one at a time as JobTicketSubmit, so one bad ticket
+    # is reported on its own instead of rejecting the whole batch
+    tickets: List[Dict[str, Any]] = Field(..., min_length=1, max_length=BULK_SUBMIT_MAX_TICKETS)
+
+class JobTicketBulkItemResult(BaseModel):
+    """Outcome of one ticket of a bulk submission, by position in the request"""
+    index: int
+    success: bool
+    id: Optional[int] = None
+    ticket_number: Optional[str] = None
+    error: Optional[str] = None
+
+class JobTicketBulkResponse(BaseModel):
+    """Bulk job ticket submission response schema"""
+    created: int
+    failed: int
+    results: List[JobTicketBulkItemResult]
@@ -81,6 +81,11 @@ class Token(BaseModel):
     """Token schema"""
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    """Refresh token exchange/logout schema"""
+    refresh_token: str
 
 class TokenData(BaseModel):
     """Token data schema"""
@@ -0,0 +1,90 @@
+"""
+Script to calibrate the bcrypt cost factor for this host.
+
+This script measures how long bcrypt takes at each cost factor on the current
+machine and recommends the highest cost whose slowest sample still fits the
+target latency budget. Set the result as AUTH_BCRYPT_ROUNDS; passwords stored
+at any other cost are rehashed transparently on the user's next login.
+
+Usage:
+    python -m scripts.calibrate_password_hashing
+    python -m scripts.calibrate_password_hashing --target-ms 150 --samples 7
+"""
+
+import sys
+import os
+import argparse
+import statistics
+import time
+
+import bcrypt
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_PASSWORD = b"calibration-password-1234"
+
+
+def measure_rounds(rounds, samples):
+    """Return per-sample hash durations in milliseconds for a cost factor."""
+    durations = []
+    for _ in range(samples):
+        salt = bcrypt.gensalt(rounds=rounds)
+        started = time.perf_counter()
+        bcrypt.hashpw(SAMPLE_PASSWORD, salt)
+        durations.append((time.perf_counter() - started) * 1000)
+    return durations
+
+
+def calibrate(target_ms, samples, min_rounds, max_rounds):
+    """Benchmark each cost factor and pick the slowest one within budget."""
+    results = []
+    recommended = None
+
+    for rounds in range(min_rounds, max_rounds + 1):
+        durations = measure_rounds(rounds, samples)
+        worst = max(durations)
+        results.append({
+            "rounds": rounds,
+            "median_ms": statistics.median(durations),
+            "max_ms": worst
+        })
+
+        if worst <= target_ms:
+            recommended = rounds
+        else:
+            # Each extra round doubles the cost, so stop at the first miss
+            break
+
+    return results, recommended
+
+
+def main():
+    """Run the calibration and print the recommended setting."""
+    parser = argparse.ArgumentParser(description="Calibrate bcrypt cost for this host")
+    parser.add_argument("--target-ms", type=float, default=250.0,
+                        help="Latency budget for a single hash in milliseconds (default: 250)")
+    parser.add_argument("--samples", type=int, default=5,
+                        help="Hashes measured per cost factor (default: 5)")
+    parser.add_argument("--min-rounds", type=int, default=10,
+                        help="Lowest cost factor considered (default: 10)")
+    parser.add_argument("--max-rounds", type=int, default=16,
+                        help="Highest cost factor considered (default: 16)")
+    args = parser.parse_args()
+
+    print(f"Calibrating bcrypt for a {args.target_ms:.0f} ms budget ({args.samples} samples per cost)...")
+    results, recommended = calibrate(args.target_ms, args.samples, args.min_rounds, args.max_rounds)
+
+    print(f"{'rounds':>6}  {'median ms':>10}  {'max ms':>10}")
+    for result in results:
+        print(f"{result['rounds']:>6}  {result['median_ms']:>10.1f}  {result['max_ms']:>10.1f}")
+
+    if recommended is None:
+        print(f"\nEven {args.min_rounds} rounds exceed the budget; consider more hashing workers or a larger budget.")
+        sys.exit(1)
+
+    print(f"\nRecommended setting:\n  AUTH_BCRYPT_ROUNDS={recommended}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Script to re-encrypt encrypted fields under the active key.
+
+Runs the online re-encryption job (core/reencryption.py) in the foreground,
+printing progress after every batch. It is safe to run while the API is
+serving traffic and to interrupt: the next run resumes from the last
+committed batch.
+
+Key rotation:
+    1. Generate a new key and set it as SECURITY_DATA_ENCRYPTION_KEY with a
+       new SECURITY_DATA_ENCRYPTION_KEY_ID
+    2. Add the old key under its id to SECURITY_DATA_ENCRYPTION_PREVIOUS_KEYS
+       (use --show-derived-key if no key was configured before)
+    3. Deploy, then run this script until every table completes
+    4. Remove the old key from the previous keys
+
+Usage:
+    python -m scripts.reencrypt_fields
+    python -m scripts.reencrypt_fields --table invoices --batch-size 1000 --pause 0.5
+    python -m scripts.reencrypt_fields --show-derived-key
+"""
+
+import sys
+import os
+import argparse
+import base64
+import signal
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import settings
+from core.encryption import DATA_KEY_ID, derive_data_key
+from core.reencryption import reencryption_job
+
+
+def print_progress(table_name, progress):
+    """Print one progress line for a table."""
+    print(
+        f"\r{table_name:<12} {progress['percent']:>5.1f}%  id {progress['last_id']}/{progress['max_id']}"
+        f"  scanned {progress['rows_scanned']}  rewritten {progress['rows_rewritten']}",
+        end="\n" if progress["completed"] else "",
+        flush=True,
+    )
+
+
+def main():
+    """Run the re-encryption job until it completes or is interrupted."""
+    parser = argparse.ArgumentParser(description="Re-encrypt encrypted fields under the active key")
+    parser.add_argument("--table", action="append", choices=sorted(reencryption_job.tables),
+                        help="Table to process (repeatable; default: all)")
+    parser.add_argument("--batch-size", type=int, default=settings.security.reencryption_batch_size,
+                        help="Rows per transaction (default: SECURITY_REENCRYPTION_BATCH_SIZE)")
+    parser.add_argument("--pause", type=float, default=settings.security.reencryption_pause_seconds,
+                        help="Seconds to pause between batches (default: SECURITY_REENCRYPTION_PAUSE_SECONDS)")
+    parser.add_argument("--reset", action="store_true",
+                        help="Discard checkpoints and start a fresh pass")
+    parser.add_argument("--show-derived-key", action="store_true",
+                        help="Print the envelope key derived from FERNET_KEY, for use in the previous keys")
+    args = parser.parse_args()
+    
+    if args.show_derived_key:
+        derived = base64.urlsafe_b64encode(derive_data_key(settings.security.fernet_key.get_secret_value()))
+        print(derived.decode())
+        return
+    
+    reencryption_job.batch_size = args.batch_size
+    reencryption_job.pause_seconds = args.pause
+    if args.reset:
+        reencryption_job.reset(args.table)
+    
+    # Finish the current batch on Ctrl+C; the checkpoint makes the next run resume
+    signal.signal(signal.SIGINT, lambda signum, frame: reencryption_job.stop())
+    
+    print(f"Re-encrypting under key id {DATA_KEY_ID} ({args.batch_size} rows per batch, {args.pause}s pause)...")
+    complete = reencryption_job.run(args.table, on_progress=print_progress)
+    
+    stats = reencryption_job.stats()
+    if stats["failures"]:
+        print(
+            f"\n{stats['failures']} values could not be decrypted with the configured keys; see the log. "
+            "Their tables stay incomplete until the key that sealed them is configured and the job is run again."
+        )
+    if not complete:
+        print("\nStopped before completion; run again to resume.")
+        sys.exit(1)
+    print("\nAll tables re-encrypted. Retired keys can be removed once every process has been redeployed.")
+
+
+if __name__ == "__main__":
+    main()
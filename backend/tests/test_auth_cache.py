@@ -0,0 +1,157 @@
+"""
+Unit tests for the in-process authentication caches.
+
+These tests verify that:
+1. Entries expire after their TTL and are evicted in LRU order when full
+2. Hit and miss counters reflect lookups
+3. Company-wide invalidation drops only that company's principals
+4. Verified token payloads are cached until the token's exp and not after
+5. Failed verifications are never cached
+6. Access and refresh payloads of the same token are cached separately
+"""
+
+import unittest
+import sys
+import os
+import time
+from unittest import mock
+
+from jose import JWTError
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.auth_cache
+from core.auth_cache import TTLCache, get_verified_payload
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test case for the bounded TTL cache."""
+
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted as hits and misses."""
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        self.assertIsNone(cache.get(1))
+        cache.set(1, "principal")
+        self.assertEqual(cache.get(1), "principal")
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_entries_expire(self):
+        """Test that entries are not served after their TTL."""
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        cache.set(1, "principal", ttl_seconds=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get(1))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        cache.get(1)
+        cache.set(3, "c")
+
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1), "a")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_disabled_cache_stores_nothing(self):
+        """Test that a zero TTL disables caching."""
+        cache = TTLCache(max_entries=10, ttl_seconds=0)
+        cache.set(1, "principal")
+        self.assertIsNone(cache.get(1))
+
+    def test_invalidate_where(self):
+        """Test that predicate invalidation only drops matching entries."""
+        cache = TTLCache(max_entries=10, ttl_seconds=60)
+        cache.set(1, {"user": {"company_id": 7}})
+        cache.set(2, {"user": {"company_id": 8}})
+        cache.invalidate_where(lambda snapshot: snapshot["user"]["company_id"] == 7)
+
+        self.assertIsNone(cache.get(1))
+        self.assertIsNotNone(cache.get(2))
+
+
+class CountingDecoder:
+    """Stand-in for a JWT decoder that records how often it runs."""
+
+    def __init__(self, payload=None, error=None):
+        self.payload = payload
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, token):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return dict(self.payload)
+
+
+class TestVerifiedPayloadCache(unittest.TestCase):
+    """Test case for caching verified JWT payloads."""
+
+    def setUp(self):
+        """Give each test an empty token cache."""
+        self.cache = TTLCache(max_entries=10, ttl_seconds=3600)
+        patcher = mock.patch.object(core.auth_cache, "token_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_payload_cached_until_exp(self):
+        """Test that a payload is reused until its exp and decoded again after."""
+        decode = CountingDecoder({"sub": "1", "exp": time.time() + 0.1})
+
+        first = get_verified_payload("access", "token", decode)
+        second = get_verified_payload("access", "token", decode)
+        self.assertEqual(first, second)
+        self.assertEqual(decode.calls, 1)
+
+        time.sleep(0.15)
+        get_verified_payload("access", "token", decode)
+        self.assertEqual(decode.calls, 2)
+
+    def test_cached_payload_is_a_copy(self):
+        """Test that callers mutating a payload do not change the cached one."""
+        decode = CountingDecoder({"sub": "1", "exp": time.time() + 60})
+
+        get_verified_payload("access", "token", decode)["sub"] = "2"
+        self.assertEqual(get_verified_payload("access", "token", decode)["sub"], "1")
+
+    def test_failed_verification_not_cached(self):
+        """Test that a token failing verification is verified again every time."""
+        decode = CountingDecoder(error=JWTError("Signature has expired"))
+
+        for _ in range(2):
+            with self.assertRaises(JWTError):
+                get_verified_payload("access", "token", decode)
+        self.assertEqual(decode.calls, 2)
+        self.assertEqual(self.cache.stats()["size"], 0)
+
+    def test_token_without_exp_not_cached(self):
+        """Test that a payload without exp is verified on every use."""
+        decode = CountingDecoder({"sub": "1"})
+
+        get_verified_payload("access", "token", decode)
+        get_verified_payload("access", "token", decode)
+        self.assertEqual(decode.calls, 2)
+
+    def test_purposes_cached_separately(self):
+        """Test that the same token verified as access and refresh gets separate entries."""
+        access = CountingDecoder({"sub": "1", "type": "access", "exp": time.time() + 60})
+        refresh = CountingDecoder({"sub": "1", "type": "refresh", "exp": time.time() + 60})
+
+        self.assertEqual(get_verified_payload("access", "token", access)["type"], "access")
+        self.assertEqual(get_verified_payload("refresh", "token", refresh)["type"], "refresh")
+        self.assertEqual(get_verified_payload("access", "token", access)["type"], "access")
+        self.assertEqual(get_verified_payload("refresh", "token", refresh)["type"], "refresh")
+
+        self.assertEqual(access.calls, 1)
+        self.assertEqual(refresh.calls, 1)
+        self.assertEqual(self.cache.stats()["size"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
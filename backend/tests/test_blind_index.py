@@ -0,0 +1,109 @@
+"""
+Unit tests for blind indexes on encrypted fields.
+
+These tests verify that:
+1. Indexes ignore case, punctuation and whitespace but differ between fields
+2. Setters keep the index columns and search token rows in sync
+3. Exact and all-words lookups find rows without decrypting them
+"""
+
+import unittest
+import sys
+import os
+import uuid
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.blind_index import blind_index, exact_match, normalize_tokens, token_indexes, token_match
+from database import SessionLocal
+from models.company import Company
+from models.job_ticket import JobTicket
+from models.search_token import JobTicketSearchToken
+
+class TestBlindIndexValues(unittest.TestCase):
+    """Test case for computing blind indexes."""
+    
+    def test_normalization(self):
+        """Test that formatting differences do not change the index."""
+        self.assertEqual(normalize_tokens("  ACME Plumbing,  LLC "), ["acme", "plumbing", "llc"])
+        self.assertEqual(
+            blind_index("invoices.customer_name", "ACME Plumbing, LLC"),
+            blind_index("invoices.customer_name", "acme plumbing llc")
+        )
+        self.assertIsNone(blind_index("invoices.customer_name", " , "))
+    
+    def test_scoped_by_field(self):
+        """Test that the same value indexes differently in different fields."""
+        self.assertNotEqual(
+            blind_index("invoices.customer_name", "Acme"),
+            blind_index("invoices.company_name", "Acme")
+        )
+    
+    def test_tokens_are_distinct(self):
+        """Test that repeated words produce one token index."""
+        self.assertEqual(len(token_indexes("job_tickets.location", "12 Main Main St")), 3)
+
+class TestBlindIndexQueries(unittest.TestCase):
+    """Test case for searching encrypted ticket locations."""
+    
+    def setUp(self):
+        """Create tickets with encrypted locations."""
+        self.db = SessionLocal()
+        name = f"Search Co {uuid.uuid4().hex[:8]}"
+        self.company = Company(name=name, normalized_name=name.lower())
+        self.db.add(self.company)
+        self.db.commit()
+        
+        self.tickets = [
+            JobTicket(company_id=self.company.id, company_name="Acme", location=location)
+            for location in ["12 Main St, Springfield", "40 Main St, Shelbyville", "7 Oak Rd, Springfield"]
+        ]
+        self.db.add_all(self.tickets)
+        self.db.commit()
+    
+    def tearDown(self):
+        """Remove the tickets and company."""
+        for ticket in self.tickets:
+            self.db.delete(ticket)
+        self.db.delete(self.company)
+        self.db.commit()
+        self.db.close()
+    
+    def _search(self, condition):
+        query = self.db.query(JobTicket).filter(JobTicket.company_id == self.company.id, condition)
+        return sorted(ticket.location for ticket in query.all())
+    
+    def test_exact_match(self):
+        """Test that an exact lookup ignores case and punctuation."""
+        self.assertEqual(
+            self._search(exact_match(JobTicket, "location", "12 main st springfield")),
+            ["12 Main St, Springfield"]
+        )
+        self.assertEqual(self._search(exact_match(JobTicket, "location", "12 Main St")), [])
+    
+    def test_token_match_requires_every_word(self):
+        """Test that a words lookup returns rows containing all query words."""
+        self.assertEqual(
+            self._search(token_match(JobTicket, "location", "Main St")),
+            ["12 Main St, Springfield", "40 Main St, Shelbyville"]
+        )
+        self.assertEqual(
+            self._search(token_match(JobTicket, "location", "springfield main")),
+            ["12 Main St, Springfield"]
+        )
+        self.assertEqual(self._search(token_match(JobTicket, "location", "Elm")), [])
+    
+    def test_update_replaces_tokens(self):
+        """Test that changing a location re-indexes it."""
+        ticket = self.tickets[2]
+        ticket.location = "9 Elm Ave, Capital City"
+        self.db.commit()
+        
+        self.assertEqual(self._search(token_match(JobTicket, "location", "Oak")), [])
+        self.assertEqual(self._search(token_match(JobTicket, "location", "elm ave")), ["9 Elm Ave, Capital City"])
+        tokens = self.db.query(JobTicketSearchToken).filter(JobTicketSearchToken.owner_id == ticket.id).count()
+        self.assertEqual(tokens, 5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Unit tests for the binary envelope ciphertext format.
+
+These tests verify that:
+1. New values are written as compact AES-GCM envelopes and round-trip
+2. Legacy Fernet tokens, as text or bytes, remain readable
+3. Tampered envelopes and unknown key ids are rejected
+4. Envelope and legacy text values coexist in the same database column
+"""
+
+import unittest
+import sys
+import os
+import uuid
+
+from cryptography.exceptions import InvalidTag
+from sqlalchemy import text
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import encryption
+from database import SessionLocal
+from models.company import Company
+from models.job_ticket import JobTicket
+
+class TestEnvelopeFormat(unittest.TestCase):
+    """Test case for encrypting and decrypting field values."""
+    
+    def test_round_trip(self):
+        """Test that an envelope decrypts back to the plaintext."""
+        ciphertext = encryption.encrypt_field("103.17")
+        self.assertTrue(encryption.is_envelope(ciphertext))
+        self.assertEqual(ciphertext[1], encryption.DATA_KEY_ID)
+        self.assertEqual(len(ciphertext), 2 + 12 + len("103.17") + 16)
+        self.assertEqual(encryption.decrypt_field(ciphertext), "103.17")
+    
+    def test_nonces_are_unique(self):
+        """Test that encrypting the same value twice gives different ciphertexts."""
+        self.assertNotEqual(encryption.encrypt_field("same"), encryption.encrypt_field("same"))
+    
+    def test_legacy_fernet_is_readable(self):
+        """Test that Fernet tokens decrypt whether stored as text or bytes."""
+        token = encryption.fernet.encrypt(b"12 Elm St").decode()
+        self.assertFalse(encryption.is_envelope(token))
+        self.assertEqual(encryption.decrypt_field(token), "12 Elm St")
+        self.assertEqual(encryption.decrypt_field(token.encode()), "12 Elm St")
+    
+    def test_tampering_is_rejected(self):
+        """Test that a modified ciphertext or header fails authentication."""
+        ciphertext = bytearray(encryption.encrypt_field("secret"))
+        ciphertext[-1] ^= 0x01
+        with self.assertRaises(InvalidTag):
+            encryption.decrypt_field(bytes(ciphertext))
+    
+    def test_unknown_key_id_is_rejected(self):
+        """Test that an envelope naming a missing key cannot be decrypted."""
+        ciphertext = bytearray(encryption.encrypt_field("secret"))
+        ciphertext[1] = (encryption.DATA_KEY_ID % 255) + 1
+        with self.assertRaises(ValueError):
+            encryption.decrypt_field(bytes(ciphertext))
+
+class TestMixedColumn(unittest.TestCase):
+    """Test case for reading envelope and legacy values from the database."""
+    
+    def setUp(self):
+        """Create a company to own the tickets."""
+        self.db = SessionLocal()
+        name = f"Cipher Co {uuid.uuid4().hex[:8]}"
+        self.company = Company(name=name, normalized_name=name.lower())
+        self.db.add(self.company)
+        self.db.commit()
+    
+    def tearDown(self):
+        """Remove the tickets and company."""
+        self.db.query(JobTicket).filter(JobTicket.company_id == self.company.id).delete()
+        self.db.delete(self.company)
+        self.db.commit()
+        self.db.close()
+    
+    def test_envelope_and_legacy_rows(self):
+        """Test that both formats load as bytes and decrypt from the same column."""
+        new = JobTicket(company_id=self.company.id, company_name="Acme", location="1 New Rd")
+        old = JobTicket(company_id=self.company.id, company_name="Acme", location="placeholder")
+        self.db.add_all([new, old])
+        self.db.commit()
+        
+        legacy = encryption.fernet.encrypt(b"2 Old Rd").decode()
+        self.db.execute(
+            text("UPDATE job_tickets SET location = :location WHERE id = :id"),
+            {"location": legacy, "id": old.id}
+        )
+        self.db.commit()
+        self.db.expire_all()
+        
+        self.assertTrue(encryption.is_envelope(new._encrypted_location))
+        self.assertIsInstance(old._encrypted_location, bytes)
+        self.assertEqual(new.location, "1 New Rd")
+        self.assertEqual(old.location, "2 Old Rd")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,244 @@
+"""
+Unit tests for resolving the authenticated principal.
+
+These tests verify that:
+1. A principal is built from verified claims without any query, and from the
+   database (then the principal cache) when claims are not trusted or are
+   incomplete
+2. A token whose version is below the user's minimum is rejected with a 401
+3. Role and company checks reject a principal outside them with a 403
+4. The ORM user for a principal is attached from the cache or the principal
+   without a query, and its remaining columns load on first access
+5. A principal re-cached from the old row between a change's flush and its
+   commit is dropped once the change commits
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import uuid
+from unittest import mock
+
+from fastapi import HTTPException
+from sqlalchemy import event
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.auth_cache import principal_cache
+from core.config import settings
+from core.principal import Principal
+from core.security import (
+    create_user_token, create_access_token, get_current_principal, load_principal_user,
+    require_role, require_company_access
+)
+from database import SessionLocal, engine
+from models.company import Company
+from models.user import User, UserRole
+
+class TestCurrentPrincipal(unittest.TestCase):
+    """Test case for get_current_principal and the principal helpers."""
+    
+    def setUp(self):
+        """Create a manager in a company and start counting statements."""
+        self.db = SessionLocal()
+        suffix = uuid.uuid4().hex[:8]
+        self.company = Company(name=f"Principal Co {suffix}", normalized_name=f"principal co {suffix}")
+        self.db.add(self.company)
+        self.db.commit()
+        self.user = User(
+            email=f"principal-{suffix}@example.com",
+            hashed_password="not-a-real-hash",
+            name="Principal Manager",
+            role="manager",
+            company_id=self.company.id
+        )
+        self.db.add(self.user)
+        self.db.commit()
+        self.token = create_user_token(self.user)
+        
+        principal_cache.invalidate(self.user.id)
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self._record)
+    
+    def tearDown(self):
+        """Remove the test rows."""
+        event.remove(engine, "before_cursor_execute", self._record)
+        self.db.rollback()
+        self.db.query(User).filter(User.id == self.user.id).delete()
+        self.db.query(Company).filter(Company.id == self.company.id).delete()
+        self.db.commit()
+        self.db.close()
+        principal_cache.invalidate(self.user.id)
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def _authenticate(self, token=None, trust_claims=True):
+        with mock.patch.object(settings.auth, "trust_access_token_claims", trust_claims):
+            return asyncio.run(get_current_principal(token=token or self.token, db=self.db))
+    
+    def assertRejected(self, status_code, call, *args, **kwargs):
+        with self.assertRaises(HTTPException) as ctx:
+            call(*args, **kwargs)
+        self.assertEqual(ctx.exception.status_code, status_code)
+    
+    def test_claims_path_runs_no_query(self):
+        """Test that trusted claims produce the principal without touching the database."""
+        principal = self._authenticate()
+        
+        self.assertEqual(self.statements, [])
+        self.assertEqual(principal, Principal(
+            id=self.user.id, email=self.user.email, role="manager",
+            company_id=self.company.id, company_uuid=self.company.company_id, is_active=True
+        ))
+        self.assertIsNone(principal_cache.get(self.user.id))
+    
+    def test_database_fallback_fills_cache(self):
+        """Test that untrusted claims are checked against the database once, then the cache."""
+        principal = self._authenticate(trust_claims=False)
+        
+        self.assertEqual(len(self.statements), 1)
+        self.assertEqual(principal.company_uuid, self.company.company_id)
+        self.assertIsNotNone(principal_cache.get(self.user.id))
+        
+        self.statements.clear()
+        self.assertEqual(self._authenticate(trust_claims=False), principal)
+        self.assertEqual(self.statements, [])
+    
+    def test_incomplete_claims_fall_back_to_database(self):
+        """Test that a token without the company uuid is resolved from the database."""
+        token = create_access_token({
+            "sub": str(self.user.id), "email": self.user.email, "role": "manager",
+            "company_id": self.company.id, "is_active": True, "ver": 0, "type": "access"
+        })
+        
+        principal = self._authenticate(token)
+        
+        self.assertEqual(len(self.statements), 1)
+        self.assertEqual(principal.company_uuid, self.company.company_id)
+    
+    def test_revoked_version_rejected(self):
+        """Test that a token issued before a version bump is rejected on both paths."""
+        self.user.revoke_tokens()
+        self.db.commit()
+        
+        self.assertRejected(401, self._authenticate)
+        self.assertRejected(401, self._authenticate, trust_claims=False)
+        
+        # A token carrying the new version is accepted
+        self.assertEqual(self._authenticate(create_user_token(self.user)).id, self.user.id)
+    
+    def test_stale_claims_rejected(self):
+        """Test that claims disagreeing with the database are rejected when claims are not trusted."""
+        token = create_access_token({
+            "sub": str(self.user.id), "email": self.user.email, "role": "admin",
+            "company_id": self.company.id, "company_uuid": self.company.company_id,
+            "is_active": True, "ver": 0, "type": "access"
+        })
+        
+        self.assertRejected(401, self._authenticate, token, trust_claims=False)
+    
+    def test_refresh_token_rejected(self):
+        """Test that a token of another type cannot authenticate."""
+        token = create_access_token({
+            "sub": str(self.user.id), "email": self.user.email, "role": "manager", "type": "refresh"
+        })
+        
+        self.assertRejected(401, self._authenticate, token)
+    
+    def test_role_mismatch_forbidden(self):
+        """Test that require_role rejects a principal without an allowed role."""
+        principal = self._authenticate()
+        
+        self.assertIs(require_role([UserRole.MANAGER, UserRole.ADMIN])(principal), principal)
+        self.assertRejected(403, require_role([UserRole.ADMIN]), principal)
+        self.assertRejected(403, require_role(["tech"]), principal)
+    
+    def test_company_mismatch_forbidden(self):
+        """Test that require_company_access rejects other companies except for admins."""
+        principal = self._authenticate()
+        
+        self.assertIs(require_company_access(self.company.id)(principal), principal)
+        self.assertRejected(403, require_company_access(self.company.id + 1), principal)
+        
+        admin = Principal(id=principal.id, email=principal.email, role="admin", company_id=self.company.id)
+        self.assertIs(require_company_access(self.company.id + 1)(admin), admin)
+    
+    def test_load_user_from_claims(self):
+        """Test that a claims principal is attached as a user and loads other columns lazily."""
+        principal = self._authenticate()
+        self.db.expunge_all()
+        
+        user = load_principal_user(principal, self.db)
+        self.assertEqual(self.statements, [])
+        self.assertEqual((user.id, user.role, user.company_id), (self.user.id, "manager", self.company.id))
+        
+        self.assertEqual(user.name, "Principal Manager")
+        self.assertEqual(len(self.statements), 1)
+        
+        # The attached instance is reused rather than attached twice
+        self.assertIs(load_principal_user(principal, self.db), user)
+    
+    def test_load_user_from_cache(self):
+        """Test that a cached principal is attached with its company and no query."""
+        principal = self._authenticate(trust_claims=False)
+        self.db.expunge_all()
+        self.statements.clear()
+        
+        user = load_principal_user(principal, self.db)
+        
+        self.assertEqual(user.name, "Principal Manager")
+        self.assertEqual(user.company.company_id, self.company.company_id)
+        self.assertEqual(self.statements, [])
+
+    def _recache_from_other_session(self):
+        """Resolve the principal the way a concurrent request would, from committed rows"""
+        other = SessionLocal()
+        try:
+            with mock.patch.object(settings.auth, "trust_access_token_claims", False):
+                return asyncio.run(get_current_principal(token=self.token, db=other))
+        finally:
+            other.close()
+    
+    def test_user_change_invalidates_after_commit(self):
+        """Test that a stale principal cached while a user change was in flight is dropped on commit."""
+        self._authenticate(trust_claims=False)
+        
+        self.user.is_active = False
+        self.db.flush()
+        self.assertIsNone(principal_cache.get(self.user.id))
+        
+        self.assertTrue(self._recache_from_other_session().is_active)
+        self.assertTrue(principal_cache.get(self.user.id)["user"]["is_active"])
+        
+        self.db.commit()
+        self.assertIsNone(principal_cache.get(self.user.id))
+    
+    def test_company_change_invalidates_after_commit(self):
+        """Test that a stale principal cached while a company change was in flight is dropped on commit."""
+        self._authenticate(trust_claims=False)
+        
+        self.company.name = f"{self.company.name} Renamed"
+        self.db.flush()
+        self.assertIsNone(principal_cache.get(self.user.id))
+        
+        self._recache_from_other_session()
+        self.assertIsNotNone(principal_cache.get(self.user.id))
+        
+        self.db.commit()
+        self.assertIsNone(principal_cache.get(self.user.id))
+    
+    def test_rolled_back_change_is_not_replayed(self):
+        """Test that invalidations of a rolled back change are discarded."""
+        self.user.name = "Renamed Manager"
+        self.db.flush()
+        self.db.rollback()
+        
+        self._authenticate(trust_claims=False)
+        self.db.commit()
+        self.assertIsNotNone(principal_cache.get(self.user.id))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Unit tests for memoized decryption of encrypted model fields.
+
+These tests verify that:
+1. Each ciphertext is decrypted at most once per instance
+2. Setters keep the memo in sync with the new value
+3. A changed ciphertext or an expired instance is never served stale
+4. Bulk decryption of a page primes every row's memo, inline or pooled
+"""
+
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import encryption
+from models.job_ticket import JobTicket
+
+class TestDecryptionMemo(unittest.TestCase):
+    """Test case for per-instance decryption memoization."""
+    
+    def setUp(self):
+        """Create a ticket whose memo starts empty."""
+        self.ticket = JobTicket(company_id=1, company_name="Acme", location="12 Elm St")
+        encryption.clear_decrypted(self.ticket)
+    
+    def test_decrypts_once(self):
+        """Test that repeated reads decrypt a ciphertext only once."""
+        with mock.patch.object(encryption, "decrypt_field", wraps=encryption.decrypt_field) as decrypt:
+            for _ in range(5):
+                self.assertEqual(self.ticket.location, "12 Elm St")
+        self.assertEqual(decrypt.call_count, 1)
+    
+    def test_setter_updates_memo(self):
+        """Test that a write is readable back without decrypting."""
+        self.ticket.location = "99 Oak Ave"
+        with mock.patch.object(encryption, "decrypt_field", wraps=encryption.decrypt_field) as decrypt:
+            self.assertEqual(self.ticket.location, "99 Oak Ave")
+        self.assertEqual(decrypt.call_count, 0)
+        
+        self.ticket.location = None
+        self.assertIsNone(self.ticket.location)
+    
+    def test_changed_ciphertext_is_decrypted_again(self):
+        """Test that replacing the raw column bypasses the stale memo."""
+        self.assertEqual(self.ticket.location, "12 Elm St")
+        self.ticket._encrypted_location = encryption.encrypt_field("7 Pine Rd")
+        self.assertEqual(self.ticket.location, "7 Pine Rd")
+    
+    def test_clear_drops_memo(self):
+        """Test that clearing (as refresh/expire do) forces a new decrypt."""
+        self.assertEqual(self.ticket.location, "12 Elm St")
+        encryption.clear_decrypted(self.ticket)
+        with mock.patch.object(encryption, "decrypt_field", wraps=encryption.decrypt_field) as decrypt:
+            self.assertEqual(self.ticket.location, "12 Elm St")
+        self.assertEqual(decrypt.call_count, 1)
+
+class TestDecryptRows(unittest.TestCase):
+    """Test case for one-pass decryption of a result page."""
+    
+    def setUp(self):
+        """Create a page of tickets with cold memos."""
+        self.tickets = [
+            JobTicket(company_id=1, company_name=f"Acme {i}", location=f"{i} Elm St", work_description=f"Job {i}")
+            for i in range(6)
+        ]
+        for ticket in self.tickets:
+            encryption.clear_decrypted(ticket)
+    
+    def _assert_primed(self):
+        with mock.patch.object(encryption, "decrypt_field", wraps=encryption.decrypt_field) as decrypt:
+            for i, ticket in enumerate(self.tickets):
+                self.assertEqual(ticket.company_name, f"Acme {i}")
+                self.assertEqual(ticket.location, f"{i} Elm St")
+                self.assertEqual(ticket.work_description, f"Job {i}")
+        self.assertEqual(decrypt.call_count, 0)
+    
+    def test_inline(self):
+        """Test that a small page is decrypted inline and fully memoized."""
+        self.assertEqual(encryption.decrypt_rows(self.tickets, workers=0), 12)
+        self._assert_primed()
+        self.assertEqual(encryption.decrypt_rows(self.tickets, workers=0), 0)
+    
+    def test_pooled(self):
+        """Test that the worker pool preserves value order across chunks."""
+        with mock.patch.object(encryption.settings.security, "decrypt_parallel_min_values", 1):
+            self.assertEqual(encryption.decrypt_rows(self.tickets, workers=4), 12)
+        self._assert_primed()
+
+if __name__ == "__main__":
+    unittest.main()
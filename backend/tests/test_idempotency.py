@@ -0,0 +1,247 @@
+"""
+Unit tests for Idempotency-Key handling on create endpoints.
+
+These tests verify that:
+1. A retry with the same key returns the stored response and creates nothing
+2. Reusing a key for a different request is rejected with 422
+3. Concurrent requests with the same key run the handler once
+4. A failed request gives its key up, so a retry runs again
+5. Stale reservations are taken over and expired keys reused, while a key
+   still held past the wait is answered with 409
+6. Invoice creation is idempotent too
+7. Keys scoped by request body never clash between different requests
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest import mock
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes.job_tickets as job_ticket_routes
+from core.idempotency import REPLAYED_HEADER, IdempotencyStore, payload_scope, request_hash
+from core.principal import Principal
+from database import SessionLocal
+from models.company import Company
+from models.idempotency_key import IdempotencyKey
+from models.invoice import Invoice
+from models.job_ticket import JobTicket
+from models.user import User
+from routes.invoices import create_invoice, update_invoice
+from routes.job_tickets import create_job_ticket
+from schemas.invoice import InvoiceCreate, InvoiceResponse, InvoiceUpdate
+from schemas.job_ticket import JobTicketAccepted, JobTicketCreate
+
+class TestIdempotency(unittest.TestCase):
+    """Test case for Idempotency-Key handling."""
+    
+    def setUp(self):
+        """Create a technician and a key for the test's submissions."""
+        self.db = SessionLocal()
+        self.suffix = uuid.uuid4().hex[:8]
+        self.key = f"key-{self.suffix}"
+        self.company = Company(name=f"Idem Co {self.suffix}", normalized_name=f"idem co {self.suffix}")
+        self.db.add(self.company)
+        self.db.commit()
+        self.user = User(email=f"idem-{self.suffix}@example.com", hashed_password="not-a-real-hash",
+                         role="tech", company_id=self.company.id)
+        self.db.add(self.user)
+        self.db.commit()
+        self.principal = Principal(id=self.user.id, email=self.user.email, role="tech", company_id=self.company.id)
+        self.scope = f"job_tickets.create:{self.user.id}"
+    
+    def tearDown(self):
+        """Remove the test rows."""
+        self.db.rollback()
+        self.db.query(IdempotencyKey).filter(IdempotencyKey.key.like(f"%{self.suffix}%")).delete(synchronize_session=False)
+        self.db.query(JobTicket).filter(JobTicket.company_id == self.company.id).delete()
+        self.db.query(Invoice).filter(Invoice.user_id == self.user.id).delete()
+        self.db.delete(self.user)
+        self.db.delete(self.company)
+        self.db.commit()
+        self.db.close()
+    
+    def _ticket(self, **overrides):
+        return JobTicketCreate(**{
+            "company_name": "Acme",
+            "location": "12 Retry Road",
+            "work_description": "Replaced filter",
+            "submitted_by": "Pat Customer",
+            "status": "submitted",
+            **overrides,
+        })
+    
+    def _submit(self, ticket=None, key=None, db=None):
+        return asyncio.run(create_job_ticket(
+            job_ticket=ticket or self._ticket(), idempotency_key=key or self.key,
+            current_user=self.principal, db=db or self.db
+        ))
+    
+    def _tickets(self):
+        self.db.expire_all()
+        return self.db.query(JobTicket).filter(JobTicket.company_id == self.company.id).all()
+    
+    def _stored_key(self):
+        self.db.expire_all()
+        return self.db.query(IdempotencyKey).filter(IdempotencyKey.key == self.key).first()
+    
+    def test_retry_returns_stored_response(self):
+        """Test that a retried submission is answered from the stored response."""
+        first = self._submit()
+        with mock.patch.object(job_ticket_routes, "generate_ticket_number") as generate:
+            retry = self._submit()
+        
+        self.assertIsInstance(retry, JSONResponse)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.headers[REPLAYED_HEADER], "true")
+        body = json.loads(retry.body)
+        self.assertEqual((body["id"], body["ticket_number"], body["location"]),
+                         (first.id, first.ticket_number, "12 Retry Road"))
+        generate.assert_not_called()
+        self.assertEqual(len(self._tickets()), 1)
+        self.assertNotIn(b"Retry Road", self._stored_key().response_body,
+                         "Stored responses should be encrypted")
+    
+    def test_key_reused_for_different_request(self):
+        """Test that a key cannot be replayed for a different body."""
+        self._submit()
+        with self.assertRaises(HTTPException) as raised:
+            self._submit(self._ticket(work_description="Something else"))
+        self.assertEqual(raised.exception.status_code, 422)
+        self.assertEqual(len(self._tickets()), 1)
+    
+    def test_concurrent_requests_run_once(self):
+        """Test that requests sharing a key while the first is running do not run again."""
+        generate = job_ticket_routes.generate_ticket_number
+        
+        def slow_generate(db):
+            time.sleep(0.3)
+            return generate(db)
+        
+        def submit(_):
+            db = SessionLocal()
+            try:
+                response = self._submit(db=db)
+                return json.loads(response.body)["id"] if isinstance(response, JSONResponse) else response.id
+            finally:
+                db.close()
+        
+        with mock.patch.object(job_ticket_routes, "generate_ticket_number", side_effect=slow_generate):
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                ids = list(executor.map(submit, range(3)))
+        
+        self.assertEqual(len(set(ids)), 1, "Every request should get the first request's ticket")
+        self.assertEqual(len(self._tickets()), 1)
+    
+    def test_failed_request_releases_key(self):
+        """Test that a failed request leaves nothing behind for its retry to replay."""
+        with mock.patch.object(job_ticket_routes, "generate_ticket_number", side_effect=RuntimeError("boom")):
+            with self.assertRaises(HTTPException) as raised:
+                self._submit()
+        self.assertEqual(raised.exception.status_code, 500)
+        self.assertIsNone(self._stored_key())
+        
+        retry = self._submit()
+        self.assertNotIsInstance(retry, JSONResponse)
+        self.assertEqual(len(self._tickets()), 1)
+    
+    def test_stale_expired_and_busy_keys(self):
+        """Test takeover of dead reservations, reuse of expired keys and 409 while a key is busy."""
+        now = datetime.utcnow()
+        digest = request_hash(self._ticket())
+        self.db.add(IdempotencyKey(scope=self.scope, key=self.key, request_hash=digest, owner="dead",
+                                   locked_at=now - timedelta(hours=1), expires_at=now + timedelta(hours=1)))
+        self.db.commit()
+        self.assertNotIsInstance(self._submit(), JSONResponse, "A dead request's key should be taken over")
+        self.assertEqual(self._stored_key().state, "completed")
+        
+        self.db.query(IdempotencyKey).filter(IdempotencyKey.key == self.key).update(
+            {"expires_at": now - timedelta(minutes=1)}
+        )
+        self.db.commit()
+        self._submit(self._ticket(work_description="Second visit"))
+        self.assertEqual(len(self._tickets()), 2, "An expired key should be usable for a new request")
+        
+        store = IdempotencyStore(ttl_seconds=60, lock_timeout_seconds=60, wait_seconds=0.1)
+        busy = f"busy-{self.suffix}"
+        held = asyncio.run(store.reserve(self.db, busy, "tests", {"n": 1}))
+        self.assertIsNotNone(held.key_id)
+        with self.assertRaises(HTTPException) as raised:
+            asyncio.run(store.reserve(self.db, busy, "tests", {"n": 1}))
+        self.assertEqual(raised.exception.status_code, 409)
+        self.assertEqual(store.stats()["in_progress"], 1)
+        held.release(self.db)
+    
+    def test_body_scoped_keys(self):
+        """Test that a body-scoped key reused for another body starts afresh instead of a 422."""
+        store = IdempotencyStore(ttl_seconds=60, lock_timeout_seconds=60, wait_seconds=0.1)
+        shared = f"shared-{self.suffix}"
+        first, second = {"location": "1 Main St"}, {"location": "2 Main St"}
+        
+        reservation = asyncio.run(store.reserve(self.db, shared, payload_scope("tests.submit", first), first))
+        reservation.complete(self.db, 202, JobTicketAccepted(ticket_number="JT-1"))
+        self.db.commit()
+        
+        other = asyncio.run(store.reserve(self.db, shared, payload_scope("tests.submit", second), second))
+        self.assertIsNotNone(other.key_id)
+        self.assertNotEqual(other.key_id, reservation.key_id)
+        other.release(self.db)
+        
+        retry = asyncio.run(store.reserve(self.db, shared, payload_scope("tests.submit", first), first))
+        self.assertEqual(json.loads(retry.replay.body)["ticket_number"], "JT-1")
+        self.assertEqual(store.stats()["mismatched"], 0)
+    
+    def test_invoice_create(self):
+        """Test that a retried invoice creation returns the first invoice."""
+        invoice_data = InvoiceCreate(
+            invoice_number=f"INV-{self.suffix}", invoice_date=datetime(2026, 5, 1), customer_name="Pat",
+            company_name="Acme", subtotal=100.0, total_amount=100.0, created_by="Manager"
+        )
+        
+        first = asyncio.run(create_invoice(
+            invoice_data=invoice_data, idempotency_key=self.key, db=self.db, current_user=self.principal
+        ))
+        retry = asyncio.run(create_invoice(
+            invoice_data=invoice_data, idempotency_key=self.key, db=self.db, current_user=self.principal
+        ))
+        self.assertEqual(json.loads(retry.body)["id"], first.id)
+        self.assertEqual(self.db.query(Invoice).filter(Invoice.user_id == self.user.id).count(), 1)
+    
+    def test_invoice_update_round_trip(self):
+        """Test that updated line items and ticket ids are stored and returned as lists."""
+        invoice = asyncio.run(create_invoice(
+            invoice_data=InvoiceCreate(
+                invoice_number=f"INV-{self.suffix}", invoice_date=datetime(2026, 5, 1), customer_name="Pat",
+                company_name="Acme", subtotal=100.0, total_amount=100.0, created_by="Manager",
+                line_items=[{"description": "Labor", "rate": 50.0, "quantity": 2, "cost": 100.0}]
+            ),
+            idempotency_key=None, db=self.db, current_user=self.principal
+        ))
+        
+        line_items = [{"description": "Parts", "rate": 20.0, "quantity": 3.0, "cost": 60.0}]
+        updated = asyncio.run(update_invoice(
+            invoice_id=invoice.id,
+            invoice_data=InvoiceUpdate(line_items=line_items, job_ticket_ids=[4, 5]),
+            db=self.db, current_user=self.principal
+        ))
+        response = InvoiceResponse.model_validate(updated)
+        self.assertEqual(response.line_items, line_items)
+        self.assertEqual(response.job_ticket_ids, [4, 5])
+        
+        self.db.expire_all()
+        stored = self.db.get(Invoice, invoice.id)
+        self.assertEqual((stored.line_items, stored.job_ticket_ids), (line_items, [4, 5]))
+
+if __name__ == "__main__":
+    unittest.main()
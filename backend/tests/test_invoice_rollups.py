@@ -0,0 +1,135 @@
+"""
+Unit tests for incrementally maintained invoice rollups.
+
+These tests verify that:
+1. Creating, updating and deleting invoices keeps rollup buckets exact
+2. Status and month changes move an invoice between buckets
+3. The summary matches a full rebuild from the invoices
+"""
+
+import unittest
+import sys
+import os
+import uuid
+from datetime import datetime
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.invoice_rollups import (
+    apply_invoice_rollup, invoice_rollup_entry, invoice_summary, rebuild_invoice_rollups
+)
+from database import SessionLocal
+from models.company import Company
+from models.invoice import Invoice
+from models.invoice_rollup import InvoiceRollup
+from models.user import User
+
+class TestInvoiceRollups(unittest.TestCase):
+    """Test case for invoice rollup maintenance."""
+    
+    def setUp(self):
+        """Create a company and a manager to own invoices."""
+        self.db = SessionLocal()
+        suffix = uuid.uuid4().hex[:8]
+        self.company = Company(name=f"Rollup Co {suffix}", normalized_name=f"rollup co {suffix}")
+        self.db.add(self.company)
+        self.db.commit()
+        self.user = User(
+            email=f"rollup-{suffix}@example.com",
+            hashed_password="not-a-real-hash",
+            role="manager",
+            company_id=self.company.id
+        )
+        self.db.add(self.user)
+        self.db.commit()
+    
+    def tearDown(self):
+        """Remove invoices, rollups, the manager and the company."""
+        self.db.query(Invoice).filter(Invoice.user_id == self.user.id).delete()
+        self.db.query(InvoiceRollup).filter(InvoiceRollup.company_id == self.company.id).delete()
+        self.db.delete(self.user)
+        self.db.delete(self.company)
+        self.db.commit()
+        self.db.close()
+    
+    def _create(self, number, month, subtotal, status="draft"):
+        invoice = Invoice(
+            user_id=self.user.id,
+            invoice_number=f"{number}-{uuid.uuid4().hex[:6]}",
+            invoice_date=datetime(2026, month, 15),
+            customer_name="Customer",
+            company_name="Acme",
+            subtotal=subtotal,
+            service_fee=10.0,
+            tax=round(subtotal * 0.1, 2),
+            total_amount=round(subtotal * 1.1 + 10.0, 2),
+            status=status,
+            created_by="test"
+        )
+        self.db.add(invoice)
+        apply_invoice_rollup(self.db, self.company.id, None, invoice_rollup_entry(invoice))
+        self.db.commit()
+        return invoice
+    
+    def _update(self, invoice, **changes):
+        before = invoice_rollup_entry(invoice)
+        for field, value in changes.items():
+            setattr(invoice, field, value)
+        apply_invoice_rollup(self.db, self.company.id, before, invoice_rollup_entry(invoice))
+        self.db.commit()
+    
+    def _summary(self):
+        return invoice_summary(self.db, self.company.id)
+    
+    def test_create_accumulates(self):
+        """Test that invoices in the same bucket are summed."""
+        self._create("A", 1, 100.0)
+        self._create("B", 1, 50.25)
+        self._create("C", 2, 10.0, status="paid")
+        
+        summary = self._summary()
+        self.assertEqual(
+            [(p["month"], p["status"], p["invoice_count"]) for p in summary["periods"]],
+            [("2026-01", "draft", 2), ("2026-02", "paid", 1)]
+        )
+        self.assertAlmostEqual(summary["periods"][0]["subtotal"], 150.25)
+        self.assertEqual(summary["totals"]["invoice_count"], 3)
+        self.assertAlmostEqual(summary["totals"]["service_fee"], 30.0)
+    
+    def test_update_moves_between_buckets(self):
+        """Test that status, date and amount changes are reflected."""
+        invoice = self._create("A", 1, 100.0)
+        self._update(invoice, subtotal=120.0)
+        self.assertAlmostEqual(self._summary()["periods"][0]["subtotal"], 120.0)
+        
+        self._update(invoice, status="paid", invoice_date=datetime(2026, 3, 1))
+        periods = self._summary()["periods"]
+        self.assertEqual([(p["month"], p["status"]) for p in periods], [("2026-03", "paid")])
+        self.assertAlmostEqual(periods[0]["subtotal"], 120.0)
+    
+    def test_delete_removes_contribution(self):
+        """Test that a deleted invoice no longer counts."""
+        keep = self._create("A", 1, 100.0)
+        gone = self._create("B", 1, 40.0)
+        apply_invoice_rollup(self.db, self.company.id, invoice_rollup_entry(gone), None)
+        self.db.delete(gone)
+        self.db.commit()
+        
+        totals = self._summary()["totals"]
+        self.assertEqual(totals["invoice_count"], 1)
+        self.assertAlmostEqual(totals["subtotal"], keep.subtotal)
+    
+    def test_rebuild_matches_incremental(self):
+        """Test that a rebuild from invoices gives the same summary."""
+        invoice = self._create("A", 1, 99.99)
+        self._create("B", 2, 0.01, status="sent")
+        self._update(invoice, status="sent", tax=1.23)
+        incremental = self._summary()
+        
+        rebuild_invoice_rollups(self.db, self.company.id)
+        self.db.commit()
+        self.assertEqual(self._summary(), incremental)
+
+if __name__ == "__main__":
+    unittest.main()
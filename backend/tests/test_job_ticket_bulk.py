@@ -0,0 +1,171 @@
+"""
+Unit tests for bulk job ticket submission.
+
+These tests verify that:
+1. Valid tickets are created with unique ticket numbers while invalid ones
+   are reported by position without stopping the batch
+2. The tickets of a batch are inserted with a single INSERT statement
+3. A ticket that violates a constraint is isolated and the rest still commit
+4. Oversized batches and users without a company are rejected
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import uuid
+from unittest import mock
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import event
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.blind_index import token_match
+from core.principal import Principal
+from database import SessionLocal, engine
+from models.company import Company
+from models.job_ticket import JobTicket
+from models.user import User
+from routes.job_tickets import bulk_submit_job_tickets
+from schemas.job_ticket import BULK_SUBMIT_MAX_TICKETS, JobTicketBulkSubmit
+from utils.ticket_number import ticket_number_allocator
+
+def ticket(i, **overrides):
+    return {
+        "company_name": "Acme",
+        "location": f"{i} Orchard Lane",
+        "work_description": f"Serviced unit {i}",
+        "submitted_by": "Pat Customer",
+        "travel_total_hours": 0.5,
+        **overrides,
+    }
+
+class TestBulkSubmit(unittest.TestCase):
+    """Test case for POST /job-tickets/bulk."""
+    
+    def setUp(self):
+        """Create a technician."""
+        self.db = SessionLocal()
+        suffix = uuid.uuid4().hex[:8]
+        self.company = Company(name=f"Bulk Co {suffix}", normalized_name=f"bulk co {suffix}")
+        self.db.add(self.company)
+        self.db.commit()
+        self.user = User(
+            email=f"bulk-{suffix}@example.com",
+            hashed_password="not-a-real-hash",
+            role="tech",
+            company_id=self.company.id
+        )
+        self.db.add(self.user)
+        self.db.commit()
+        self.principal = Principal(
+            id=self.user.id, email=self.user.email, role="tech", company_id=self.company.id
+        )
+    
+    def tearDown(self):
+        """Remove the test rows."""
+        self.db.rollback()
+        self.db.query(JobTicket).filter(JobTicket.company_id == self.company.id).delete()
+        self.db.delete(self.user)
+        self.db.delete(self.company)
+        self.db.commit()
+        self.db.close()
+    
+    def _submit(self, tickets, principal=None):
+        return asyncio.run(bulk_submit_job_tickets(
+            payload=JobTicketBulkSubmit(tickets=tickets),
+            current_user=principal or self.principal,
+            db=self.db
+        ))
+    
+    def _stored(self):
+        self.db.expire_all()
+        return self.db.query(JobTicket).filter(JobTicket.company_id == self.company.id).order_by(JobTicket.id).all()
+    
+    def test_partial_failure(self):
+        """Test that invalid tickets are reported while the valid ones are created."""
+        response = self._submit([
+            ticket(0),
+            ticket(1, submitted_by=None),
+            ticket(2),
+            ticket(3, work_description=None),
+            ticket(4, company_name=None),
+            ticket(5, status="bogus"),
+            ticket(6),
+        ])
+        
+        self.assertEqual((response["created"], response["failed"]), (3, 4))
+        results = response["results"]
+        self.assertEqual([result["index"] for result in results], list(range(7)))
+        self.assertEqual([result["success"] for result in results], [True, False, True, False, False, False, True])
+        self.assertIn("submitted_by", results[1]["error"])
+        self.assertEqual(results[3]["error"], "Work description is required")
+        self.assertEqual(results[4]["error"], "Company name is required")
+        
+        stored = self._stored()
+        self.assertEqual([t.id for t in stored], [results[i]["id"] for i in (0, 2, 6)])
+        self.assertEqual([t.location for t in stored], ["0 Orchard Lane", "2 Orchard Lane", "6 Orchard Lane"])
+        self.assertEqual({t.status for t in stored}, {"submitted"})
+        self.assertEqual(stored[0].drive_total_hours, 0.5)
+        self.assertEqual(len({t.ticket_number for t in stored}), 3)
+        self.assertEqual(stored[0].user_id, self.user.id)
+        
+        found = self.db.query(JobTicket.id).filter(token_match(JobTicket, "location", "2 orchard")).all()
+        self.assertEqual([row.id for row in found], [results[2]["id"]])
+        
+        response = self._submit([ticket(7, submitted_by=None)])
+        self.assertEqual((response["created"], response["failed"]), (0, 1))
+        self.assertEqual(len(self._stored()), 3)
+    
+    def test_single_insert_statement(self):
+        """Test that a batch's tickets are written with one INSERT."""
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            response = self._submit([ticket(i) for i in range(60)])
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        
+        self.assertEqual(response["created"], 60)
+        inserts = [s for s in statements if s.lstrip().startswith("INSERT INTO job_tickets ")]
+        self.assertEqual(len(inserts), 1, "Tickets should be inserted in a single batch")
+        self.assertEqual(len(self._stored()), 60)
+    
+    def test_constraint_violation_is_isolated(self):
+        """Test that a ticket failing a constraint does not take the batch down with it."""
+        self.db.add(JobTicket(company_id=self.company.id, company_name="Acme", ticket_number="81000002"))
+        self.db.commit()
+        
+        numbers = ["81000001", "81000002", "81000003"]
+        with mock.patch.object(ticket_number_allocator, "allocate_many", return_value=numbers):
+            response = self._submit([ticket(0), ticket(1), ticket(2)])
+        
+        self.assertEqual((response["created"], response["failed"]), (2, 1))
+        self.assertFalse(response["results"][1]["success"])
+        self.assertIn("constraint", response["results"][1]["error"])
+        self.assertEqual(
+            sorted(t.ticket_number for t in self._stored() if t.location),
+            ["81000001", "81000003"]
+        )
+    
+    def test_rejected_requests(self):
+        """Test batch size and company checks."""
+        with self.assertRaises(ValidationError):
+            JobTicketBulkSubmit(tickets=[ticket(i) for i in range(BULK_SUBMIT_MAX_TICKETS + 1)])
+        with self.assertRaises(ValidationError):
+            JobTicketBulkSubmit(tickets=[])
+        
+        no_company = Principal(id=self.user.id, email=self.user.email, role="tech", company_id=None)
+        with self.assertRaises(HTTPException) as raised:
+            self._submit([ticket(0)], principal=no_company)
+        self.assertEqual(raised.exception.status_code, 400)
+
+if __name__ == "__main__":
+    unittest.main()
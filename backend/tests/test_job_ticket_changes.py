@@ -0,0 +1,206 @@
+"""
+Unit tests for the job ticket change feed.
+
+These tests verify that:
+1. A full sync pages through every ticket oldest change first, and the next
+   sync returns only tickets changed since
+2. Changes newer than the settle window wait for a later sync
+3. Deleted tickets are reported once as tombstones, and expired tombstones
+   are pruned
+4. Technicians only receive their own tickets and deletions
+5. Expired cursors are rejected with 410 and malformed ones with 400
+6. Cursor timestamps at any UTC offset name the same position
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from fastapi import HTTPException
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import settings
+from core.principal import Principal
+from database import SessionLocal
+from models.company import Company
+from models.job_ticket import JobTicket
+from models.job_ticket_tombstone import JobTicketTombstone
+from models.user import User
+from routes.job_tickets import delete_job_ticket, get_job_ticket_changes, update_job_ticket
+from schemas.job_ticket import JobTicketUpdate
+from utils.pagination import decode_sync_cursor, encode_sync_cursor
+
+class TestJobTicketChanges(unittest.TestCase):
+    """Test case for GET /job-tickets/changes."""
+    
+    def setUp(self):
+        """Create a manager, a technician and tickets changed a minute apart."""
+        self.db = SessionLocal()
+        suffix = uuid.uuid4().hex[:8]
+        self.company = Company(name=f"Sync Co {suffix}", normalized_name=f"sync co {suffix}")
+        self.db.add(self.company)
+        self.db.commit()
+        self.manager = User(email=f"sync-mgr-{suffix}@example.com", hashed_password="not-a-real-hash",
+                            role="manager", company_id=self.company.id)
+        self.tech = User(email=f"sync-tech-{suffix}@example.com", hashed_password="not-a-real-hash",
+                         role="tech", company_id=self.company.id)
+        self.db.add_all([self.manager, self.tech])
+        self.db.commit()
+        
+        base = datetime.now(timezone.utc) - timedelta(hours=1)
+        self.tickets = [
+            JobTicket(company_id=self.company.id, user_id=(self.tech if i % 2 else self.manager).id,
+                      company_name="Acme", location=f"{i} Main St", updated_at=base + timedelta(minutes=i))
+            for i in range(5)
+        ]
+        self.db.add_all(self.tickets)
+        self.db.commit()
+        
+        self.manager_principal = Principal(
+            id=self.manager.id, email=self.manager.email, role="manager", company_id=self.company.id
+        )
+        self.tech_principal = Principal(
+            id=self.tech.id, email=self.tech.email, role="tech", company_id=self.company.id
+        )
+    
+    def tearDown(self):
+        """Remove the test rows."""
+        self.db.rollback()
+        self.db.query(JobTicketTombstone).filter(JobTicketTombstone.company_id == self.company.id).delete()
+        self.db.query(JobTicket).filter(JobTicket.company_id == self.company.id).delete()
+        self.db.delete(self.manager)
+        self.db.delete(self.tech)
+        self.db.delete(self.company)
+        self.db.commit()
+        self.db.close()
+    
+    def _sync(self, since=None, limit=500, principal=None):
+        self.db.expire_all()
+        return asyncio.run(get_job_ticket_changes(
+            since=since, limit=limit, current_user=principal or self.manager_principal, db=self.db
+        ))
+    
+    def _sync_all(self, since=None, limit=500, principal=None):
+        """Follow has_more to the end; returns changed ids, deleted ids and the final cursor"""
+        changed, deleted = [], []
+        while True:
+            page = self._sync(since, limit, principal)
+            changed.extend(ticket["id"] for ticket in page["changes"])
+            deleted.extend(tombstone["id"] for tombstone in page["deleted"])
+            since = page["next_cursor"]
+            if not page["has_more"]:
+                return changed, deleted, since
+    
+    def _raw_cursor(self, timestamp, row_id, deletions):
+        """A sync cursor as a client might have stored it, timestamp text and all"""
+        payload = {"t": [timestamp, row_id], "d": [deletions[0].isoformat(), deletions[1]]}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+    
+    def _delete(self, ticket):
+        asyncio.run(delete_job_ticket(job_ticket_id=ticket.id, current_user=self.manager_principal, db=self.db))
+    
+    def test_full_then_incremental_sync(self):
+        """Test that a full sync returns every ticket and the next only what changed."""
+        first = self._sync(limit=2)
+        self.assertTrue(first["has_more"])
+        self.assertEqual(first["changes"][0]["location"], "0 Main St")
+        
+        changed, deleted, cursor = self._sync_all(limit=2)
+        self.assertEqual(changed, [ticket.id for ticket in self.tickets])
+        self.assertEqual(deleted, [])
+        self.assertEqual(self._sync_all(cursor)[:2], ([], []))
+        
+        asyncio.run(update_job_ticket(
+            job_ticket_id=self.tickets[1].id, job_ticket_update=JobTicketUpdate(company_name="Acme", location="1 Side St"),
+            current_user=self.manager_principal, db=self.db
+        ))
+        with mock.patch.object(settings.app, "sync_settle_seconds", 0.0):
+            page = self._sync(cursor)
+        self.assertEqual([ticket["id"] for ticket in page["changes"]], [self.tickets[1].id])
+        self.assertEqual(page["changes"][0]["location"], "1 Side St")
+        self.assertFalse(page["has_more"])
+    
+    def test_settle_window(self):
+        """Test that a change still inside the settle window is held back, not skipped."""
+        _, _, cursor = self._sync_all()
+        self.db.add(JobTicket(company_id=self.company.id, user_id=self.manager.id, company_name="Acme"))
+        self.db.commit()
+        
+        changed, _, cursor = self._sync_all(cursor)
+        self.assertEqual(changed, [], "A change newer than the settle window should wait")
+        with mock.patch.object(settings.app, "sync_settle_seconds", 0.0):
+            changed, _, _ = self._sync_all(cursor)
+        self.assertEqual(len(changed), 1, "The held back change should arrive on a later sync")
+    
+    def test_deletions(self):
+        """Test that deletions are reported once and old tombstones are pruned."""
+        _, _, cursor = self._sync_all()
+        expired = JobTicketTombstone(ticket_id=999999, company_id=self.company.id,
+                                     deleted_at=datetime.now(timezone.utc) - timedelta(days=60))
+        self.db.add(expired)
+        self.db.commit()
+        self._delete(self.tickets[2])
+        
+        self.assertIsNone(
+            self.db.query(JobTicketTombstone).filter(JobTicketTombstone.ticket_id == 999999).first(),
+            "Tombstones older than the retention period should be pruned"
+        )
+        with mock.patch.object(settings.app, "sync_settle_seconds", 0.0):
+            changed, deleted, cursor = self._sync_all(cursor)
+            self.assertEqual((changed, deleted), ([], [self.tickets[2].id]))
+            self.assertEqual(self._sync_all(cursor)[:2], ([], []))
+            
+            changed, deleted, _ = self._sync_all()
+        self.assertNotIn(self.tickets[2].id, changed)
+    
+    def test_tech_sees_own_tickets(self):
+        """Test that technicians only sync their own tickets and deletions."""
+        with mock.patch.object(settings.app, "sync_settle_seconds", 0.0):
+            changed, _, cursor = self._sync_all(principal=self.tech_principal)
+            self.assertEqual(changed, [self.tickets[1].id, self.tickets[3].id])
+            
+            self._delete(self.tickets[0])
+            self._delete(self.tickets[3])
+            changed, deleted, _ = self._sync_all(cursor, principal=self.tech_principal)
+        self.assertEqual((changed, deleted), ([], [self.tickets[3].id]))
+    
+    def test_expired_and_invalid_cursors(self):
+        """Test that cursors older than tombstone retention get 410 and garbage gets 400."""
+        old = datetime.now(timezone.utc) - timedelta(days=settings.app.sync_tombstone_retention_days + 1)
+        with self.assertRaises(HTTPException) as raised:
+            self._sync(encode_sync_cursor((old, None), (old, None)))
+        self.assertEqual(raised.exception.status_code, 410)
+        
+        for cursor in ("not-a-cursor", "e30", encode_sync_cursor((old, None), (None, None))[:-4]):
+            with self.assertRaises(HTTPException) as raised:
+                self._sync(cursor)
+            self.assertEqual(raised.exception.status_code, 400)
+    
+    def test_cursor_offsets(self):
+        """Test that a cursor written at a non-UTC offset resumes at the same row."""
+        page = self._sync(limit=2)
+        changes, deletions = decode_sync_cursor(page["next_cursor"])
+        self.assertEqual(changes[0].utcoffset(), timedelta(0))
+        
+        # The same instant written at UTC+05:30, and as naive UTC
+        india = timezone(timedelta(hours=5, minutes=30))
+        shifted = self._raw_cursor(changes[0].astimezone(india).isoformat(), changes[1], deletions)
+        naive = self._raw_cursor(changes[0].replace(tzinfo=None).isoformat(), changes[1], deletions)
+        self.assertIn("+05:30", base64.urlsafe_b64decode(shifted + "==").decode())
+        self.assertEqual(decode_sync_cursor(shifted), (changes, deletions))
+        self.assertEqual(decode_sync_cursor(naive), (changes, deletions))
+        
+        expected = [ticket.id for ticket in self.tickets[2:]]
+        for cursor in (page["next_cursor"], shifted, naive):
+            self.assertEqual(self._sync_all(cursor, limit=2)[0], expected)
+
+if __name__ == "__main__":
+    unittest.main()
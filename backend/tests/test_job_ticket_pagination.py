@@ -0,0 +1,132 @@
+"""
+Unit tests for keyset pagination of the job ticket list.
+
+These tests verify that:
+1. Following next_cursor visits every ticket once, newest first, including
+   tickets that share a created_at
+2. The total is only counted when include_total is set
+3. A cursor keeps working after its row is deleted
+4. A malformed cursor is rejected with 400
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.principal import Principal
+from database import SessionLocal
+from models.company import Company
+from models.job_ticket import JobTicket
+from models.user import User
+from routes.job_tickets import get_job_tickets
+from utils.pagination import decode_cursor, encode_cursor
+
+class TestJobTicketPagination(unittest.TestCase):
+    """Test case for cursor pagination of GET /job-tickets."""
+    
+    def setUp(self):
+        """Create a manager with tickets, some sharing a created_at."""
+        self.db = SessionLocal()
+        suffix = uuid.uuid4().hex[:8]
+        self.company = Company(name=f"Pages Co {suffix}", normalized_name=f"pages co {suffix}")
+        self.db.add(self.company)
+        self.db.commit()
+        self.user = User(
+            email=f"pages-{suffix}@example.com",
+            hashed_password="not-a-real-hash",
+            role="manager",
+            company_id=self.company.id
+        )
+        self.db.add(self.user)
+        self.db.commit()
+        
+        base = datetime(2026, 3, 1, 12, 0, 0)
+        created = [base, base, base + timedelta(minutes=1), base + timedelta(minutes=2),
+                   base + timedelta(minutes=2), base + timedelta(minutes=2), base + timedelta(minutes=3)]
+        tickets = [
+            JobTicket(company_id=self.company.id, user_id=self.user.id, company_name="Acme",
+                      location=f"{i} Main St", created_at=created_at)
+            for i, created_at in enumerate(created)
+        ]
+        # Stored with the server default timestamp rather than a bound value
+        tickets.append(JobTicket(company_id=self.company.id, user_id=self.user.id, company_name="Acme"))
+        self.db.add_all(tickets)
+        self.db.commit()
+        self.expected = [
+            ticket.id for ticket in sorted(tickets, key=lambda t: (t.created_at, t.id), reverse=True)
+        ]
+        
+        self.principal = Principal(
+            id=self.user.id, email=self.user.email, role="manager", company_id=self.company.id
+        )
+    
+    def tearDown(self):
+        """Remove the test rows."""
+        self.db.rollback()
+        self.db.query(JobTicket).filter(JobTicket.company_id == self.company.id).delete()
+        self.db.delete(self.user)
+        self.db.delete(self.company)
+        self.db.commit()
+        self.db.close()
+    
+    def _page(self, limit, cursor=None, include_total=False):
+        self.db.expire_all()
+        return asyncio.run(get_job_tickets(
+            skip=0, limit=limit, status=None, location=None, match="words", view="summary",
+            cursor=cursor, include_total=include_total, current_user=self.principal, db=self.db
+        ))
+    
+    def test_cursor_walks_every_ticket_once(self):
+        """Test that following next_cursor returns each ticket exactly once, newest first."""
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            page = self._page(3, cursor)
+            seen.extend(ticket["id"] for ticket in page["job_tickets"])
+            pages += 1
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(pages, 3)
+    
+    def test_total_is_opt_in(self):
+        """Test that the total is only counted when asked for."""
+        self.assertIsNone(self._page(2)["total"])
+        self.assertEqual(self._page(2, include_total=True)["total"], len(self.expected))
+        
+        page = self._page(2)
+        later = self._page(2, cursor=page["next_cursor"], include_total=True)
+        self.assertEqual(later["total"], len(self.expected), "The total should not depend on the cursor")
+    
+    def test_cursor_after_row_deleted(self):
+        """Test that a cursor still continues after its row has been deleted."""
+        page = self._page(3)
+        self.db.query(JobTicket).filter(JobTicket.id == page["job_tickets"][-1]["id"]).delete()
+        self.db.commit()
+        
+        rest = self._page(10, cursor=page["next_cursor"])
+        self.assertEqual([ticket["id"] for ticket in rest["job_tickets"]], self.expected[3:])
+    
+    def test_cursor_round_trip_and_invalid_cursor(self):
+        """Test cursor encoding and that garbage cursors are rejected."""
+        created_at = datetime(2026, 3, 1, 12, 0, 0, 250)
+        self.assertEqual(decode_cursor(encode_cursor(created_at, 42)), (created_at, 42))
+        
+        for cursor in ("not-a-cursor", encode_cursor(created_at, 42)[:-3], "W10"):
+            with self.assertRaises(HTTPException) as raised:
+                self._page(3, cursor=cursor)
+            self.assertEqual(raised.exception.status_code, 400)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Unit tests for the write-behind last_login tracker.
+
+These tests verify that:
+1. Repeated activity by a user is coalesced into one row of one batched
+   UPDATE, holding the latest timestamp
+2. A failed flush puts the timestamps back for the next flush, without
+   overwriting newer ones recorded meanwhile
+3. Stopping the tracker, as the application's shutdown hook does, writes
+   whatever is still pending
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import event
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.last_login
+from core.last_login import LastLoginTracker
+from database import SessionLocal, engine
+from models.user import User
+
+class TestLastLoginTracker(unittest.TestCase):
+    """Test case for LastLoginTracker."""
+    
+    def setUp(self):
+        """Create two users to record activity for."""
+        self.db = SessionLocal()
+        suffix = uuid.uuid4().hex[:8]
+        self.users = [
+            User(email=f"last-login-{i}-{suffix}@example.com", hashed_password="not-a-real-hash", role="tech")
+            for i in range(2)
+        ]
+        self.db.add_all(self.users)
+        self.db.commit()
+        self.base = datetime(2026, 4, 1, 8, 0, 0)
+    
+    def tearDown(self):
+        """Remove the users."""
+        for user in self.users:
+            self.db.delete(user)
+        self.db.commit()
+        self.db.close()
+    
+    def _last_logins(self):
+        self.db.expire_all()
+        return [user.last_login.replace(tzinfo=None) if user.last_login else None for user in self.users]
+    
+    def _updates(self):
+        updates = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().startswith("UPDATE users"):
+                updates.append(parameters)
+        
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        self.addCleanup(event.remove, engine, "before_cursor_execute", before_cursor_execute)
+        return updates
+    
+    def test_repeated_logins_coalesce(self):
+        """Test that many records for a user become one row of one UPDATE."""
+        tracker = LastLoginTracker(flush_interval_seconds=60)
+        first, second = self.users
+        for minutes in (1, 5, 3):
+            tracker.record(first.id, self.base + timedelta(minutes=minutes))
+        tracker.record(second.id, self.base)
+        self.assertEqual(tracker.stats()["pending"], 2)
+        
+        updates = self._updates()
+        self.assertEqual(tracker.flush(), 2)
+        
+        self.assertEqual(len(updates), 1, "Pending timestamps should be written in one statement")
+        self.assertEqual(len(updates[0]), 2, "Each user should be written once")
+        self.assertEqual(self._last_logins(), [self.base + timedelta(minutes=5), self.base])
+        self.assertEqual(tracker.stats()["pending"], 0)
+        self.assertEqual(tracker.flush(), 0, "Nothing should be written twice")
+    
+    def test_failed_flush_requeues(self):
+        """Test that timestamps survive a failed flush."""
+        tracker = LastLoginTracker(flush_interval_seconds=60)
+        first, second = self.users
+        tracker.record(first.id, self.base)
+        tracker.record(second.id, self.base)
+        
+        with mock.patch.object(core.last_login, "engine") as failing_engine:
+            failing_engine.begin.side_effect = RuntimeError("database unavailable")
+            self.assertEqual(tracker.flush(), 0)
+        
+        stats = tracker.stats()
+        self.assertEqual((stats["failures"], stats["pending"], stats["rows_written"]), (1, 2, 0))
+        
+        # Newer activity recorded after the failure wins over the requeued value
+        tracker.record(first.id, self.base + timedelta(hours=1))
+        self.assertEqual(tracker.flush(), 2)
+        self.assertEqual(self._last_logins(), [self.base + timedelta(hours=1), self.base])
+    
+    def test_shutdown_flushes_pending(self):
+        """Test that the application's shutdown hook writes pending timestamps."""
+        from main import app, lifespan
+        
+        tracker = LastLoginTracker(flush_interval_seconds=3600)
+        
+        async def run_app():
+            async with lifespan(app):
+                tracker.record(self.users[0].id, self.base)
+                self.assertEqual(self._last_logins(), [None, None])
+        
+        with mock.patch("main.last_login_tracker", tracker):
+            asyncio.run(run_app())
+        
+        self.assertEqual(self._last_logins(), [self.base, None])
+        self.assertEqual(tracker.stats()["flushes"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
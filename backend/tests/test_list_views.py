@@ -0,0 +1,165 @@
+"""
+Unit tests for the summary and full views of list endpoints.
+
+These tests verify that:
+1. The summary view does not select the large encrypted columns
+2. The summary view omits those fields while the full view returns them
+3. Listing job tickets with submitter names takes one query however large
+   the page is
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import uuid
+from datetime import datetime
+
+from sqlalchemy import event
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.principal import Principal
+from database import SessionLocal, engine
+from models.company import Company
+from models.invoice import Invoice
+from models.job_ticket import JobTicket
+from models.user import User
+from routes.invoices import get_invoices
+from routes.job_tickets import get_job_tickets
+
+class TestListViews(unittest.TestCase):
+    """Test case for deferred loading in list views."""
+    
+    def setUp(self):
+        """Create a manager with one ticket and one invoice."""
+        self.db = SessionLocal()
+        suffix = uuid.uuid4().hex[:8]
+        self.company = Company(name=f"Views Co {suffix}", normalized_name=f"views co {suffix}")
+        self.db.add(self.company)
+        self.db.commit()
+        self.user = User(
+            email=f"views-{suffix}@example.com",
+            hashed_password="not-a-real-hash",
+            role="manager",
+            company_id=self.company.id
+        )
+        self.db.add(self.user)
+        self.db.commit()
+        
+        self.db.add(JobTicket(
+            company_id=self.company.id, user_id=self.user.id, company_name="Acme",
+            location="1 Main St", work_description="Replaced valve", parts_used='["valve"]'
+        ))
+        self.db.add(Invoice(
+            user_id=self.user.id, invoice_number=f"V-{suffix}", invoice_date=datetime(2026, 1, 1),
+            customer_name="Customer", company_name="Acme", subtotal=10.0, service_fee=0.0, tax=1.0,
+            total_amount=11.0, line_items=[{"description": "Labor"}], job_ticket_ids=[1], created_by="test"
+        ))
+        self.db.commit()
+        
+        self.principal = Principal(
+            id=self.user.id, email=self.user.email, role="manager", company_id=self.company.id
+        )
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self._record)
+    
+    def tearDown(self):
+        """Remove the test rows."""
+        event.remove(engine, "before_cursor_execute", self._record)
+        self.db.rollback()
+        self.db.query(Invoice).filter(Invoice.user_id == self.user.id).delete()
+        self.db.query(JobTicket).filter(JobTicket.company_id == self.company.id).delete()
+        self.db.delete(self.user)
+        self.db.delete(self.company)
+        self.db.commit()
+        self.db.close()
+    
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+    
+    def _selects(self, table):
+        """Row queries against a table (not the count query)"""
+        return [
+            s for s in self.statements
+            if s.lstrip().startswith(f"SELECT {table}.") and f"FROM {table}" in s
+        ]
+    
+    def _tickets(self, view, limit=10):
+        self.db.expire_all()
+        self.statements.clear()
+        return asyncio.run(get_job_tickets(
+            skip=0, limit=limit, status=None, location=None, match="words", view=view,
+            cursor=None, include_total=False, current_user=self.principal, db=self.db
+        ))["job_tickets"]
+    
+    def _invoices(self, view):
+        self.db.expire_all()
+        self.statements.clear()
+        return asyncio.run(get_invoices(
+            skip=0, limit=10, customer=None, match="words", view=view,
+            db=self.db, current_user=self.principal
+        )).invoices
+    
+    def test_ticket_summary_defers_columns(self):
+        """Test that summary tickets skip work_description and parts_used."""
+        [ticket] = self._tickets("summary")
+        self.assertIsNone(ticket["work_description"])
+        self.assertIsNone(ticket["parts_used"])
+        self.assertEqual(ticket["location"], "1 Main St")
+        self.assertFalse(any("work_description" in s for s in self._selects("job_tickets")))
+        
+        [ticket] = self._tickets("full")
+        self.assertEqual(ticket["work_description"], "Replaced valve")
+        self.assertTrue(any("work_description" in s for s in self._selects("job_tickets")))
+    
+    def test_ticket_list_query_count_is_fixed(self):
+        """Test that submitter names come from the same single query for any page size."""
+        technicians = []
+        for i in range(5):
+            technician = User(
+                email=f"views-tech-{i}-{uuid.uuid4().hex[:8]}@example.com", name=f"Tech {i}",
+                hashed_password="not-a-real-hash", role="tech", company_id=self.company.id
+            )
+            self.db.add(technician)
+            technicians.append(technician)
+        self.db.commit()
+        self.addCleanup(self._delete_users, [technician.id for technician in technicians])
+        self.db.add_all([
+            JobTicket(company_id=self.company.id, user_id=technicians[i % 5].id, company_name="Acme",
+                      location=f"{i} Side St", work_description="Checked pressure")
+            for i in range(20)
+        ])
+        self.db.commit()
+        
+        counts = {}
+        for limit in (1, 21):
+            for view in ("summary", "full"):
+                tickets = self._tickets(view, limit=limit)
+                self.assertEqual(len(tickets), limit)
+                counts[(limit, view)] = len(self.statements)
+        
+        self.assertEqual(set(counts.values()), {1}, f"Expected one query per page, got {counts}")
+        names = {ticket["submitted_by_name"] for ticket in self._tickets("full", limit=21)}
+        self.assertEqual(names, {f"Tech {i}" for i in range(5)} | {None})
+    
+    def _delete_users(self, user_ids):
+        self.db.rollback()
+        self.db.query(JobTicket).filter(JobTicket.user_id.in_(user_ids)).delete()
+        self.db.query(User).filter(User.id.in_(user_ids)).delete()
+        self.db.commit()
+    
+    def test_invoice_summary_defers_columns(self):
+        """Test that summary invoices skip line_items and job_ticket_ids."""
+        [invoice] = self._invoices("summary")
+        self.assertIsNone(invoice.line_items)
+        self.assertEqual(invoice.customer_name, "Customer")
+        self.assertFalse(any("line_items" in s for s in self._selects("invoices")))
+        
+        [invoice] = self._invoices("full")
+        self.assertEqual(invoice.job_ticket_ids, [1])
+        self.assertTrue(any("line_items" in s for s in self._selects("invoices")))
+
+if __name__ == "__main__":
+    unittest.main()
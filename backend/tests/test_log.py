@@ -0,0 +1,119 @@
+"""
+Unit tests for the structured logging facility.
+
+These tests verify that:
+1. Disabled levels never evaluate lazy fields
+2. Lines carry the request id and render fields as key=value pairs
+3. Per-key sampling is consistent within a request
+4. Caller-supplied request ids are only reused when they are plain tokens
+"""
+
+import unittest
+import sys
+import os
+import logging
+import asyncio
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import log as structured_log
+from core.log import RequestContextMiddleware, get_logger, get_request_id, request_id_var, is_sampled
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.lines = []
+    
+    def emit(self, record):
+        self.lines.append(record.getMessage())
+
+class TestStructuredLogging(unittest.TestCase):
+    """Test case for core.log."""
+    
+    def setUp(self):
+        """Attach a capturing handler to a dedicated logger."""
+        self.handler = _Capture()
+        self.raw = logging.getLogger("tests.structured_log")
+        self.raw.addHandler(self.handler)
+        self.raw.propagate = False
+        self.log = get_logger("tests.structured_log")
+        self.token = request_id_var.set("req-123")
+    
+    def tearDown(self):
+        """Detach the handler and reset state."""
+        request_id_var.reset(self.token)
+        self.raw.removeHandler(self.handler)
+        structured_log.SAMPLE_RATES.clear()
+    
+    def test_disabled_level_is_lazy(self):
+        """Test that fields are not evaluated when the level is disabled."""
+        self.raw.setLevel(logging.INFO)
+        calls = []
+        self.log.debug("expensive", value=lambda: calls.append(1))
+        
+        self.assertEqual(calls, [])
+        self.assertEqual(self.handler.lines, [])
+    
+    def test_line_format(self):
+        """Test the rendered event line."""
+        self.raw.setLevel(logging.DEBUG)
+        self.log.info("ticket.created", ticket_id=7, note="two words", count=lambda: 3)
+        
+        self.assertEqual(
+            self.handler.lines,
+            ['ticket.created request_id=req-123 ticket_id=7 note="two words" count=3']
+        )
+    
+    def test_sampling(self):
+        """Test that sampled-out keys drop debug lines but never warnings."""
+        self.raw.setLevel(logging.DEBUG)
+        structured_log.SAMPLE_RATES["noisy"] = 0.0
+        
+        self.log.debug("dropped", sample="noisy")
+        self.log.warning("kept")
+        self.assertEqual(len(self.handler.lines), 1)
+        
+        # The decision for a key is stable within a request
+        structured_log.SAMPLE_RATES["half"] = 0.5
+        self.assertEqual(len({is_sampled("half") for _ in range(10)}), 1)
+    
+    def _request_id_for(self, header):
+        """Run a request with an X-Request-ID header; returns the id logged and the id echoed"""
+        seen = []
+        sent = []
+        
+        async def app(scope, receive, send):
+            seen.append(get_request_id())
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+        
+        async def send(message):
+            sent.append(message)
+        
+        scope = {"type": "http", "headers": [(b"x-request-id", header.encode("latin-1"))]}
+        asyncio.run(RequestContextMiddleware(app)(scope, None, send))
+        echoed = dict(sent[0]["headers"])[b"x-request-id"].decode("latin-1")
+        return seen[0], echoed
+    
+    def test_request_id_header(self):
+        """Test that a plain caller id is kept and anything that could forge log fields is replaced."""
+        self.assertEqual(self._request_id_for("client-42.retry_1"), ("client-42.retry_1", "client-42.retry_1"))
+        
+        for header in ("abc role=admin", 'x"y', "a" * 65, ""):
+            request_id, echoed = self._request_id_for(header)
+            self.assertNotEqual(request_id, header)
+            self.assertRegex(request_id, r"^[0-9a-f]{32}$")
+            self.assertEqual(echoed, request_id)
+    
+    def test_request_id_is_escaped(self):
+        """Test that a request id set outside the middleware is quoted like other values."""
+        self.raw.setLevel(logging.DEBUG)
+        token = request_id_var.set("abc role=admin")
+        try:
+            self.log.info("ticket.created")
+        finally:
+            request_id_var.reset(token)
+        self.assertEqual(self.handler.lines, ['ticket.created request_id="abc role=admin"'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Unit tests for the login brute-force throttle.
+
+These tests verify that:
+1. Attempts beyond the per-email and per-IP limits are rejected with a 429
+2. Lockouts escalate for repeat offenders and expire with the window
+3. A successful login clears the email's counters
+"""
+
+import unittest
+import sys
+import os
+
+from fastapi import HTTPException
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.login_throttle import LoginThrottle
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+class TestLoginThrottle(unittest.TestCase):
+    """Test case for the login throttle."""
+    
+    def setUp(self):
+        """Create a throttle with small limits and a fake clock."""
+        self.clock = FakeClock()
+        self.throttle = LoginThrottle(
+            email_limit=3,
+            ip_limit=5,
+            window_seconds=60,
+            lockout_seconds=10,
+            max_lockout_seconds=25,
+            max_keys=100,
+            clock=self.clock
+        )
+    
+    def assertThrottled(self, email, ip):
+        with self.assertRaises(HTTPException) as ctx:
+            self.throttle.check(email, ip)
+        self.assertEqual(ctx.exception.status_code, 429)
+        return int(ctx.exception.headers["Retry-After"])
+    
+    def test_email_limit(self):
+        """Test that an email is locked after too many attempts from any IP."""
+        for i in range(3):
+            self.throttle.check("Victim@Example.com", f"10.0.0.{i}")
+        
+        retry_after = self.assertThrottled("victim@example.com", "10.0.0.9")
+        self.assertEqual(retry_after, 10)
+        self.assertEqual(self.throttle.stats()["rejected_email"], 1)
+    
+    def test_ip_limit(self):
+        """Test that an IP is locked after spraying attempts across emails."""
+        for i in range(5):
+            self.throttle.check(f"user{i}@example.com", "10.0.0.1")
+        
+        self.assertThrottled("another@example.com", "10.0.0.1")
+        self.assertEqual(self.throttle.stats()["rejected_ip"], 1)
+        
+        # Other clients are unaffected
+        self.throttle.check("another@example.com", "10.0.0.2")
+    
+    def test_lockout_escalates_and_expires(self):
+        """Test that repeated lockouts double up to the cap and then expire."""
+        for _ in range(3):
+            self.throttle.check("victim@example.com", None)
+        self.assertEqual(self.assertThrottled("victim@example.com", None), 10)
+        
+        self.clock.now += 10
+        for _ in range(3):
+            self.throttle.check("victim@example.com", None)
+        self.assertEqual(self.assertThrottled("victim@example.com", None), 20)
+        
+        self.clock.now += 20
+        for _ in range(3):
+            self.throttle.check("victim@example.com", None)
+        self.assertEqual(self.assertThrottled("victim@example.com", None), 25)
+        
+        # After a quiet window the history is forgotten
+        self.clock.now += 25 + 60
+        for _ in range(3):
+            self.throttle.check("victim@example.com", None)
+        self.assertEqual(self.assertThrottled("victim@example.com", None), 10)
+    
+    def test_success_clears_email(self):
+        """Test that a successful login resets the email's attempts."""
+        for _ in range(2):
+            self.throttle.check("user@example.com", "10.0.0.1")
+        self.throttle.record_success("user@example.com", "10.0.0.1")
+        
+        for _ in range(3):
+            self.throttle.check("user@example.com", "10.0.0.1")
+        self.assertThrottled("user@example.com", "10.0.0.1")
+
+if __name__ == "__main__":
+    unittest.main()
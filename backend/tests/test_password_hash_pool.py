@@ -0,0 +1,127 @@
+"""
+Unit tests for the bounded password hashing pool.
+
+These tests verify that:
+1. Calls beyond the workers plus queue limit are rejected with a 503 and a
+   Retry-After header
+2. The in-flight count returns to zero whether the call succeeds or raises,
+   and a hash whose caller was cancelled keeps its slot until it finishes
+3. The metrics count completed and rejected calls and report their queue
+   wait and run time
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import threading
+import time
+
+from fastapi import HTTPException
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.hashing import PasswordHashPool
+
+class TestPasswordHashPool(unittest.TestCase):
+    """Test case for PasswordHashPool, with stub hashers instead of bcrypt."""
+    
+    def setUp(self):
+        """Create a pool with one worker and one queue slot."""
+        self.pool = PasswordHashPool(max_workers=1, max_queue=1)
+    
+    def tearDown(self):
+        """Stop the pool's threads."""
+        self.pool.shutdown()
+    
+    def test_saturated_pool_rejects(self):
+        """Test that a full pool answers 503 with Retry-After instead of queueing."""
+        release = threading.Event()
+        
+        def blocking_hash(password):
+            release.wait(5)
+            return f"hashed:{password}"
+        
+        async def scenario():
+            running = asyncio.ensure_future(self.pool.run(blocking_hash, "a"))
+            queued = asyncio.ensure_future(self.pool.run(blocking_hash, "b"))
+            await asyncio.sleep(0.05)
+            self.assertEqual(self.pool.stats()["in_flight"], 2)
+            
+            with self.assertRaises(HTTPException) as raised:
+                await self.pool.run(blocking_hash, "c")
+            self.assertEqual(raised.exception.status_code, 503)
+            self.assertEqual(raised.exception.headers["Retry-After"], "1")
+            self.assertEqual(self.pool.stats()["in_flight"], 2, "A rejected call should not be counted in flight")
+            
+            time.sleep(0.05)
+            release.set()
+            return await asyncio.gather(running, queued)
+        
+        self.assertEqual(asyncio.run(scenario()), ["hashed:a", "hashed:b"])
+        stats = self.pool.stats()
+        self.assertEqual((stats["in_flight"], stats["completed"], stats["rejected"]), (0, 2, 1))
+        self.assertGreaterEqual(stats["hash_ms_max"], 50, "The blocked call's run time should be reported")
+        self.assertGreaterEqual(stats["queue_wait_ms_max"], 50, "The queued call's wait should be reported")
+        self.assertGreater(stats["queue_wait_ms_max"], stats["queue_wait_ms_avg"])
+    
+    def test_in_flight_released_on_exception(self):
+        """Test that a hasher raising does not leak an in-flight slot."""
+        def failing_hash(password):
+            raise ValueError("bad hash")
+        
+        async def scenario():
+            for _ in range(3):
+                with self.assertRaises(ValueError):
+                    await self.pool.run(failing_hash, "a")
+            return await self.pool.run(lambda password: password.upper(), "ok")
+        
+        self.assertEqual(asyncio.run(scenario()), "OK", "The pool should still accept calls after failures")
+        stats = self.pool.stats()
+        self.assertEqual((stats["in_flight"], stats["completed"], stats["rejected"]), (0, 4, 0))
+    
+    def test_cancelled_caller_keeps_slot_until_hash_finishes(self):
+        """Test that a client disconnect does not free the slot of a hash still running."""
+        release = threading.Event()
+        
+        def blocking_hash(password):
+            release.wait(5)
+            return f"hashed:{password}"
+        
+        async def scenario():
+            abandoned = asyncio.ensure_future(self.pool.run(blocking_hash, "a"))
+            await asyncio.sleep(0.05)
+            abandoned.cancel()
+            await asyncio.sleep(0.05)
+            self.assertEqual(self.pool.stats()["in_flight"], 1, "The running hash should still hold its slot")
+            
+            queued = asyncio.ensure_future(self.pool.run(blocking_hash, "b"))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(HTTPException):
+                await self.pool.run(blocking_hash, "c")
+            
+            release.set()
+            return await queued
+        
+        self.assertEqual(asyncio.run(scenario()), "hashed:b")
+        self.pool.shutdown()
+        stats = self.pool.stats()
+        self.assertEqual((stats["in_flight"], stats["completed"], stats["rejected"]), (0, 2, 1))
+    
+    def test_metrics_averages(self):
+        """Test that the averages are over completed calls."""
+        async def scenario():
+            for delay in (0.01, 0.03):
+                await self.pool.run(time.sleep, delay)
+        
+        asyncio.run(scenario())
+        stats = self.pool.stats()
+        self.assertEqual(stats["completed"], 2)
+        self.assertGreaterEqual(stats["hash_ms_avg"], 20)
+        self.assertGreaterEqual(stats["hash_ms_max"], 30)
+        self.assertLess(stats["hash_ms_avg"], stats["hash_ms_max"])
+        self.assertEqual((stats["workers"], stats["queue_limit"]), (1, 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""
+Unit tests for upgrading password hashes stored at an outdated cost.
+
+These tests verify that:
+1. Login re-hashes and saves a password stored at outdated rounds
+2. Login leaves a hash at the configured rounds untouched
+3. A bcrypt hash at the pinned AUTH_BCRYPT_ROUNDS does not need an update,
+   while one at any other cost does
+"""
+
+import unittest
+import asyncio
+import sys
+import os
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+import bcrypt
+from passlib.context import CryptContext
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.security
+from database import SessionLocal
+from models.user import User
+from models.refresh_token import RefreshToken
+from routes.auth import login
+from core.security import build_password_context
+
+# bcrypt itself cannot run under passlib here, so login is exercised with a
+# cheap scheme pinned the same way build_password_context pins bcrypt
+PINNED_ROUNDS = 1200
+
+def pinned_context(rounds):
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=rounds,
+        pbkdf2_sha256__min_rounds=rounds,
+        pbkdf2_sha256__max_rounds=rounds
+    )
+
+class TestLoginRehash(unittest.TestCase):
+    """Test case for transparent rehashing on login."""
+    
+    def setUp(self):
+        """Create a user and pin the hashing context."""
+        self.context = pinned_context(PINNED_ROUNDS)
+        patcher = mock.patch.object(core.security, "pwd_context", self.context)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.db = SessionLocal()
+        self.user = User(
+            email=f"rehash-{uuid.uuid4().hex[:8]}@example.com",
+            hashed_password="not-a-real-hash",
+            role="tech"
+        )
+        self.db.add(self.user)
+        self.db.commit()
+    
+    def tearDown(self):
+        """Remove the user and its tokens."""
+        self.db.query(RefreshToken).filter(RefreshToken.user_id == self.user.id).delete()
+        self.db.delete(self.user)
+        self.db.commit()
+        self.db.close()
+    
+    def _store(self, hashed_password):
+        self.user.hashed_password = hashed_password
+        self.db.commit()
+    
+    def _login(self, password):
+        request = SimpleNamespace(client=SimpleNamespace(host="10.0.0.1"))
+        form = SimpleNamespace(username=self.user.email, password=password)
+        return asyncio.run(login(request, form, self.db))
+    
+    def _stored_hash(self):
+        self.db.expire_all()
+        return self.db.get(User, self.user.id).hashed_password
+    
+    def test_outdated_hash_is_upgraded(self):
+        """Test that a hash at outdated rounds is replaced on a successful login."""
+        outdated = pinned_context(1000).hash("correct horse")
+        self._store(outdated)
+        self.assertTrue(self.context.needs_update(outdated))
+        
+        token = self._login("correct horse")
+        self.assertEqual(token["token_type"], "bearer")
+        
+        upgraded = self._stored_hash()
+        self.assertNotEqual(upgraded, outdated)
+        self.assertIn(f"${PINNED_ROUNDS}$", upgraded)
+        self.assertFalse(self.context.needs_update(upgraded))
+        self.assertTrue(self.context.verify("correct horse", upgraded))
+    
+    def test_current_hash_is_kept(self):
+        """Test that a hash at the configured rounds is not rewritten."""
+        current = self.context.hash("correct horse")
+        self._store(current)
+        
+        self._login("correct horse")
+        
+        self.assertEqual(self._stored_hash(), current)
+
+class TestPinnedBcryptRounds(unittest.TestCase):
+    """Test case for the bcrypt cost pinned by AUTH_BCRYPT_ROUNDS."""
+    
+    def test_needs_update_only_at_other_costs(self):
+        """Test that only hashes at a cost other than the pinned one need an update."""
+        context = build_password_context(5)
+        
+        pinned = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(rounds=5)).decode()
+        cheaper = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(rounds=4)).decode()
+        costlier = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(rounds=6)).decode()
+        
+        self.assertFalse(context.needs_update(pinned))
+        self.assertTrue(context.needs_update(cheaper))
+        self.assertTrue(context.needs_update(costlier))
+    
+    def test_unpinned_context_keeps_existing_costs(self):
+        """Test that without AUTH_BCRYPT_ROUNDS no stored cost is upgraded."""
+        context = build_password_context(None)
+        
+        cheaper = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(rounds=4)).decode()
+        self.assertFalse(context.needs_update(cheaper))
+
+if __name__ == "__main__":
+    unittest.main()
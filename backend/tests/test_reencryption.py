@@ -0,0 +1,182 @@
+"""
+Unit tests for the online re-encryption job.
+
+These tests verify that:
+1. Legacy Fernet values and values sealed with a retired key are rewritten
+   under the active key without changing their plaintext or updated_at
+2. Progress is checkpointed per batch and a stopped job resumes from it
+3. A completed table is not scanned again
+4. Responses stored for Idempotency-Keys are rewritten too
+5. A value that cannot be decrypted holds the checkpoint just before its row
+   and keeps the table from being marked completed until it can be rewritten
+"""
+
+import unittest
+import sys
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from sqlalchemy import insert, select, text
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import encryption
+from core.reencryption import ReencryptionJob
+from database import SessionLocal
+from models.company import Company
+from models.idempotency_key import IdempotencyKey
+from models.job_ticket import JobTicket
+from models.reencryption_checkpoint import ReencryptionCheckpoint
+
+class TestReencryptionJob(unittest.TestCase):
+    """Test case for rewriting encrypted columns under the active key."""
+    
+    def setUp(self):
+        """Create tickets in legacy, retired-key and current formats."""
+        self.db = SessionLocal()
+        self.db.query(ReencryptionCheckpoint).delete()
+        name = f"Rotate Co {uuid.uuid4().hex[:8]}"
+        self.company = Company(name=name, normalized_name=name.lower())
+        self.db.add(self.company)
+        self.db.commit()
+        
+        self.retired_id = encryption.DATA_KEY_ID % 255 + 1
+        retired = AESGCM(AESGCM.generate_key(bit_length=256))
+        encryption._aead_keys[self.retired_id] = retired
+        header = bytes([encryption.ENVELOPE_VERSION, self.retired_id])
+        self.retired_header = header
+        self.retired = retired
+        retired_value = self._seal_retired(b"2 Retired Rd")
+        
+        self.locations = ["0 Current Rd", "1 Legacy Rd", "2 Retired Rd", "3 Legacy Rd", "4 Current Rd"]
+        tickets = [
+            JobTicket(company_id=self.company.id, company_name="Acme", location=location)
+            for location in self.locations
+        ]
+        self.db.add_all(tickets)
+        self.db.commit()
+        self.ids = [ticket.id for ticket in tickets]
+        
+        raw = {
+            self.ids[1]: encryption.fernet.encrypt(b"1 Legacy Rd").decode(),
+            self.ids[2]: retired_value,
+            self.ids[3]: encryption.fernet.encrypt(b"3 Legacy Rd").decode(),
+        }
+        for ticket_id, value in raw.items():
+            self.db.execute(
+                text("UPDATE job_tickets SET location = :location, updated_at = NULL WHERE id = :id"),
+                {"location": value, "id": ticket_id}
+            )
+        self.db.commit()
+    
+    def tearDown(self):
+        """Remove the tickets, checkpoints and retired key."""
+        encryption._aead_keys.pop(self.retired_id, None)
+        self.db.query(JobTicket).filter(JobTicket.company_id == self.company.id).delete()
+        self.db.query(ReencryptionCheckpoint).delete()
+        self.db.delete(self.company)
+        self.db.commit()
+        self.db.close()
+    
+    def _seal_retired(self, plaintext):
+        nonce = os.urandom(12)
+        return self.retired_header + nonce + self.retired.encrypt(nonce, plaintext, self.retired_header)
+    
+    def _tickets(self):
+        self.db.expire_all()
+        return self.db.query(JobTicket).filter(JobTicket.id.in_(self.ids)).order_by(JobTicket.id).all()
+    
+    def test_rewrites_under_active_key(self):
+        """Test that every value ends up as an active-key envelope with the same plaintext."""
+        job = ReencryptionJob(batch_size=2, pause_seconds=0)
+        self.assertTrue(job.run(["job_tickets"]))
+        
+        tickets = self._tickets()
+        for ticket, location in zip(tickets, self.locations):
+            self.assertFalse(encryption.needs_reencryption(ticket._encrypted_location))
+            self.assertEqual(ticket.location, location)
+        self.assertTrue(all(ticket.updated_at is None for ticket in tickets[1:4]))
+        
+        progress = job.progress("job_tickets")
+        self.assertTrue(progress["completed"])
+        self.assertGreaterEqual(progress["rows_rewritten"], 3)
+    
+    def test_resumes_from_checkpoint(self):
+        """Test that a second job continues after the last committed batch."""
+        first = ReencryptionJob(batch_size=2, pause_seconds=0)
+        self.assertTrue(first.run_batch("job_tickets"))
+        checkpoint = self.db.get(ReencryptionCheckpoint, "job_tickets")
+        self.assertIsNone(checkpoint.completed_at)
+        last_id = checkpoint.last_id
+        
+        second = ReencryptionJob(batch_size=2, pause_seconds=0)
+        self.assertTrue(second.run(["job_tickets"]))
+        self.db.expire_all()
+        checkpoint = self.db.get(ReencryptionCheckpoint, "job_tickets")
+        self.assertIsNotNone(checkpoint.completed_at)
+        self.assertGreater(checkpoint.last_id, last_id)
+        self.assertEqual(checkpoint.key_id, encryption.DATA_KEY_ID)
+        
+        batches = second.batches
+        self.assertFalse(second.run_batch("job_tickets"))
+        self.assertEqual(second.batches, batches)
+
+    def test_undecryptable_value_blocks_completion(self):
+        """Test that a failed row is not skipped and the table is not marked completed."""
+        retired = encryption._aead_keys.pop(self.retired_id)
+        
+        job = ReencryptionJob(batch_size=10, pause_seconds=0)
+        self.assertFalse(job.run(["job_tickets"]))
+        self.assertEqual(job.failures, 1)
+        
+        checkpoint = self.db.get(ReencryptionCheckpoint, "job_tickets")
+        self.assertIsNone(checkpoint.completed_at)
+        self.assertEqual(checkpoint.last_id, self.ids[1])
+        progress = job.progress("job_tickets")
+        self.assertFalse(progress["completed"])
+        self.assertEqual(progress["failed_id"], self.ids[2])
+        
+        # The rows before the failure are committed, the failed row is untouched
+        tickets = self._tickets()
+        self.assertFalse(encryption.needs_reencryption(tickets[1]._encrypted_location))
+        self.assertTrue(encryption.needs_reencryption(tickets[3]._encrypted_location))
+        
+        # Running again retries the row rather than completing past it
+        self.assertFalse(job.run(["job_tickets"]))
+        self.assertEqual(job.failures, 2)
+        
+        encryption._aead_keys[self.retired_id] = retired
+        self.assertTrue(job.run(["job_tickets"]))
+        self.db.expire_all()
+        self.assertIsNotNone(self.db.get(ReencryptionCheckpoint, "job_tickets").completed_at)
+        for ticket, location in zip(self._tickets(), self.locations):
+            self.assertEqual(ticket.location, location)
+    
+    def test_rewrites_idempotency_responses(self):
+        """Test that stored responses sealed with a retired key move to the active key."""
+        keys = IdempotencyKey.__table__
+        now = datetime.utcnow()
+        with self.db.get_bind().engine.begin() as connection:
+            key_id = connection.execute(insert(keys).values(
+                scope="tests", key=f"rotate-{uuid.uuid4().hex[:8]}", request_hash="0" * 64,
+                state="completed", owner="test", response_status=201,
+                response_body=self._seal_retired(b'{"location":"2 Retired Rd"}'),
+                locked_at=now, expires_at=now + timedelta(hours=1)
+            )).inserted_primary_key[0]
+        
+        try:
+            job = ReencryptionJob(batch_size=10, pause_seconds=0)
+            self.assertTrue(job.run(["idempotency_keys"]))
+            
+            body = self.db.execute(select(keys.c.response_body).where(keys.c.id == key_id)).scalar()
+            self.assertFalse(encryption.needs_reencryption(body))
+            self.assertEqual(encryption.decrypt_field(body), '{"location":"2 Retired Rd"}')
+        finally:
+            self.db.query(IdempotencyKey).filter(IdempotencyKey.id == key_id).delete()
+            self.db.commit()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+Unit tests for refresh token rotation and revocation.
+
+These tests verify that:
+1. A refresh token can be exchanged exactly once for a rotated token
+2. Replaying an already rotated token revokes the whole token family
+3. Logging out revokes the family and refresh tokens cannot authenticate requests
+"""
+
+import unittest
+import sys
+import os
+import uuid
+
+from fastapi import HTTPException
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal
+from models.user import User
+from models.refresh_token import RefreshToken
+from core.security import (
+    create_refresh_token, rotate_refresh_token, revoke_refresh_token, decode_access_token
+)
+
+class TestRefreshTokens(unittest.TestCase):
+    """Test case for the refresh token flow."""
+    
+    def setUp(self):
+        """Create a user to issue tokens for."""
+        self.db = SessionLocal()
+        self.user = User(
+            email=f"refresh-{uuid.uuid4().hex[:8]}@example.com",
+            hashed_password="not-a-real-hash",
+            role="tech"
+        )
+        self.db.add(self.user)
+        self.db.commit()
+    
+    def tearDown(self):
+        """Remove the user and its tokens."""
+        self.db.query(RefreshToken).filter(RefreshToken.user_id == self.user.id).delete()
+        self.db.delete(self.user)
+        self.db.commit()
+        self.db.close()
+    
+    def _issue(self):
+        token = create_refresh_token(self.db, self.user)
+        self.db.commit()
+        return token
+    
+    def test_rotation_issues_new_token(self):
+        """Test that a refresh token is rotated into a different, usable token."""
+        token = self._issue()
+        user, rotated = rotate_refresh_token(self.db, token)
+        
+        self.assertEqual(user.id, self.user.id)
+        self.assertNotEqual(token, rotated)
+        
+        # The rotated token is usable in turn
+        _, rotated_again = rotate_refresh_token(self.db, rotated)
+        self.assertNotEqual(rotated, rotated_again)
+    
+    def test_reuse_revokes_family(self):
+        """Test that replaying a rotated token revokes every token in its family."""
+        token = self._issue()
+        _, rotated = rotate_refresh_token(self.db, token)
+        
+        with self.assertRaises(HTTPException) as ctx:
+            rotate_refresh_token(self.db, token)
+        self.assertEqual(ctx.exception.status_code, 401)
+        
+        # The legitimate successor was revoked along with the replayed token
+        with self.assertRaises(HTTPException):
+            rotate_refresh_token(self.db, rotated)
+    
+    def test_logout_revokes_token(self):
+        """Test that a logged-out refresh token can no longer be rotated."""
+        token = self._issue()
+        revoke_refresh_token(self.db, token)
+        
+        with self.assertRaises(HTTPException):
+            rotate_refresh_token(self.db, token)
+    
+    def test_refresh_token_is_not_an_access_token(self):
+        """Test that refresh tokens are typed so they cannot authenticate requests."""
+        token = self._issue()
+        payload = decode_access_token(token)
+        self.assertEqual(payload["type"], "refresh")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,23 +3,42 @@ Unit tests for ticket number generation functionality.
 
 These tests verify that:
 1. Ticket numbers are generated in the correct format (YYXXXXXX)
-2. Ticket numbers are unique even under concurrent submission scenarios
-3. The system handles collisions gracefully without user-facing errors
+2. Ticket numbers are unique, including across workers allocating concurrently
+3. Numbers are handed out from reserved blocks with no queries in between
+4. Each year has its own counter, and numbers already taken are skipped
+5. Consecutive numbers are not sequential, and the permutation never repeats
+6. Numbers left in a block are handed out while another caller is reserving
+   the next block
 """
 
 import unittest
 import sys
 import os
+import datetime
 import threading
-import random
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from sqlalchemy import event
 
 # Add parent directory to path so we can import our modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import SessionLocal
-from utils.ticket_number import generate_ticket_number
+from database import SessionLocal, engine
+from models.company import Company
 from models.job_ticket import JobTicket
+from models.ticket_number_counter import TicketNumberCounter
+from utils.ticket_number import (
+    SEQUENCE_SIZE,
+    TicketNumberAllocator,
+    TicketNumbersExhausted,
+    format_ticket_number,
+    generate_ticket_number,
+    permute,
+)
+
+# Years far from the current one, so tests do not consume real counters
+TEST_YEARS = (81, 82, 83)
 
 class TestTicketNumberGeneration(unittest.TestCase):
     """Test case for ticket number generation functionality."""
@@ -27,103 +46,178 @@ class TestTicketNumberGeneration(unittest.TestCase):
     def setUp(self):
         """Set up test environment."""
         self.db = SessionLocal()
-        
+        self._clear()
+    
     def tearDown(self):
         """Clean up after tests."""
+        self._clear()
         self.db.close()
     
+    def _clear(self):
+        self.db.query(TicketNumberCounter).filter(TicketNumberCounter.year.in_(TEST_YEARS)).delete()
+        self.db.commit()
+    
+    def _count_statements(self):
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        self.addCleanup(event.remove, engine, "before_cursor_execute", before_cursor_execute)
+        return statements
+    
     def test_ticket_number_format(self):
         """Test that generated ticket numbers follow the required format."""
         ticket_number = generate_ticket_number(self.db)
         
-        # Check length
         self.assertEqual(len(ticket_number), 8, "Ticket number should be 8 characters long")
-        
-        # Check year part (first 2 digits)
-        import datetime
         current_year = str(datetime.datetime.now().year)[-2:]
-        self.assertEqual(ticket_number[:2], current_year, 
+        self.assertEqual(ticket_number[:2], current_year,
                          f"First 2 digits should be the current year ({current_year})")
-        
-        # Check that remaining 6 digits are numeric
-        self.assertTrue(ticket_number[2:].isdigit(), 
-                        "Last 6 characters should be digits")
-        
-        # Check that the numeric part is properly zero-padded
-        self.assertEqual(len(ticket_number[2:]), 6, 
-                         "Numeric part should be exactly 6 digits")
+        self.assertTrue(ticket_number[2:].isdigit(), "Last 6 characters should be digits")
     
     def test_ticket_number_uniqueness(self):
-        """Test that generated ticket numbers are unique."""
-        # Generate multiple ticket numbers
-        ticket_numbers = set()
-        for _ in range(100):
-            ticket_number = generate_ticket_number(self.db)
-            # Ensure we haven't seen this number before
-            self.assertNotIn(ticket_number, ticket_numbers, 
-                            f"Duplicate ticket number generated: {ticket_number}")
-            ticket_numbers.add(ticket_number)
+        """Test that generated ticket numbers are unique across blocks."""
+        allocator = TicketNumberAllocator(block_size=7)
+        ticket_numbers = [allocator.allocate(self.db, year=81) for _ in range(100)]
+        
+        self.assertEqual(len(set(ticket_numbers)), 100, "Duplicate ticket number generated")
+        self.assertTrue(all(number.startswith("81") and len(number) == 8 for number in ticket_numbers))
+        self.assertEqual(allocator.blocks_reserved, 15)
     
-    def test_concurrent_ticket_generation(self):
-        """Test that ticket numbers are unique even when generated concurrently."""
-        # Function to generate a ticket number in a separate thread
-        def generate_ticket():
+    def test_concurrent_workers(self):
+        """Test that workers sharing the counter table never hand out the same number."""
+        workers = [TicketNumberAllocator(block_size=5) for _ in range(3)]
+        
+        def generate_tickets(allocator):
             db = SessionLocal()
             try:
-                return generate_ticket_number(db)
+                return [allocator.allocate(db, year=81) for _ in range(40)]
             finally:
                 db.close()
         
-        # Generate ticket numbers concurrently
-        ticket_numbers = set()
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(generate_ticket) for _ in range(50)]
-            
-            for future in as_completed(futures):
-                ticket_number = future.result()
-                # Ensure we haven't seen this number before
-                self.assertNotIn(ticket_number, ticket_numbers, 
-                                f"Duplicate ticket number generated in concurrent test: {ticket_number}")
-                ticket_numbers.add(ticket_number)
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            results = list(executor.map(generate_tickets, workers * 2))
+        
+        ticket_numbers = [number for numbers in results for number in numbers]
+        self.assertEqual(len(ticket_numbers), 240)
+        self.assertEqual(len(set(ticket_numbers)), 240, "Duplicate ticket number generated by concurrent workers")
     
-    def test_collision_handling(self):
-        """Test that the system handles collisions gracefully."""
-        # Create a mock database session that simulates collisions
-        class MockSession:
-            def __init__(self, collision_count=3):
-                self.collision_count = collision_count
-                self.query_count = 0
-                self.ticket_numbers = set()
-            
-            def query(self, model):
-                return self
-            
-            def filter(self, condition):
-                return self
+    def test_no_queries_within_block(self):
+        """Test that only reserving a block touches the database."""
+        allocator = TicketNumberAllocator(block_size=50)
+        allocator.allocate(self.db, year=81)
+        
+        statements = self._count_statements()
+        for _ in range(49):
+            allocator.allocate(self.db, year=81)
+        self.assertEqual(statements, [], "Numbers within a reserved block should need no queries")
+        
+        allocator.allocate(self.db, year=81)
+        self.assertTrue(statements, "The next block should be reserved from the counter table")
+        self.assertEqual(allocator.blocks_reserved, 2)
+    
+    def test_year_rollover(self):
+        """Test that each year has its own counter and a new year gets a new block."""
+        allocator = TicketNumberAllocator(block_size=10)
+        first = allocator.allocate(self.db, year=81)
+        second_year = allocator.allocate(self.db, year=82)
+        
+        self.assertTrue(first.startswith("81"))
+        self.assertTrue(second_year.startswith("82"))
+        self.assertEqual(second_year, format_ticket_number(82, 0), "A new year should start its own sequence")
+        self.assertEqual(list(allocator.stats()["available"]), ["82"])
+        
+        counters = {
+            counter.year: counter.next_value
+            for counter in self.db.query(TicketNumberCounter).filter(TicketNumberCounter.year.in_(TEST_YEARS))
+        }
+        self.assertEqual(counters, {81: 10, 82: 10})
+    
+    def test_taken_numbers_skipped(self):
+        """Test that numbers already used by existing tickets are not handed out again."""
+        company = Company(name="Ticket Number Co", normalized_name="ticket number co")
+        self.db.add(company)
+        self.db.commit()
+        taken = format_ticket_number(83, 1)
+        ticket = JobTicket(company_id=company.id, company_name="Acme", ticket_number=taken)
+        self.db.add(ticket)
+        self.db.commit()
+        try:
+            allocator = TicketNumberAllocator(block_size=5)
+            ticket_numbers = [allocator.allocate(self.db, year=83) for _ in range(5)]
             
-            def first(self):
-                self.query_count += 1
-                # Simulate a collision for the first few queries
-                if self.query_count <= self.collision_count:
-                    # Return a mock ticket to simulate collision
-                    mock_ticket = type('MockTicket', (), {})
-                    return mock_ticket
-                # After that, return None to indicate no collision
-                return None
-        
-        # Test with a mock session that simulates 3 collisions
-        mock_session = MockSession(collision_count=3)
-        ticket_number = generate_ticket_number(mock_session)
-        
-        # Verify that we made at least 4 queries (3 collisions + 1 success)
-        self.assertGreaterEqual(mock_session.query_count, 4, 
-                               "Should have tried multiple times on collision")
-        
-        # Verify the ticket number format
-        import datetime
-        current_year = str(datetime.datetime.now().year)[-2:]
-        self.assertEqual(ticket_number[:2], current_year)
-        self.assertEqual(len(ticket_number), 8)
+            self.assertNotIn(taken, ticket_numbers)
+            self.assertEqual(allocator.skipped, 1)
+            self.assertEqual(ticket_numbers[0], format_ticket_number(83, 0))
+            self.assertEqual(ticket_numbers[1], format_ticket_number(83, 2))
+        finally:
+            self.db.delete(ticket)
+            self.db.delete(company)
+            self.db.commit()
+    
+    def test_allocate_during_refill(self):
+        """Test that a reservation in progress does not block callers served from memory."""
+        allocator = TicketNumberAllocator(block_size=5)
+        first = allocator.allocate(self.db, year=81)
+        
+        reserving = threading.Event()
+        release = threading.Event()
+        reserve = allocator._reserve
+        
+        def slow_reserve(db, year, size):
+            reserving.set()
+            release.wait(5)
+            return reserve(db, year, size)
+        
+        def allocate_block():
+            db = SessionLocal()
+            try:
+                return allocator.allocate_many(db, 10, year=81)
+            finally:
+                db.close()
+        
+        with mock.patch.object(allocator, "_reserve", side_effect=slow_reserve):
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                refill = executor.submit(allocate_block)
+                self.assertTrue(reserving.wait(5))
+                
+                # The 4 numbers left in the block are served while the refill waits
+                served = [allocator.allocate(self.db, year=81) for _ in range(4)]
+                self.assertFalse(refill.done())
+                
+                release.set()
+                block = refill.result(timeout=5)
+        
+        self.assertEqual(len(block), 10)
+        ticket_numbers = [first] + served + block
+        self.assertEqual(len(set(ticket_numbers)), 15, "Duplicate ticket number generated during a refill")
+        # The refill was sized for the 4 numbers left; they were served meanwhile,
+        # so the caller topped up once more instead of failing
+        self.assertEqual(allocator.blocks_reserved, 3)
+    
+    def test_exhausted_year(self):
+        """Test that running out of numbers raises instead of repeating one."""
+        self.db.add(TicketNumberCounter(year=81, next_value=SEQUENCE_SIZE - 3))
+        self.db.commit()
+        
+        allocator = TicketNumberAllocator(block_size=10)
+        ticket_numbers = [allocator.allocate(self.db, year=81) for _ in range(3)]
+        self.assertEqual(len(set(ticket_numbers)), 3)
+        with self.assertRaises(TicketNumbersExhausted):
+            allocator.allocate(self.db, year=81)
+    
+    def test_permutation(self):
+        """Test that sequence values map to distinct, non-sequential numbers."""
+        values = [permute(26, value) for value in range(50000)]
+        
+        self.assertEqual(len(set(values)), len(values), "Permutation should never repeat a number")
+        self.assertTrue(all(0 <= value < SEQUENCE_SIZE for value in values))
+        steps = [b - a for a, b in zip(values, values[1:])]
+        self.assertLess(steps.count(1), 10, "Consecutive values should not map to consecutive numbers")
+        self.assertNotEqual(values[:10], [permute(27, value) for value in range(10)],
+                            "Each year should use a different permutation")
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,212 @@
+"""
+Unit tests for the group-commit ticket writer.
+
+These tests verify that:
+1. Tickets queued together are written with one INSERT and one commit, and
+   each future resolves to the ticket's id after the commit
+2. A ticket that violates a constraint fails alone, with its failure handler
+   called, while the rest of its batch is written
+3. Stopping the writer drains whatever is still queued
+4. A full queue turns new tickets away
+5. Tickets retried one by one after a failed batch get fresh ids
+6. A submission answered once its batch commits reports its timestamps
+"""
+
+import unittest
+import sys
+import os
+import asyncio
+import json
+import uuid
+from unittest import mock
+
+from sqlalchemy import event
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import routes.job_tickets as job_ticket_routes
+from core.idempotency import idempotency_store
+from core.ticket_writer import QueueFull, TicketWriteQueue
+from database import SessionLocal, engine
+from models.company import Company
+from models.idempotency_key import IdempotencyKey
+from models.job_ticket import JobTicket
+from utils.ticket_number import ticket_number_allocator
+
+class TestTicketWriter(unittest.TestCase):
+    """Test case for TicketWriteQueue."""
+    
+    def setUp(self):
+        """Create a company to file tickets under."""
+        self.db = SessionLocal()
+        suffix = uuid.uuid4().hex[:8]
+        self.company = Company(name=f"Writer Co {suffix}", normalized_name=f"writer co {suffix}")
+        self.db.add(self.company)
+        self.db.commit()
+    
+    def tearDown(self):
+        """Remove the test rows."""
+        self.db.rollback()
+        self.db.query(JobTicket).filter(JobTicket.company_id == self.company.id).delete()
+        self.db.delete(self.company)
+        self.db.commit()
+        self.db.close()
+    
+    def _tickets(self, count):
+        return [
+            JobTicket(company_id=self.company.id, company_name="Acme", location=f"{i} Queue St",
+                      submitted_by="Pat Customer", status="submitted", ticket_number=number)
+            for i, number in enumerate(ticket_number_allocator.allocate_many(self.db, count))
+        ]
+    
+    def _stored(self):
+        self.db.expire_all()
+        return self.db.query(JobTicket).filter(JobTicket.company_id == self.company.id).order_by(JobTicket.id).all()
+    
+    def _forget_key(self, key):
+        self.db.query(IdempotencyKey).filter(IdempotencyKey.key == key).delete()
+        self.db.commit()
+    
+    def _record(self):
+        statements = {"inserts": 0, "commits": 0}
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().startswith("INSERT INTO job_tickets "):
+                statements["inserts"] += 1
+        
+        def commit(conn):
+            statements["commits"] += 1
+        
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "commit", commit)
+        self.addCleanup(event.remove, engine, "before_cursor_execute", before_cursor_execute)
+        self.addCleanup(event.remove, engine, "commit", commit)
+        return statements
+    
+    def test_queued_tickets_share_a_commit(self):
+        """Test that a burst of tickets is written as one batch."""
+        writer = TicketWriteQueue("commit", batch_size=100, flush_interval_ms=200, max_pending=100)
+        tickets = self._tickets(30)
+        inserted = []
+        statements = self._record()
+        
+        writer.start()
+        try:
+            futures = [
+                writer.submit(ticket, on_insert=lambda db, written: inserted.append(written.id))
+                for ticket in tickets
+            ]
+            ids = [future.result(timeout=10) for future in futures]
+        finally:
+            writer.stop()
+        
+        self.assertEqual(ids, [ticket.id for ticket in self._stored()])
+        self.assertEqual(sorted(inserted), sorted(ids), "on_insert should see each ticket's id")
+        self.assertEqual(statements, {"inserts": 1, "commits": 1})
+        stats = writer.stats()
+        self.assertEqual((stats["batches"], stats["written"], stats["failed"], stats["pending"]), (1, 30, 0, 0))
+        self.assertEqual(stats["largest_batch"], 30)
+        self.assertFalse(stats["running"])
+    
+    def test_constraint_violation_fails_alone(self):
+        """Test that one bad ticket does not take its batch down."""
+        writer = TicketWriteQueue("enqueue", batch_size=100, flush_interval_ms=0, max_pending=100)
+        tickets = self._tickets(3)
+        self.db.add(JobTicket(company_id=self.company.id, company_name="Acme", ticket_number=tickets[1].ticket_number))
+        self.db.commit()
+        released = []
+        
+        futures = [writer.submit(ticket, on_failure=lambda db, i=i: released.append(i)) for i, ticket in enumerate(tickets)]
+        writer.stop()
+        
+        self.assertIsNone(futures[0].exception())
+        self.assertIsNotNone(futures[1].exception())
+        self.assertIsNone(futures[2].exception())
+        self.assertEqual(released, [1])
+        self.assertEqual(
+            sorted(ticket.location for ticket in self._stored() if ticket.location),
+            ["0 Queue St", "2 Queue St"]
+        )
+        self.assertEqual((writer.stats()["written"], writer.stats()["failed"]), (2, 1))
+    
+    def test_stop_drains_queue(self):
+        """Test that tickets still queued at shutdown are written."""
+        writer = TicketWriteQueue("enqueue", batch_size=2, flush_interval_ms=0, max_pending=100)
+        futures = [writer.submit(ticket) for ticket in self._tickets(5)]
+        self.assertEqual(writer.stats()["pending"], 5)
+        
+        writer.stop()
+        self.assertTrue(all(future.done() and future.exception() is None for future in futures))
+        self.assertEqual(len(self._stored()), 5)
+        self.assertEqual(writer.stats()["batches"], 3)
+    
+    def test_full_queue_rejects(self):
+        """Test that submissions beyond the queue size are turned away."""
+        writer = TicketWriteQueue("commit", batch_size=10, flush_interval_ms=0, max_pending=2)
+        tickets = self._tickets(3)
+        writer.submit(tickets[0])
+        writer.submit(tickets[1])
+        with self.assertRaises(QueueFull):
+            writer.submit(tickets[2])
+        self.assertEqual(writer.stats()["rejected"], 1)
+        
+        writer.stop()
+        self.assertEqual(len(self._stored()), 2)
+    
+    def test_retry_after_failed_batch_gets_fresh_ids(self):
+        """Test that ids handed out by a rolled back batch are not reused by the retry."""
+        writer = TicketWriteQueue("enqueue", batch_size=10, flush_interval_ms=0, max_pending=100)
+        tickets = self._tickets(2)
+        calls = []
+        
+        def on_insert(db, ticket):
+            calls.append(ticket.id)
+            if len(calls) == 1:
+                raise RuntimeError("reservation lost")
+        
+        # Another request takes the ids the failed batch had been given
+        write_one = writer._write_one
+        
+        def racing_write_one(db, pending):
+            if not self.db.query(JobTicket).filter(JobTicket.location == "Racing St").first():
+                self.db.add(JobTicket(company_id=self.company.id, company_name="Acme", location="Racing St"))
+                self.db.commit()
+            return write_one(db, pending)
+        
+        writer._write_one = racing_write_one
+        futures = [writer.submit(ticket, on_insert=on_insert) for ticket in tickets]
+        writer.stop()
+        
+        self.assertTrue(all(future.exception() is None for future in futures))
+        stored = {ticket.ticket_number: ticket.id for ticket in self._stored()}
+        self.assertEqual([future.result() for future in futures], [stored[ticket.ticket_number] for ticket in tickets])
+        self.assertEqual((writer.stats()["written"], writer.stats()["failed"]), (2, 0))
+    
+    def test_committed_submission_has_timestamps(self):
+        """Test that a commit-mode submission returns and stores created_at and updated_at."""
+        writer = TicketWriteQueue("commit", batch_size=10, flush_interval_ms=0, max_pending=100)
+        ticket = self._tickets(1)[0]
+        key = f"writer-{uuid.uuid4().hex[:8]}"
+        self.addCleanup(self._forget_key, key)
+        
+        writer.start()
+        try:
+            with mock.patch.object(job_ticket_routes, "ticket_write_queue", writer):
+                reservation = asyncio.run(idempotency_store.reserve(self.db, key, "tests.writer", {"n": 1}))
+                written = asyncio.run(job_ticket_routes._queue_submission(ticket, reservation))
+        finally:
+            writer.stop()
+        
+        self.assertIsNotNone(written.id)
+        self.assertIsNotNone(written.created_at)
+        self.assertIsNotNone(written.updated_at)
+        
+        replay = asyncio.run(idempotency_store.reserve(self.db, key, "tests.writer", {"n": 1})).replay
+        body = json.loads(replay.body)
+        self.assertEqual(body["id"], written.id)
+        self.assertIsNotNone(body["updated_at"])
+        self.assertIsNotNone(self._stored()[0].updated_at)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+"""
+Unit tests for token_version based access token revocation.
+
+These tests verify that:
+1. Changing a user's role or status bumps token_version and revokes older tokens
+2. Unrelated updates leave outstanding tokens valid
+3. Bumps made by another process are picked up by an incremental refresh
+4. Deleting a user rejects the tokens it was issued, even from their claims
+"""
+
+import unittest
+import sys
+import os
+import uuid
+import asyncio
+from unittest import mock
+
+from fastapi import HTTPException
+from sqlalchemy import update
+
+# Add parent directory to path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal, engine
+from models.user import User
+from core.token_versions import token_versions
+from core.security import create_user_token, get_current_principal
+
+class TestTokenVersions(unittest.TestCase):
+    """Test case for the in-memory token revocation table."""
+    
+    def setUp(self):
+        """Create a user to revoke tokens for."""
+        self.db = SessionLocal()
+        self.user = User(
+            email=f"versions-{uuid.uuid4().hex[:8]}@example.com",
+            hashed_password="not-a-real-hash",
+            role="tech"
+        )
+        self.db.add(self.user)
+        self.db.commit()
+    
+    def tearDown(self):
+        """Remove the user."""
+        self.db.delete(self.user)
+        self.db.commit()
+        self.db.close()
+    
+    def test_role_change_revokes_tokens(self):
+        """Test that a role change invalidates tokens issued before it."""
+        issued_version = self.user.token_version
+        self.assertTrue(token_versions.is_current(self.user.id, issued_version))
+        
+        self.user.role = "manager"
+        self.db.commit()
+        
+        self.assertEqual(self.user.token_version, issued_version + 1)
+        self.assertFalse(token_versions.is_current(self.user.id, issued_version))
+        self.assertTrue(token_versions.is_current(self.user.id, self.user.token_version))
+    
+    def test_unrelated_update_keeps_tokens(self):
+        """Test that changing a field not carried in the token keeps tokens valid."""
+        issued_version = self.user.token_version
+        
+        self.user.name = "Renamed Tech"
+        self.db.commit()
+        
+        self.assertEqual(self.user.token_version, issued_version)
+        self.assertTrue(token_versions.is_current(self.user.id, issued_version))
+    
+    def test_rolled_back_bump_is_ignored(self):
+        """Test that a bump is only published once its transaction commits."""
+        issued_version = self.user.token_version
+        
+        self.user.is_active = False
+        self.db.flush()
+        self.db.rollback()
+        
+        self.assertTrue(token_versions.is_current(self.user.id, issued_version))
+    
+    def test_refresh_loads_external_bumps(self):
+        """Test that bumps committed elsewhere are loaded by a refresh."""
+        token_versions.refresh()
+        issued_version = self.user.token_version
+        
+        # Simulate another worker process revoking the user's tokens
+        with engine.begin() as connection:
+            connection.execute(
+                update(User.__table__)
+                .where(User.__table__.c.id == self.user.id)
+                .values(token_version=issued_version + 1)
+            )
+        
+        self.assertTrue(token_versions.is_current(self.user.id, issued_version))
+        token_versions.refresh()
+        self.assertFalse(token_versions.is_current(self.user.id, issued_version))
+        self.db.refresh(self.user)
+    
+    def _new_user(self, **fields):
+        user = User(
+            email=f"deleted-{uuid.uuid4().hex[:8]}@example.com",
+            hashed_password="not-a-real-hash",
+            role="tech",
+            **fields
+        )
+        self.db.add(user)
+        self.db.commit()
+        return user
+    
+    def _authenticate(self, token):
+        return asyncio.run(get_current_principal(token=token, db=self.db))
+    
+    def test_deleted_user_token_rejected(self):
+        """Test that a deleted user's outstanding access token is rejected."""
+        user = self._new_user()
+        user_id = user.id
+        token = create_user_token(user)
+        
+        with mock.patch("core.security.settings.auth.trust_access_token_claims", True):
+            self.assertEqual(self._authenticate(token).id, user_id)
+            
+            self.db.delete(user)
+            self.db.commit()
+            
+            with self.assertRaises(HTTPException) as ctx:
+                self._authenticate(token)
+            self.assertEqual(ctx.exception.status_code, 401)
+    
+    def test_reused_id_starts_fresh(self):
+        """Test that a new user inserted under a deleted user's id can authenticate."""
+        user = self._new_user()
+        user_id = user.id
+        self.db.delete(user)
+        self.db.commit()
+        
+        reused = self._new_user(id=user_id)
+        try:
+            with mock.patch("core.security.settings.auth.trust_access_token_claims", True):
+                self.assertEqual(self._authenticate(create_user_token(reused)).id, user_id)
+        finally:
+            self.db.delete(reused)
+            self.db.commit()
+        
+        # Deleting the new user revokes its tokens in turn
+        self.assertFalse(token_versions.is_current(user_id, 0))
+
+if __name__ == "__main__":
+    unittest.main()
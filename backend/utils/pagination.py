@@ -0,0 +1,156 @@
+"""
+Keyset (cursor) pagination utility.
+
+List endpoints return rows newest first, ordered by (created_at, id), and
+hand out an opaque cursor naming the last row of each page. The next page
+continues strictly after that row, so its cost does not grow with depth the
+way OFFSET does, and rows inserted meanwhile do not shift later pages.
+
+The change feed uses sync cursors instead: one position per stream (changed
+rows by (updated_at, id), deletions by (deleted_at, id)), oldest first.
+Their timestamps are timezone-aware UTC, like the values the application
+writes to those columns.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from typing import Any, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, tuple_
+
+
+# Where a sync stream has got to: (timestamp, id) of the last row delivered,
+# (timestamp, None) once every row up to that timestamp has been delivered,
+# or (None, None) before the first sync
+Position = Tuple[Optional[datetime], Optional[int]]
+
+
+def _encode(payload: Any) -> str:
+    data = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> Any:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    """Opaque cursor for the row a page ended at"""
+    return _encode([created_at.isoformat() if created_at else None, row_id])
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """(created_at, id) of a cursor; raises 400 if it is malformed"""
+    try:
+        created_at, row_id = _decode(cursor)
+        if not isinstance(row_id, int):
+            raise ValueError("id must be an integer")
+        return (datetime.fromisoformat(created_at) if created_at else None), row_id
+    except (binascii.Error, ValueError, TypeError, UnicodeDecodeError):
+        raise _invalid_cursor()
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    """
+    A timestamp as aware UTC; naive values are UTC already (SQLite hands
+    back the UTC values written to it without their offset)
+    """
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+def _position(value) -> Position:
+    timestamp, row_id = value
+    if row_id is not None and (timestamp is None or not isinstance(row_id, int)):
+        raise ValueError("invalid position")
+    if not timestamp:
+        return None, row_id
+    return _as_utc(datetime.fromisoformat(timestamp)), row_id
+
+
+def encode_sync_cursor(changes: Position, deletions: Position) -> str:
+    """Opaque cursor for the positions of both streams of the change feed"""
+    return _encode({
+        stream: [_as_utc(timestamp).isoformat() if timestamp else None, row_id]
+        for stream, (timestamp, row_id) in (("t", changes), ("d", deletions))
+    })
+
+
+def decode_sync_cursor(cursor: str) -> Tuple[Position, Position]:
+    """(changes, deletions) positions of a sync cursor; raises 400 if it is malformed"""
+    try:
+        payload = _decode(cursor)
+        return _position(payload["t"]), _position(payload["d"])
+    except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError):
+        raise _invalid_cursor()
+
+
+def after_position(timestamp_column, id_column, position: Position):
+    """SQL condition: rows after a position in oldest-first order (None for all rows)"""
+    timestamp, row_id = position
+    if timestamp is None:
+        return None
+    if row_id is None:
+        return timestamp_column > timestamp
+    return tuple_(timestamp_column, id_column) > tuple_(timestamp, row_id)
+
+
+def advance_position(rows: list, limit: int, position: Position, horizon: datetime,
+                     timestamp_key: str, id_key: str = "id") -> Tuple[list, Position, bool]:
+    """
+    Trim a stream's rows fetched with limit + 1 and move its position on
+    
+    A stream with nothing left before the horizon is caught up to the
+    horizon itself, so later syncs start from there.
+    
+    Returns:
+        The rows to send, the new position and whether more rows are waiting
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, (rows[-1][timestamp_key], rows[-1][id_key]), True
+    if position[0] is not None and position[1] is None and position[0] > horizon:
+        return rows, position, False
+    return rows, (horizon, None), False
+
+
+def newest_first(model):
+    """ORDER BY clause matching the cursors"""
+    return (model.created_at.desc(), model.id.desc())
+
+
+def after_cursor(model, cursor: str):
+    """SQL condition: rows that come after the cursor in newest-first order"""
+    created_at, row_id = decode_cursor(cursor)
+    
+    # Compare with the created_at stored on the cursor row while it exists, so
+    # the boundary is exact whatever precision the database keeps; fall back
+    # to the value in the cursor if the row has been deleted since
+    stored = select(model.created_at).where(model.id == row_id).scalar_subquery()
+    boundary = func.coalesce(stored, created_at)
+    return tuple_(model.created_at, model.id) < tuple_(boundary, row_id)
+
+
+def page_cursor(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Trim a page fetched with limit + 1 rows
+    
+    Returns:
+        The page's rows and the cursor of the next page (None on the last page)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
@@ -4,15 +4,199 @@ Ticket number generation utility.
 This module provides functions for generating unique ticket numbers for job tickets.
 The ticket number format is YYXXXXXX where:
 - YY is the last two digits of the current year
-- XXXXXX is a random 6-digit number (000000-999999)
+- XXXXXX is a 6-digit number (000000-999999)
 
-The module ensures that generated ticket numbers are unique within the database.
+Numbers are allocated without probing the database. ticket_number_counters
+holds the next unreserved sequence value of each year; every worker reserves
+a block of values at a time (one short transaction per block) and hands them
+out from memory. Sequence values are mapped to XXXXXX by a format-preserving
+permutation of 000000-999999, so consecutive tickets do not get consecutive
+numbers, yet no two values ever map to the same number.
+
+Values reserved by a worker that exits before using them are skipped, so
+numbers have gaps but never repeat. Numbers in a new block that are already
+taken (issued by the earlier random generator) are dropped when the block is
+reserved.
 """
 
-import random
 import datetime
+import hashlib
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+
+from core.config import settings
 from models.job_ticket import JobTicket
+from models.ticket_number_counter import TicketNumberCounter
+
+# Sequence values available per year (XXXXXX)
+SEQUENCE_SIZE = 1000000
+
+# The permutation runs on 20 bits (two 10-bit halves) and cycle-walks into
+# 0-999999. Its key is fixed: changing it would re-map values already issued.
+_HALF_BITS = 10
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_ROUNDS = 4
+_PERMUTATION_KEY = b"jobticketinvoice ticket numbers v1"
+
+
+class TicketNumbersExhausted(RuntimeError):
+    """Every ticket number of a year has been reserved"""
+
+
+def _round(year: int, round_index: int, half: int) -> int:
+    digest = hashlib.blake2b(
+        bytes((year, round_index)) + half.to_bytes(2, "big"),
+        digest_size=2,
+        key=_PERMUTATION_KEY,
+    ).digest()
+    return int.from_bytes(digest, "big") & _HALF_MASK
+
+
+def permute(year: int, value: int) -> int:
+    """Map a sequence value (0-999999) to its 6-digit number; a bijection per year"""
+    while True:
+        left, right = value >> _HALF_BITS, value & _HALF_MASK
+        for round_index in range(_ROUNDS):
+            left, right = right, left ^ _round(year, round_index, right)
+        value = (left << _HALF_BITS) | right
+        if value < SEQUENCE_SIZE:
+            return value
+
+
+def format_ticket_number(year: int, value: int) -> str:
+    """Ticket number of a year's sequence value"""
+    return f"{year:02d}{permute(year, value):06d}"
+
+
+class TicketNumberAllocator:
+    """Hands out ticket numbers from blocks reserved in ticket_number_counters"""
+    
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self._blocks: Dict[int, Deque[str]] = {}
+        self._lock = threading.Lock()
+        # Serializes reservations; _lock is never held across a transaction,
+        # so callers served from memory do not wait for a refill
+        self._refill_lock = threading.Lock()
+        self.allocated = 0
+        self.blocks_reserved = 0
+        self.skipped = 0
+        self.last_reserve_ms = 0.0
+    
+    def _advance(self, connection, year: int, size: int) -> int:
+        """Move the year's counter past one block; returns the new counter value"""
+        table = TicketNumberCounter.__table__
+        while True:
+            advanced = connection.execute(
+                update(table)
+                .where(table.c.year == year)
+                .values(next_value=table.c.next_value + size)
+            )
+            if advanced.rowcount:
+                return connection.execute(select(table.c.next_value).where(table.c.year == year)).scalar_one()
+            try:
+                with connection.begin_nested():
+                    connection.execute(insert(table).values(year=year, next_value=size))
+                return size
+            except IntegrityError:
+                # Another worker created the year's counter first
+                continue
+    
+    def _reserve(self, db: Session, year: int, size: int) -> Deque[str]:
+        """Reserve the next block of a year in its own transaction"""
+        started = time.perf_counter()
+        
+        # Not the request's transaction: a rolled back request must not return
+        # the block, since its numbers may already have been handed out
+        with db.get_bind().engine.begin() as connection:
+            end = self._advance(connection, year, size)
+            start = end - size
+            if start >= SEQUENCE_SIZE:
+                raise TicketNumbersExhausted(f"All ticket numbers for year {year:02d} have been used")
+            
+            numbers = [format_ticket_number(year, value) for value in range(start, min(end, SEQUENCE_SIZE))]
+            taken = set(connection.execute(
+                select(JobTicket.ticket_number).where(JobTicket.ticket_number.in_(numbers))
+            ).scalars())
+        
+        self.blocks_reserved += 1
+        self.skipped += len(taken)
+        self.last_reserve_ms = round((time.perf_counter() - started) * 1000, 3)
+        return deque(number for number in numbers if number not in taken)
+    
+    def allocate(self, db: Session, year: Optional[int] = None) -> str:
+        """
+        Next ticket number for a year (the current year by default)
+        
+        Only touches the database when the worker's block for the year is used up.
+        """
+        return self.allocate_many(db, 1, year)[0]
+    
+    def allocate_many(self, db: Session, count: int, year: Optional[int] = None) -> List[str]:
+        """
+        count ticket numbers for a year at once
+        
+        Tops up the worker's block with a single reservation covering the
+        shortfall, however many numbers are asked for. The reservation runs
+        outside the block lock, so other callers keep taking the numbers left.
+        """
+        if year is None:
+            year = datetime.datetime.now().year % 100
+        
+        while True:
+            taken = self._take(year, count)
+            if taken is not None:
+                return taken
+            with self._refill_lock:
+                # Another caller may have refilled the block while this one waited
+                taken = self._take(year, count)
+                if taken is not None:
+                    return taken
+                shortfall = count - self._available(year)
+                block = self._reserve(db, year, max(self.block_size, shortfall))
+                taken = self._take(year, count, block)
+                if taken is not None:
+                    return taken
+    
+    def _take(self, year: int, count: int, block: Optional[Deque[str]] = None) -> Optional[List[str]]:
+        """Pop count numbers of the year's block after adding block to it; None if too few"""
+        with self._lock:
+            numbers = self._blocks.get(year, deque())
+            # On year rollover this also drops the previous year's leftovers
+            self._blocks = {year: numbers}
+            if block:
+                numbers.extend(block)
+            if len(numbers) < count:
+                return None
+            self.allocated += count
+            return [numbers.popleft() for _ in range(count)]
+    
+    def _available(self, year: int) -> int:
+        """Numbers of a year left in the worker's block"""
+        with self._lock:
+            return len(self._blocks.get(year, ()))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        with self._lock:
+            available = {f"{year:02d}": len(numbers) for year, numbers in self._blocks.items()}
+        return {
+            "block_size": self.block_size,
+            "allocated": self.allocated,
+            "blocks_reserved": self.blocks_reserved,
+            "skipped_taken": self.skipped,
+            "available": available,
+            "last_reserve_ms": self.last_reserve_ms,
+        }
+
+
+ticket_number_allocator = TicketNumberAllocator(block_size=settings.app.ticket_number_block_size)
 
 
 def generate_ticket_number(db: Session) -> str:
@@ -21,53 +205,15 @@ def generate_ticket_number(db: Session) -> str:
     
     The ticket number format is YYXXXXXX where:
     - YY is the last two digits of the current year
-    - XXXXXX is a random 6-digit number (000000-999999)
+    - XXXXXX is a 6-digit number (000000-999999)
     
-    This function ensures the generated ticket number is unique in the database
-    by checking for existing ticket numbers and regenerating if a collision occurs.
+    Numbers come from this worker's reserved block, so no query is made
+    unless the block is used up.
     
     Args:
         db: SQLAlchemy database session
-        
+    
     Returns:
         A unique ticket number string
     """
-    # Get the current year's last two digits
-    current_year = str(datetime.datetime.now().year)[-2:]
-    
-    # Maximum number of attempts to generate a unique ticket number
-    max_attempts = 10
-    attempts = 0
-    
-    while attempts < max_attempts:
-        # Generate a random 6-digit number
-        random_digits = str(random.randint(0, 999999)).zfill(6)
-        
-        # Combine year and random digits to form the ticket number
-        ticket_number = f"{current_year}{random_digits}"
-        
-        # Check if this ticket number already exists in the database
-        existing_ticket = db.query(JobTicket).filter(JobTicket.ticket_number == ticket_number).first()
-        
-        # If no existing ticket with this number, we've found a unique one
-        if not existing_ticket:
-            return ticket_number
-            
-        # Increment attempts counter
-        attempts += 1
-    
-    # If we've exceeded max_attempts, we'll try a different approach
-    # This is an extremely unlikely scenario but we handle it for robustness
-    while True:
-        # Generate a random 6-digit number
-        random_digits = str(random.randint(0, 999999)).zfill(6)
-        
-        # Combine year and random digits to form the ticket number
-        ticket_number = f"{current_year}{random_digits}"
-        
-        # Check if this ticket number already exists in the database
-        existing_ticket = db.query(JobTicket).filter(JobTicket.ticket_number == ticket_number).first()
-        
-        # If no existing ticket with this number, we've found a unique one
-        if not existing_ticket:
-            return ticket_number
+    return ticket_number_allocator.allocate(db)